@@ -0,0 +1,401 @@
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS organizations (
+  organization_id INTEGER PRIMARY KEY,
+  name TEXT NOT NULL,
+  domain TEXT NOT NULL,
+  created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS teams (
+  team_id INTEGER PRIMARY KEY,
+  organization_id INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  team_type TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY (organization_id) REFERENCES organizations(organization_id)
+);
+
+CREATE TABLE IF NOT EXISTS users (
+  user_id INTEGER PRIMARY KEY,
+  organization_id INTEGER NOT NULL,
+  email TEXT NOT NULL,
+  full_name TEXT NOT NULL,
+  title TEXT NOT NULL,
+  department TEXT NOT NULL,
+  location TEXT NOT NULL,
+  role TEXT NOT NULL,
+  manager_user_id INTEGER,
+  hire_date TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  deactivated_at TEXT,
+  FOREIGN KEY (organization_id) REFERENCES organizations(organization_id),
+  FOREIGN KEY (manager_user_id) REFERENCES users(user_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+CREATE TABLE IF NOT EXISTS team_memberships (
+  team_id INTEGER NOT NULL,
+  user_id INTEGER NOT NULL,
+  is_team_admin INTEGER NOT NULL DEFAULT 0,
+  joined_at TEXT NOT NULL,
+  left_at TEXT,
+  PRIMARY KEY (team_id, user_id),
+  FOREIGN KEY (team_id) REFERENCES teams(team_id),
+  FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+  project_id INTEGER PRIMARY KEY,
+  organization_id INTEGER NOT NULL,
+  owner_team_id INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  project_type TEXT NOT NULL,
+  privacy TEXT NOT NULL,
+  status TEXT NOT NULL,
+  start_date TEXT,
+  due_date TEXT,
+  created_at TEXT NOT NULL,
+  archived_at TEXT,
+  description TEXT,
+  FOREIGN KEY (organization_id) REFERENCES organizations(organization_id),
+  FOREIGN KEY (owner_team_id) REFERENCES teams(team_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_projects_team ON projects(owner_team_id);
+
+CREATE TABLE IF NOT EXISTS sections (
+  section_id INTEGER PRIMARY KEY,
+  project_id INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  position INTEGER NOT NULL,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY (project_id) REFERENCES projects(project_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sections_project ON sections(project_id);
+
+CREATE TABLE IF NOT EXISTS tasks (
+  task_id INTEGER PRIMARY KEY,
+  project_id INTEGER NOT NULL,
+  section_id INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  creator_user_id INTEGER NOT NULL,
+  assignee_user_id INTEGER,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  start_date TEXT,
+  due_date TEXT,
+  completed INTEGER NOT NULL,
+  completed_at TEXT,
+  FOREIGN KEY (project_id) REFERENCES projects(project_id),
+  FOREIGN KEY (section_id) REFERENCES sections(section_id),
+  FOREIGN KEY (creator_user_id) REFERENCES users(user_id),
+  FOREIGN KEY (assignee_user_id) REFERENCES users(user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON tasks(assignee_user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+
+CREATE TABLE IF NOT EXISTS subtasks (
+  subtask_id INTEGER PRIMARY KEY,
+  parent_task_id INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  creator_user_id INTEGER NOT NULL,
+  assignee_user_id INTEGER,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  due_date TEXT,
+  completed INTEGER NOT NULL,
+  completed_at TEXT,
+  FOREIGN KEY (parent_task_id) REFERENCES tasks(task_id),
+  FOREIGN KEY (creator_user_id) REFERENCES users(user_id),
+  FOREIGN KEY (assignee_user_id) REFERENCES users(user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_subtasks_parent ON subtasks(parent_task_id);
+
+CREATE TABLE IF NOT EXISTS comments (
+  comment_id INTEGER PRIMARY KEY,
+  author_user_id INTEGER NOT NULL,
+  task_id INTEGER,
+  subtask_id INTEGER,
+  body TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY (author_user_id) REFERENCES users(user_id),
+  FOREIGN KEY (task_id) REFERENCES tasks(task_id),
+  FOREIGN KEY (subtask_id) REFERENCES subtasks(subtask_id),
+  CHECK (
+    (task_id IS NOT NULL AND subtask_id IS NULL) OR
+    (task_id IS NULL AND subtask_id IS NOT NULL)
+  )
+);
+
+CREATE INDEX IF NOT EXISTS idx_comments_task ON comments(task_id);
+CREATE INDEX IF NOT EXISTS idx_comments_subtask ON comments(subtask_id);
+
+CREATE TABLE IF NOT EXISTS tags (
+  tag_id INTEGER PRIMARY KEY,
+  organization_id INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  color TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY (organization_id) REFERENCES organizations(organization_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tags_org_name ON tags(organization_id, name);
+
+CREATE TABLE IF NOT EXISTS task_tags (
+  task_id INTEGER,
+  subtask_id INTEGER,
+  tag_id INTEGER NOT NULL,
+  added_at TEXT NOT NULL,
+  PRIMARY KEY (tag_id, task_id, subtask_id),
+  FOREIGN KEY (task_id) REFERENCES tasks(task_id),
+  FOREIGN KEY (subtask_id) REFERENCES subtasks(subtask_id),
+  FOREIGN KEY (tag_id) REFERENCES tags(tag_id),
+  CHECK (
+    (task_id IS NOT NULL AND subtask_id IS NULL) OR
+    (task_id IS NULL AND subtask_id IS NOT NULL)
+  )
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags(task_id);
+
+CREATE TABLE IF NOT EXISTS custom_field_definitions (
+  custom_field_id INTEGER PRIMARY KEY,
+  organization_id INTEGER NOT NULL,
+  name TEXT NOT NULL,
+  field_type TEXT NOT NULL,
+  enum_options_json TEXT,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY (organization_id) REFERENCES organizations(organization_id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cfd_org_name ON custom_field_definitions(organization_id, name);
+
+CREATE TABLE IF NOT EXISTS project_custom_fields (
+  project_id INTEGER NOT NULL,
+  custom_field_id INTEGER NOT NULL,
+  is_required INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL,
+  PRIMARY KEY (project_id, custom_field_id),
+  FOREIGN KEY (project_id) REFERENCES projects(project_id),
+  FOREIGN KEY (custom_field_id) REFERENCES custom_field_definitions(custom_field_id)
+);
+
+CREATE TABLE IF NOT EXISTS custom_field_values (
+  custom_field_value_id INTEGER PRIMARY KEY,
+  custom_field_id INTEGER NOT NULL,
+  task_id INTEGER,
+  subtask_id INTEGER,
+  value_text TEXT,
+  value_number REAL,
+  value_enum TEXT,
+  created_at TEXT NOT NULL,
+  FOREIGN KEY (custom_field_id) REFERENCES custom_field_definitions(custom_field_id),
+  FOREIGN KEY (task_id) REFERENCES tasks(task_id),
+  FOREIGN KEY (subtask_id) REFERENCES subtasks(subtask_id),
+  CHECK (
+    (task_id IS NOT NULL AND subtask_id IS NULL) OR
+    (task_id IS NULL AND subtask_id IS NOT NULL)
+  )
+);
+
+CREATE INDEX IF NOT EXISTS idx_cfv_task ON custom_field_values(task_id);
+
+CREATE TABLE IF NOT EXISTS attachments (
+  attachment_id INTEGER PRIMARY KEY,
+  task_id INTEGER,
+  subtask_id INTEGER,
+  uploader_user_id INTEGER NOT NULL,
+  file_name TEXT NOT NULL,
+  file_type TEXT NOT NULL,
+  file_size_bytes INTEGER NOT NULL,
+  created_at TEXT NOT NULL,
+  url TEXT,
+  FOREIGN KEY (task_id) REFERENCES tasks(task_id),
+  FOREIGN KEY (subtask_id) REFERENCES subtasks(subtask_id),
+  FOREIGN KEY (uploader_user_id) REFERENCES users(user_id),
+  CHECK (
+    (task_id IS NOT NULL AND subtask_id IS NULL) OR
+    (task_id IS NULL AND subtask_id IS NOT NULL)
+  )
+);
+
+CREATE INDEX IF NOT EXISTS idx_attachments_task ON attachments(task_id);
+
+-- Compatibility views: same columns as schema.sql, ids rendered as string GIDs.
+
+CREATE VIEW IF NOT EXISTS v_organizations AS
+SELECT
+  CAST(organization_id AS TEXT) AS organization_id,
+  name,
+  domain,
+  created_at
+FROM organizations;
+
+CREATE VIEW IF NOT EXISTS v_teams AS
+SELECT
+  CAST(team_id AS TEXT) AS team_id,
+  CAST(organization_id AS TEXT) AS organization_id,
+  name,
+  team_type,
+  created_at
+FROM teams;
+
+CREATE VIEW IF NOT EXISTS v_users AS
+SELECT
+  CAST(user_id AS TEXT) AS user_id,
+  CAST(organization_id AS TEXT) AS organization_id,
+  email,
+  full_name,
+  title,
+  department,
+  location,
+  role,
+  CAST(manager_user_id AS TEXT) AS manager_user_id,
+  hire_date,
+  created_at,
+  deactivated_at
+FROM users;
+
+CREATE VIEW IF NOT EXISTS v_team_memberships AS
+SELECT
+  CAST(team_id AS TEXT) AS team_id,
+  CAST(user_id AS TEXT) AS user_id,
+  is_team_admin,
+  joined_at,
+  left_at
+FROM team_memberships;
+
+CREATE VIEW IF NOT EXISTS v_projects AS
+SELECT
+  CAST(project_id AS TEXT) AS project_id,
+  CAST(organization_id AS TEXT) AS organization_id,
+  CAST(owner_team_id AS TEXT) AS owner_team_id,
+  name,
+  project_type,
+  privacy,
+  status,
+  start_date,
+  due_date,
+  created_at,
+  archived_at,
+  description
+FROM projects;
+
+CREATE VIEW IF NOT EXISTS v_sections AS
+SELECT
+  CAST(section_id AS TEXT) AS section_id,
+  CAST(project_id AS TEXT) AS project_id,
+  name,
+  position,
+  created_at
+FROM sections;
+
+CREATE VIEW IF NOT EXISTS v_tasks AS
+SELECT
+  CAST(task_id AS TEXT) AS task_id,
+  CAST(project_id AS TEXT) AS project_id,
+  CAST(section_id AS TEXT) AS section_id,
+  name,
+  description,
+  CAST(creator_user_id AS TEXT) AS creator_user_id,
+  CAST(assignee_user_id AS TEXT) AS assignee_user_id,
+  created_at,
+  updated_at,
+  start_date,
+  due_date,
+  completed,
+  completed_at
+FROM tasks;
+
+CREATE VIEW IF NOT EXISTS v_subtasks AS
+SELECT
+  CAST(subtask_id AS TEXT) AS subtask_id,
+  CAST(parent_task_id AS TEXT) AS parent_task_id,
+  name,
+  description,
+  CAST(creator_user_id AS TEXT) AS creator_user_id,
+  CAST(assignee_user_id AS TEXT) AS assignee_user_id,
+  created_at,
+  updated_at,
+  due_date,
+  completed,
+  completed_at
+FROM subtasks;
+
+CREATE VIEW IF NOT EXISTS v_comments AS
+SELECT
+  CAST(comment_id AS TEXT) AS comment_id,
+  CAST(author_user_id AS TEXT) AS author_user_id,
+  CAST(task_id AS TEXT) AS task_id,
+  CAST(subtask_id AS TEXT) AS subtask_id,
+  body,
+  created_at
+FROM comments;
+
+CREATE VIEW IF NOT EXISTS v_tags AS
+SELECT
+  CAST(tag_id AS TEXT) AS tag_id,
+  CAST(organization_id AS TEXT) AS organization_id,
+  name,
+  color,
+  created_at
+FROM tags;
+
+CREATE VIEW IF NOT EXISTS v_task_tags AS
+SELECT
+  CAST(task_id AS TEXT) AS task_id,
+  CAST(subtask_id AS TEXT) AS subtask_id,
+  CAST(tag_id AS TEXT) AS tag_id,
+  added_at
+FROM task_tags;
+
+CREATE VIEW IF NOT EXISTS v_custom_field_definitions AS
+SELECT
+  CAST(custom_field_id AS TEXT) AS custom_field_id,
+  CAST(organization_id AS TEXT) AS organization_id,
+  name,
+  field_type,
+  enum_options_json,
+  created_at
+FROM custom_field_definitions;
+
+CREATE VIEW IF NOT EXISTS v_project_custom_fields AS
+SELECT
+  CAST(project_id AS TEXT) AS project_id,
+  CAST(custom_field_id AS TEXT) AS custom_field_id,
+  is_required,
+  created_at
+FROM project_custom_fields;
+
+CREATE VIEW IF NOT EXISTS v_custom_field_values AS
+SELECT
+  CAST(custom_field_value_id AS TEXT) AS custom_field_value_id,
+  CAST(custom_field_id AS TEXT) AS custom_field_id,
+  CAST(task_id AS TEXT) AS task_id,
+  CAST(subtask_id AS TEXT) AS subtask_id,
+  value_text,
+  value_number,
+  value_enum,
+  created_at
+FROM custom_field_values;
+
+CREATE VIEW IF NOT EXISTS v_attachments AS
+SELECT
+  CAST(attachment_id AS TEXT) AS attachment_id,
+  CAST(task_id AS TEXT) AS task_id,
+  CAST(subtask_id AS TEXT) AS subtask_id,
+  CAST(uploader_user_id AS TEXT) AS uploader_user_id,
+  file_name,
+  file_type,
+  file_size_bytes,
+  created_at,
+  url
+FROM attachments;
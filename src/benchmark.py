@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Scale profiles: env overrides on top of utils/config.py defaults. Teams and
+# projects grow with users so per-team and per-project sizes stay realistic.
+PROFILES: dict[str, dict[str, str]] = {
+    "1k": {"TARGET_USERS": "1000", "TEAMS_COUNT": "12", "PROJECTS_COUNT": "35"},
+    "7k": {"TARGET_USERS": "7000", "TEAMS_COUNT": "80", "PROJECTS_COUNT": "240"},
+    "70k": {"TARGET_USERS": "70000", "TEAMS_COUNT": "800", "PROJECTS_COUNT": "2400"},
+    "700k": {"TARGET_USERS": "700000", "TEAMS_COUNT": "8000", "PROJECTS_COUNT": "24000"},
+}
+
+# Fixed "now" so every run generates the same data.
+_SIM_NOW = "2026-01-15T12:00:00"
+
+# (metric, True if higher is better) compared by `compare`.
+_RUN_METRICS = [
+    ("wall_seconds", False),
+    ("rows_per_second", True),
+    ("peak_rss_mb", False),
+    ("db_bytes", False),
+]
+
+# Stages faster than this are too noisy to flag.
+_MIN_STAGE_SECONDS = 0.05
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _wait(proc: subprocess.Popen) -> float | None:
+    """Wait for `proc`; return its peak RSS in MB where the OS reports it."""
+    if not hasattr(os, "wait4"):  # Windows
+        proc.wait()
+        return None
+    # wait4 reports this child's own peak RSS (including its worker
+    # processes), unlike RUSAGE_CHILDREN which spans every run so far.
+    _pid, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in bytes on macOS, KiB elsewhere.
+    return round(usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_main(env: dict[str, str], workdir: Path) -> tuple[dict[str, Any], float | None, float, int]:
+    # Run report, peak RSS, wall seconds and DB size of one `src/main.py` process.
+    db_path = workdir / "bench.sqlite"
+    report_path = workdir / "run_report.json"
+    log_path = workdir / "main.log"
+    full_env = {
+        **os.environ,
+        "SIM_NOW": _SIM_NOW,
+        **env,
+        "DB_PATH": str(db_path),
+        "RUN_REPORT_PATH": str(report_path),
+    }
+    t0 = time.perf_counter()
+    with log_path.open("w", encoding="utf-8") as log:
+        proc = subprocess.Popen([sys.executable, str(ROOT / "src" / "main.py")], cwd=ROOT, env=full_env, stderr=log)
+        peak_rss_mb = _wait(proc)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        tail = log_path.read_text(encoding="utf-8").splitlines()[-20:]
+        raise RuntimeError("Pipeline failed:\n" + "\n".join(tail))
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    db_bytes = db_path.stat().st_size
+    db_path.unlink()
+    return report, peak_rss_mb, wall, db_bytes
+
+
+def run_pipeline(env: dict[str, str], workdir: Path) -> dict[str, Any]:
+    """Run `src/main.py` in a fresh process and summarize its run report."""
+    report, peak_rss_mb, wall, db_bytes = _run_main(env, workdir)
+    rows = sum(n for s in report["stages"] for n in s["rows"].values())
+    stages = {
+        s["name"]: {
+            "wall_seconds": s["wall_seconds"],
+            "cpu_seconds": round(s["cpu_seconds"] + s["worker_cpu_seconds"], 4),
+            "rows": sum(s["rows"].values()),
+            "rows_per_second": s["rows_per_second"],
+        }
+        for s in report["stages"]
+    }
+    result = {
+        "wall_seconds": round(wall, 4),
+        "pipeline_seconds": report["wall_seconds"],
+        "rows": rows,
+        "rows_per_second": round(rows / wall, 1),
+        "peak_rss_mb": peak_rss_mb,
+        "db_bytes": db_bytes,
+        "stages": stages,
+    }
+    return result
+
+
+def run_generator(env: dict[str, str], workdir: Path, stage: str) -> dict[str, Any]:
+    """Run one stage alone (ISOLATE_STAGE) after its prerequisites, in a fresh process."""
+    report, _rss, _wall, _bytes = _run_main({**env, "ISOLATE_STAGE": stage}, workdir)
+    (s,) = report["stages"]
+    pages_before = report["isolated"]["db_pages_before"]
+    return {
+        "wall_seconds": s["wall_seconds"],
+        "cpu_seconds": round(s["cpu_seconds"] + s["worker_cpu_seconds"], 4),
+        "rows": sum(s["rows"].values()),
+        "rows_per_second": s["rows_per_second"],
+        "max_rss_growth_mb": s["max_rss_growth_mb"],
+        "db_growth_bytes": (s["db_pages"] - pages_before) * report["db"]["page_size"],
+    }
+
+
+def _best(runs: list[dict[str, Any]]) -> dict[str, Any]:
+    # Fastest repetition, with the lowest per-stage time seen in any of them.
+    best = dict(min(runs, key=lambda r: r["wall_seconds"]))
+    best["stages"] = {
+        name: min((r["stages"][name] for r in runs if name in r["stages"]), key=lambda s: s["wall_seconds"])
+        for name in best["stages"]
+    }
+    return best
+
+
+def benchmark_profile(
+    name: str, extra_env: dict[str, str], repeat: int, serial: bool, generators: bool = False
+) -> dict[str, Any]:
+    """Benchmark one profile: the full pipeline, a serial run and optionally each generator alone.
+
+    `serial` stage times come from one whole PIPELINE_WORKERS=1 run, so its
+    stages share a process and writer. `generators` holds one process per
+    stage that builds the stage's inputs first and then runs it alone.
+    """
+    env = {**PROFILES[name], **extra_env}
+    entry: dict[str, Any] = {
+        "profile": name,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "env": env,
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        entry["pipeline"] = _best([run_pipeline(env, Path(tmp)) for _ in range(repeat)])
+        if serial:
+            serial_env = {**env, "PIPELINE_WORKERS": "1"}
+            entry["serial"] = _best([run_pipeline(serial_env, Path(tmp)) for _ in range(repeat)])["stages"]
+        if generators:
+            entry["generators"] = {
+                stage: min(
+                    (run_generator(env, Path(tmp), stage) for _ in range(repeat)), key=lambda s: s["wall_seconds"]
+                )
+                for stage in entry["pipeline"]["stages"]
+            }
+    return entry
+
+
+def load_history(path: Path) -> list[dict[str, Any]]:
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_history(path: Path, history: list[dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(history, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _section_stages(entry: dict[str, Any], section: str) -> dict[str, Any]:
+    if section == "pipeline":
+        return entry["pipeline"]["stages"]
+    if section == "serial":
+        # Entries recorded before the rename call them "isolated".
+        return entry.get("serial", entry.get("isolated", {}))
+    return entry.get(section, {})
+
+
+def compare_entries(
+    current: dict[str, Any],
+    baseline: list[dict[str, Any]],
+    threshold: float,
+) -> list[str]:
+    """Regressions of `current` against the median of `baseline` entries."""
+    problems: list[str] = []
+
+    def check(label: str, now: float | None, before: list[float], higher_is_better: bool) -> None:
+        before = [b for b in before if b is not None]
+        if now is None or not before:
+            return
+        ref = statistics.median(before)
+        if ref <= 0:
+            return
+        change = (now - ref) / ref
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            problems.append(f"{label}: {ref:,.4g} -> {now:,.4g} ({change:+.1%})")
+
+    for metric, higher_is_better in _RUN_METRICS:
+        check(
+            f"pipeline {metric}",
+            current["pipeline"].get(metric),
+            [b["pipeline"].get(metric) for b in baseline],
+            higher_is_better,
+        )
+    for section in ("pipeline", "serial", "generators"):
+        for stage, s in _section_stages(current, section).items():
+            before = []
+            for b in baseline:
+                stages = _section_stages(b, section)
+                if stage in stages:
+                    before.append(stages[stage]["wall_seconds"])
+            if before and max(s["wall_seconds"], statistics.median(before)) >= _MIN_STAGE_SECONDS:
+                check(f"{section} stage {stage} wall_seconds", s["wall_seconds"], before, False)
+    return problems
+
+
+def _print_entry(entry: dict[str, Any]) -> None:
+    p = entry["pipeline"]
+    rss = f"{p['peak_rss_mb']:.0f} MB" if p["peak_rss_mb"] is not None else "n/a"
+    print(
+        f"[{entry['profile']}] {p['wall_seconds']:.2f}s wall, {p['rows']:,} rows "
+        f"({p['rows_per_second']:,.0f}/s), peak RSS {rss}, DB {p['db_bytes'] / 2**20:.1f} MB"
+    )
+    serial = _section_stages(entry, "serial")
+    generators = _section_stages(entry, "generators")
+    for name, s in p["stages"].items():
+        line = f"  {name:14s} {s['wall_seconds']:7.2f}s  {s['rows']:>10,} rows"
+        if name in serial:
+            line += f"  serial {serial[name]['wall_seconds']:7.2f}s"
+        if name in generators:
+            g = generators[name]
+            rss = f"{g['max_rss_growth_mb']:.0f} MB" if g["max_rss_growth_mb"] is not None else "n/a"
+            line += (
+                f"  alone {g['wall_seconds']:7.2f}s {g['rows_per_second'] or 0:>10,.0f}/s"
+                f" +RSS {rss} +DB {g['db_growth_bytes'] / 2**20:.1f} MB"
+            )
+        print(line)
+
+
+def _parse_env(pairs: list[str]) -> dict[str, str]:
+    env = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Expected KEY=VALUE, got {pair!r}")
+        env[key] = value
+    return env
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the generator pipeline at named scale profiles.")
+    parser.add_argument("--history", default="output/bench_history.json", help="JSON history file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="benchmark profiles and append the results to the history")
+    run.add_argument("profiles", nargs="+", choices=sorted(PROFILES, key=lambda p: int(p[:-1])))
+    run.add_argument("--repeat", type=int, default=1, help="runs per measurement; the fastest is kept")
+    run.add_argument(
+        "--no-serial", "--no-isolated", dest="no_serial", action="store_true", help="skip the PIPELINE_WORKERS=1 run"
+    )
+    run.add_argument(
+        "--generators", action="store_true", help="also run each generator alone after building its inputs"
+    )
+    run.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra env for main.py")
+
+    cmp = sub.add_parser("compare", help="flag regressions of the latest run per profile")
+    cmp.add_argument("profiles", nargs="*", help="profiles to compare (default: all in the history)")
+    cmp.add_argument("--baseline-runs", type=int, default=3, help="median over this many earlier runs")
+    cmp.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+
+    args = parser.parse_args(argv)
+    history_path = Path(args.history)
+    history = load_history(history_path)
+
+    if args.command == "run":
+        extra_env = _parse_env(args.env)
+        for name in args.profiles:
+            entry = benchmark_profile(name, extra_env, max(1, args.repeat), not args.no_serial, args.generators)
+            history.append(entry)
+            save_history(history_path, history)
+            _print_entry(entry)
+        print(f"History written to {history_path}")
+        return 0
+
+    names = args.profiles or list(dict.fromkeys(e["profile"] for e in history))
+    regressed = False
+    for name in names:
+        # Only runs with the same settings are comparable.
+        runs = [e for e in history if e["profile"] == name]
+        if not runs:
+            print(f"[{name}] no runs recorded")
+            continue
+        current = runs[-1]
+        baseline = [e for e in runs[:-1] if e["env"] == current["env"]][-args.baseline_runs :]
+        if not baseline:
+            print(f"[{name}] no earlier run with the same settings to compare against")
+            continue
+        problems = compare_entries(current, baseline, args.threshold)
+        commits = ", ".join(dict.fromkeys(str(b.get("commit")) for b in baseline))
+        if problems:
+            regressed = True
+            print(f"[{name}] {len(problems)} regression(s) at {current.get('commit')} vs {commits}:")
+            for p in problems:
+                print(f"  {p}")
+        else:
+            print(f"[{name}] OK at {current.get('commit')} vs {commits} (threshold {args.threshold:.0%})")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
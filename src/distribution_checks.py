@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Iterator
+
+from sanity_check import CheckResult
+from utils.db import connect_readonly
+from utils.stats import Histogram, QuantileSketch
+
+# Expected shapes, mirroring the generators in utils/dates.py.
+# completion_timestamp: cycle days ~ lognormal(mu=1.35, sigma=0.75).
+CYCLE_MU = 1.35
+CYCLE_SIGMA = 0.75
+
+# due_date_distribution (non-sprint projects), as days from the creation
+# date: 5% overdue (up to 30 days), then 25% / 40% / 20% / 15% of the rest
+# in 1-7 / 8-30 / 31-90 / 91+ days.
+DUE_EDGES = [-31, 1, 8, 31, 91, 200]
+DUE_SHARES = [0.05, 0.95 * 0.25, 0.95 * 0.40, 0.95 * 0.20, 0.95 * 0.15]
+# Allowed |observed - expected| per bin: a fixed slack (weekend shifts move
+# some dates across bin edges) plus 3 standard errors of the sample share.
+DUE_SLACK = 0.02
+
+# z-score of the 90th percentile of a normal distribution.
+_Z90 = 1.2815515655446004
+
+
+def _sample_filter(rate: float, alias: str = "t") -> str:
+    # Deterministic pseudo-random subset by rowid (Knuth multiplicative hash),
+    # so repeated runs at the same rate read the same rows. The rowid is cut
+    # to 31 bits first so the product stays within SQLite's int64; sharded
+    # integer keys (shard << 20 | counter) pass 2^31 at ~2k projects.
+    if rate >= 1:
+        return ""
+    return f" AND (({alias}.rowid & 2147483647) * 2654435761) % 4294967296 < {int(rate * 4294967296)}"
+
+
+def _stream(db_path: str, sql: str, chunk_rows: int) -> Iterator[float]:
+    """Yield the first column of `sql`, holding at most `chunk_rows` rows at a time."""
+    conn = connect_readonly(db_path)
+    try:
+        cur = conn.execute(sql)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                return
+            for (v,) in rows:
+                yield v
+    finally:
+        conn.close()
+
+
+def cycle_time_sketch(db_path: str, rate: float, chunk_rows: int) -> QuantileSketch:
+    sql = (
+        "SELECT julianday(t.completed_at) - julianday(t.created_at) FROM tasks t "
+        "WHERE t.completed_at IS NOT NULL" + _sample_filter(rate)
+    )
+    sketch = QuantileSketch()
+    sketch.add_many(_stream(db_path, sql, chunk_rows))
+    return sketch
+
+
+def due_offset_histogram(db_path: str, rate: float, chunk_rows: int) -> tuple[Histogram, QuantileSketch]:
+    # Sprint due dates follow their own 7-14 day rule, so they are left out.
+    sql = (
+        "SELECT CAST(julianday(t.due_date) - julianday(date(t.created_at)) AS INTEGER) "
+        "FROM tasks t JOIN projects p ON p.project_id = t.project_id "
+        "WHERE t.due_date IS NOT NULL AND p.project_type != 'sprint'" + _sample_filter(rate)
+    )
+    hist = Histogram(DUE_EDGES)
+    sketch = QuantileSketch()
+    for offset in _stream(db_path, sql, chunk_rows):
+        hist.add(offset)
+        sketch.add(offset)
+    return hist, sketch
+
+
+def workload_counts(db_path: str, chunk_rows: int) -> Counter[int]:
+    """Number of assignees per task load; one row per assignee, read off idx_tasks_assignee."""
+    sql = "SELECT COUNT(*) FROM tasks WHERE assignee_user_id IS NOT NULL GROUP BY assignee_user_id"
+    return Counter(_stream(db_path, sql, chunk_rows))
+
+
+def gini(load_counts: Counter[int]) -> float:
+    """Gini coefficient of loads given as {load: number of assignees}."""
+    n = sum(load_counts.values())
+    total = sum(load * c for load, c in load_counts.items())
+    if n == 0 or total == 0:
+        return 0.0
+    # sum over ascending ranks i of i * x_i, a whole run of equal loads at a time.
+    rank = 0
+    weighted = 0.0
+    for load in sorted(load_counts):
+        c = load_counts[load]
+        weighted += load * (c * rank + c * (c + 1) / 2)
+        rank += c
+    return 2 * weighted / (n * total) - (n + 1) / n
+
+
+def _checks(cycle: QuantileSketch, due: Histogram, loads: Counter[int]) -> list[CheckResult]:
+    results: list[CheckResult] = []
+
+    # Lognormal cycle time: median ~ exp(mu), log-spread from p10/p90 ~ sigma.
+    # Completions are clamped to "now", which trims the upper tail slightly.
+    if cycle.count:
+        p10, p50, p90 = cycle.quantile(0.10), cycle.quantile(0.50), cycle.quantile(0.90)
+        median_expected = math.exp(CYCLE_MU)
+        results.append(
+            CheckResult(
+                name="cycle_time_median_reasonable",
+                ok=0.75 * median_expected <= p50 <= 1.15 * median_expected,
+                details={"p50_days": p50, "expected_days": median_expected, "completed_tasks": cycle.count},
+            )
+        )
+        sigma = (math.log(p90) - math.log(max(p10, 1e-9))) / (2 * _Z90)
+        results.append(
+            CheckResult(
+                name="cycle_time_lognormal_spread",
+                ok=abs(sigma - CYCLE_SIGMA) <= 0.15,
+                details={"sigma_estimate": sigma, "expected_sigma": CYCLE_SIGMA, "p10_days": p10, "p90_days": p90},
+            )
+        )
+
+    if due.total:
+        shares = due.shares()
+        tolerances = [DUE_SLACK + 3 * math.sqrt(p * (1 - p) / due.total) for p in DUE_SHARES]
+        off = [abs(a - b) > tol for a, b, tol in zip(shares, DUE_SHARES, tolerances)]
+        results.append(
+            CheckResult(
+                name="due_offset_histogram_matches",
+                ok=not any(off) and due.under == 0 and due.over == 0,
+                details={
+                    "edges": DUE_EDGES,
+                    "shares": shares,
+                    "expected_shares": DUE_SHARES,
+                    "tolerances": tolerances,
+                    "bins_out_of_band": sum(off),
+                    "out_of_range": due.under + due.over,
+                },
+            )
+        )
+
+    if loads:
+        g = gini(loads)
+        sketch = QuantileSketch()
+        for load, c in loads.items():
+            sketch.add(load, c)
+        p50, p99 = sketch.quantile(0.50), sketch.quantile(0.99)
+        # Some skew is realistic (team sizes differ, managers carry less);
+        # a few assignees holding most of the work is not.
+        results.append(
+            CheckResult(
+                name="assignee_workload_skew_reasonable",
+                ok=0.1 <= g <= 0.7 and p99 <= 15 * max(p50, 1),
+                details={"gini": g, "assignees": sketch.count, "p50_tasks": p50, "p99_tasks": p99, "max_tasks": sketch.max},
+            )
+        )
+    return results
+
+
+def run_distribution_checks(db_path: str, sample_rate: float = 1.0, chunk_rows: int = 50000) -> dict[str, Any]:
+    """Stream columns out of SQLite into sketches and check them against expected bands.
+
+    Memory is bounded by `chunk_rows` and the sketch sizes, not by table
+    size. `sample_rate` < 1 reads a deterministic subset of task rows
+    (workload counts always cover every task: they come from the index).
+    The three streams run in parallel over read-only connections.
+    """
+    if not Path(db_path).exists():
+        raise FileNotFoundError(db_path)
+    if not 0 < sample_rate <= 1:
+        raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="dist") as ex:
+        f_cycle = ex.submit(cycle_time_sketch, db_path, sample_rate, chunk_rows)
+        f_due = ex.submit(due_offset_histogram, db_path, sample_rate, chunk_rows)
+        f_load = ex.submit(workload_counts, db_path, chunk_rows)
+        cycle = f_cycle.result()
+        due_hist, due_sketch = f_due.result()
+        loads = f_load.result()
+
+    results = _checks(cycle, due_hist, loads)
+    return {
+        "sample_rate": sample_rate,
+        "distributions": {
+            "task_cycle_days": cycle.summary(),
+            "task_due_offset_days": {**due_sketch.summary(), "histogram": {"edges": DUE_EDGES, "counts": due_hist.counts}},
+            "tasks_per_assignee": {"histogram": {str(k): loads[k] for k in sorted(loads)}},
+        },
+        "checks": [{"name": r.name, "ok": r.ok, "details": r.details} for r in results],
+    }
+
+
+def main() -> None:
+    db_path = os.getenv("DB_PATH", "output/asana_simulation.sqlite")
+    report = run_distribution_checks(
+        db_path,
+        sample_rate=float(os.getenv("DIST_SAMPLE_RATE", "1")),
+        chunk_rows=int(os.getenv("DIST_CHUNK_ROWS", "50000")),
+    )
+
+    out_dir = Path("output")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / "distribution_report.json"
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    ok = all(c["ok"] for c in report["checks"])
+    print(f"Distribution report written to {out_path}")
+    print(f"All checks OK: {ok}")
+
+
+if __name__ == "__main__":
+    main()
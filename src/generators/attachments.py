@@ -4,13 +4,14 @@ import random
 
 from utils.corpora import FILE_TYPES
 from utils.dates import iso, now_utc, window_last_days, random_workday_datetime
-from utils.ids import gid
+from utils.ids import build_ids
 from utils.randomness import build_rng
 from utils.db import bulk_insert
 
 
 def generate_attachments(conn, cfg, users, tasks_ctx) -> None:
     rng = build_rng(cfg.seed + 61)
+    gid = build_ids(cfg, 61)
     tw = window_last_days(cfg.history_days, end=now_utc())
 
     user_ids = [u.user_id for u in users]
@@ -3,13 +3,17 @@ from __future__ import annotations
 import random
 
 from utils.dates import iso, now_utc, window_last_days, random_workday_datetime
-from utils.ids import gid
-from utils.randomness import build_rng
+from utils.ids import build_ids
+from utils.randomness import WeightedSampler, build_rng
 from utils.db import bulk_insert
 
+TASK_COMMENT_COUNT = WeightedSampler([1, 2, 3, 4], [0.55, 0.25, 0.15, 0.05])
+SUBTASK_COMMENT_COUNT = WeightedSampler([1, 2], [0.75, 0.25])
+
 
 def generate_comments(conn, cfg, users, tasks_ctx) -> None:
     rng = build_rng(cfg.seed + 59)
+    gid = build_ids(cfg, 59)
     tw = window_last_days(cfg.history_days, end=now_utc())
 
     user_ids = [u.user_id for u in users]
@@ -19,7 +23,7 @@ def generate_comments(conn, cfg, users, tasks_ctx) -> None:
     # Comments on ~30% of tasks; 1-4 comments.
     for tid in tasks_ctx.task_ids:
         if rng.random() < 0.30:
-            n = rng.choices([1, 2, 3, 4], weights=[0.55, 0.25, 0.15, 0.05], k=1)[0]
+            n = TASK_COMMENT_COUNT.sample(rng)
             for _ in range(n):
                 author = rng.choice(user_ids)
                 created_at = random_workday_datetime(rng, tw)
@@ -38,7 +42,7 @@ def generate_comments(conn, cfg, users, tasks_ctx) -> None:
     # Comments on subtasks ~15%.
     for sid in tasks_ctx.subtask_ids:
         if rng.random() < 0.15:
-            n = rng.choices([1, 2], weights=[0.75, 0.25], k=1)[0]
+            n = SUBTASK_COMMENT_COUNT.sample(rng)
             for _ in range(n):
                 author = rng.choice(user_ids)
                 created_at = random_workday_datetime(rng, tw)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
 from dataclasses import dataclass
 import json
 import random
 
+import numpy as np
+
 from utils.corpora import (
     PRIORITY_ENUM,
     STATUS_ENUM,
@@ -12,7 +15,7 @@ from utils.corpora import (
     REGION_ENUM,
 )
 from utils.dates import iso, now_utc
-from utils.ids import gid
+from utils.ids import build_ids
 from utils.randomness import build_rng
 from utils.db import bulk_insert
 
@@ -27,14 +30,139 @@ class CustomField:
     created_at: str
 
 
+class CustomFieldSampler(ABC):
+    """Value generator for one custom field, compiled once per run.
+
+    `column` names the custom_field_values column the value goes to
+    ("value_text", "value_number" or "value_enum"). `sample` draws one value
+    from a random.Random; `sample_batch` draws n values from a NumPy Generator.
+    Either may return None (no value).
+    """
+
+    __slots__ = ("custom_field_id", "column", "sparse")
+
+    def __init__(self, cf: CustomField, column: str) -> None:
+        self.custom_field_id = cf.custom_field_id
+        self.column = column
+        # Only Status is always kept; other fields are thinned out further.
+        self.sparse = cf.name != "Status"
+
+    @abstractmethod
+    def sample(self, rng: random.Random):
+        ...
+
+    @abstractmethod
+    def sample_batch(self, gen: np.random.Generator, n: int) -> list:
+        ...
+
+
+class _EmptySampler(CustomFieldSampler):
+    def sample(self, rng: random.Random) -> None:
+        return None
+
+    def sample_batch(self, gen: np.random.Generator, n: int) -> list:
+        return [None] * n
+
+
+class _ChoiceSampler(CustomFieldSampler):
+    __slots__ = ("options",)
+
+    def __init__(self, cf: CustomField, column: str, options: list) -> None:
+        super().__init__(cf, column)
+        self.options = options
+
+    def sample(self, rng: random.Random):
+        return rng.choice(self.options)
+
+    def sample_batch(self, gen: np.random.Generator, n: int) -> list:
+        opts = self.options
+        return [opts[k] for k in gen.integers(0, len(opts), n).tolist()]
+
+
+class _LogNormalSampler(CustomFieldSampler):
+    __slots__ = ("mu", "sigma", "digits")
+
+    def __init__(self, cf: CustomField, mu: float, sigma: float, digits: int) -> None:
+        super().__init__(cf, "value_number")
+        self.mu, self.sigma, self.digits = mu, sigma, digits
+
+    def sample(self, rng: random.Random) -> float:
+        return round(rng.lognormvariate(self.mu, self.sigma), self.digits)
+
+    def sample_batch(self, gen: np.random.Generator, n: int) -> list:
+        return np.round(gen.lognormal(self.mu, self.sigma, n), self.digits).tolist()
+
+
+class _UniformSampler(CustomFieldSampler):
+    __slots__ = ("lo", "hi", "digits")
+
+    def __init__(self, cf: CustomField, lo: float, hi: float, digits: int) -> None:
+        super().__init__(cf, "value_number")
+        self.lo, self.hi, self.digits = lo, hi, digits
+
+    def sample(self, rng: random.Random) -> float:
+        return round(rng.uniform(self.lo, self.hi), self.digits)
+
+    def sample_batch(self, gen: np.random.Generator, n: int) -> list:
+        return np.round(gen.uniform(self.lo, self.hi, n), self.digits).tolist()
+
+
+class _FollowUpSampler(CustomFieldSampler):
+    # Free text: "TBD" half the time, otherwise "Follow up" or nothing.
+    def sample(self, rng: random.Random) -> str | None:
+        return rng.choice(["TBD", "" if rng.random() < 0.5 else "Follow up"]) or None
+
+    def sample_batch(self, gen: np.random.Generator, n: int) -> list:
+        blank = (gen.random(n) < 0.5).tolist()
+        tbd = (gen.random(n) < 0.5).tolist()
+        return ["TBD" if t else (None if b else "Follow up") for t, b in zip(tbd, blank)]
+
+
+def compile_custom_field(cf: CustomField) -> CustomFieldSampler:
+    """Pick the value distribution for a field from its type and name."""
+    lname = cf.name.lower()
+    if cf.field_type == "enum":
+        try:
+            options = json.loads(cf.enum_options_json) if cf.enum_options_json else []
+        except Exception:
+            options = []
+        if not options:
+            return _EmptySampler(cf, "value_enum")
+        return _ChoiceSampler(cf, "value_enum", [str(o) for o in options])
+
+    if cf.field_type == "number":
+        if "story" in lname:
+            return _ChoiceSampler(cf, "value_number", [0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0])
+        if "effort" in lname or "hour" in lname:
+            return _LogNormalSampler(cf, 1.1, 0.7, 1)
+        if "confidence" in lname:
+            return _UniformSampler(cf, 0.3, 0.95, 2)
+        return _UniformSampler(cf, 1, 10, 1)
+
+    if "release" in lname:
+        return _ChoiceSampler(cf, "value_text", ["R-2026.02", "R-2026.03", "R-2026.04", "TBD", "Post-launch"])
+    if "owner" in lname:
+        return _ChoiceSampler(cf, "value_text", ["Platform", "Growth", "Enterprise", "Security", "GTM Ops"])
+    return _FollowUpSampler(cf, "value_text")
+
+
 @dataclass(frozen=True)
 class CustomFieldsContext:
     fields: list[CustomField]
     project_to_fields: dict[str, list[str]]
 
+    def samplers_by_project(self) -> dict[str, tuple[CustomFieldSampler, ...]]:
+        """Compile each field once and return every project's sampler vector, in attach order."""
+        compiled = {cf.custom_field_id: compile_custom_field(cf) for cf in self.fields}
+        return {
+            project_id: tuple(compiled[cf_id] for cf_id in cf_ids if cf_id in compiled)
+            for project_id, cf_ids in self.project_to_fields.items()
+        }
+
 
 def generate_custom_fields(conn, cfg, org, projects) -> CustomFieldsContext:
     rng = build_rng(cfg.seed + 43)
+    gid = build_ids(cfg, 43)
     created_at = iso(now_utc())
 
     fields: list[CustomField] = []
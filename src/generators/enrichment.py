@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+import re
+
+from utils.db import bulk_update, iter_pages
+from utils.llm_groq import GroqText, build_groq_from_env
+from utils.local_text import LocalText
+
+PROMPTS_DIR = Path(__file__).resolve().parents[2] / "prompts"
+
+_PARAMS = {"temperature": 0.7, "max_tokens": 250}
+# Completion tokens per task in a batched request.
+_BATCH_TOKENS_PER_ITEM = 90
+
+_TASK_COLUMNS = ("task_id", "project_id", "section_id", "name", "description")
+
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+DEDUP_MODES = ("template", "task")
+BACKENDS = ("groq", "local")
+
+
+@dataclass(frozen=True)
+class _Item:
+    """What the model sees for one task; tasks with equal items share a result.
+
+    Empty fields are left out of the prompt. `variant` distinguishes the
+    alternative rewrites of one template when LLM_VARIANTS > 1.
+    """
+
+    project_name: str
+    project_type: str
+    section_name: str
+    base_title: str
+    variant: int = 0
+    variants: int = 1
+
+    @property
+    def variant_note(self) -> str:
+        if self.variants <= 1:
+            return ""
+        return f"{self.variant + 1} of {self.variants} (phrase it differently from other variants)"
+
+
+@dataclass(frozen=True)
+class _Prompts:
+    system: str
+    # prompts/task_enrich_user.txt, split at its first blank line into the
+    # per-task context block and the shared instructions.
+    item: str
+    rules: list[str]
+
+    @classmethod
+    def load(cls, prompts_dir: Path = PROMPTS_DIR) -> _Prompts:
+        system = (prompts_dir / "task_enrich_system.txt").read_text(encoding="utf-8").strip()
+        item, _, rules = (prompts_dir / "task_enrich_user.txt").read_text(encoding="utf-8").strip().partition("\n\n")
+        return cls(system=system, item=item, rules=rules.splitlines())
+
+    def render(self, item: _Item) -> str:
+        values = vars(item)
+        lines = []
+        for line in self.item.splitlines():
+            keys = _PLACEHOLDER.findall(line)
+            if any(not values.get(k) for k in keys):
+                continue
+            lines.append(_PLACEHOLDER.sub(lambda m: str(values[m.group(1)]), line))
+        if item.variant_note:
+            lines.append(f"Variant: {item.variant_note}")
+        return "\n".join(lines)
+
+    def single(self, item: _Item) -> str:
+        return self.render(item) + "\n\n" + "\n".join(self.rules)
+
+    def batch(self, items: list[_Item]) -> str:
+        blocks = [f"[{i}]\n{self.render(item)}" for i, item in enumerate(items, start=1)]
+        rules = [r for r in self.rules if not r.startswith("Return JSON")]
+        return (
+            f"Rewrite each of these {len(items)} tasks.\n\n"
+            + "\n\n".join(blocks)
+            + f"\n\nReturn a JSON array of {len(items)} objects in the same order, "
+            "each with keys: id (the number in brackets), title, description.\n"
+            + "\n".join(rules)
+        )
+
+
+def _fields(obj: object) -> tuple[str | None, str | None] | None:
+    # (title, description) from one response object; None if unusable.
+    if not isinstance(obj, dict):
+        return None
+    title = str(obj.get("title") or "").strip() or None
+    desc = obj.get("description")
+    if desc is not None:
+        desc = str(desc).strip() or None
+    return title, desc
+
+
+def _loads(text: str) -> object:
+    text = text.strip()
+    if text.startswith("```"):
+        # Tolerate a fenced code block around the JSON.
+        text = text.strip("`").removeprefix("json").strip()
+    return json.loads(text)
+
+
+def _parse_single(text: str) -> tuple[str | None, str | None] | None:
+    try:
+        return _fields(_loads(text))
+    except ValueError:
+        return None
+
+
+def _parse_batch(text: str, n: int) -> list[tuple[str | None, str | None] | None]:
+    """Per-item results of a batched response; None marks items to retry alone."""
+    out: list[tuple[str | None, str | None] | None] = [None] * n
+    try:
+        payload = _loads(text)
+    except ValueError:
+        return out
+    if isinstance(payload, dict):
+        payload = next((v for v in payload.values() if isinstance(v, list)), None)
+    if not isinstance(payload, list):
+        return out
+    for pos, obj in enumerate(payload):
+        idx = obj.get("id") if isinstance(obj, dict) else None
+        # Trust explicit ids; otherwise fall back to position.
+        i = idx - 1 if isinstance(idx, int) and 1 <= idx <= n else pos
+        if i < n and out[i] is None:
+            out[i] = _fields(obj)
+    return out
+
+
+def build_text_backend(cfg) -> GroqText | LocalText:
+    if cfg.llm_backend == "local":
+        return LocalText(seed=cfg.seed)
+    if cfg.llm_backend == "groq":
+        return build_groq_from_env()
+    raise ValueError(f"Unknown LLM_BACKEND {cfg.llm_backend!r}; expected one of {BACKENDS}")
+
+
+def _complete_all(
+    backend: GroqText | LocalText,
+    system: str,
+    prompts: list[str],
+    max_tokens: int,
+) -> tuple[dict[str, str], int, int]:
+    """Answer distinct prompts from the cache, then fetch the rest (within budget) concurrently.
+
+    Returns (texts by prompt, API calls made, failed calls).
+    """
+    params = {**_PARAMS, "max_tokens": max_tokens}
+    texts: dict[str, str] = {}
+    uncached: list[str] = []
+    for user in dict.fromkeys(prompts):
+        cached = backend.lookup(system, user, **params)
+        if cached is not None:
+            texts[user] = cached
+        elif len(uncached) < backend.remaining:
+            uncached.append(user)
+
+    failed = 0
+    if uncached and backend.concurrency <= 1:
+        for user in uncached:
+            try:
+                texts[user] = backend.fetch(system, user, **params)
+            except Exception:
+                failed += 1
+    elif uncached:
+        with ThreadPoolExecutor(max_workers=backend.concurrency, thread_name_prefix="llm") as ex:
+            futures = {ex.submit(backend.fetch, system, user, **params): user for user in uncached}
+            for fut in as_completed(futures):
+                try:
+                    texts[futures[fut]] = fut.result()
+                except Exception:
+                    failed += 1
+    return texts, len(uncached), failed
+
+
+def _fetch_results(
+    backend: GroqText,
+    prompts: _Prompts,
+    distinct: list[_Item],
+    batch_size: int,
+) -> tuple[dict[_Item, tuple[str | None, str | None]], int, int]:
+    """Results per item from API prompts (batched, then single); returns (results, calls, failed)."""
+    results: dict[_Item, tuple[str | None, str | None]] = {}
+    calls = failed = 0
+    todo = distinct
+    if batch_size > 1:
+        chunks = [distinct[i : i + batch_size] for i in range(0, len(distinct), batch_size)]
+        by_prompt = {prompts.batch(chunk): chunk for chunk in chunks}
+        texts, calls, failed = _complete_all(backend, prompts.system, list(by_prompt), _BATCH_TOKENS_PER_ITEM * batch_size)
+        for user, text in texts.items():
+            chunk = by_prompt[user]
+            for item, fields in zip(chunk, _parse_batch(text, len(chunk))):
+                if fields is not None:
+                    results[item] = fields
+        todo = [item for item in distinct if item not in results]
+
+    # Single-item requests: the whole run at LLM_BATCH_SIZE=1, otherwise
+    # the per-item fallback for anything batches left unanswered.
+    single = {prompts.single(item): item for item in todo}
+    texts, n, f = _complete_all(backend, prompts.system, list(single), _PARAMS["max_tokens"])
+    calls, failed = calls + n, failed + f
+    for user, text in texts.items():
+        fields = _parse_single(text)
+        if fields is not None:
+            results[single[user]] = fields
+    return results, calls, failed
+
+
+def _local_results(backend: LocalText, distinct: list[_Item]) -> dict[_Item, tuple[str | None, str | None]]:
+    # The grammar takes the item fields directly; no prompt is rendered or
+    # parsed. The salt matches what LocalText.fetch reads from a prompt.
+    generate = backend.generate
+    return {
+        item: generate(item.project_type, item.base_title, f"{item.project_name}|{item.section_name}|{item.variant_note}")
+        for item in distinct
+    }
+
+
+def plan_items(
+    tasks: list[tuple],
+    project_by_id: dict,
+    section_name: dict[str, str],
+    dedup: str,
+    variants: int,
+    seen: dict[tuple[str, str], int] | None = None,
+) -> list[_Item]:
+    """One item per task row (task_id, project_id, section_id, name, description).
+
+    In "template" mode tasks are keyed by (project type, base title) only, so
+    every task built from the same title template shares one enrichment;
+    the i-th task of a template gets variant i % `variants`. In "task" mode
+    project name and section are part of the key. Pass the same `seen` dict
+    for consecutive pages of one table to count templates across pages.
+    """
+    if dedup not in DEDUP_MODES:
+        raise ValueError(f"Unknown LLM_DEDUP mode {dedup!r}; expected one of {DEDUP_MODES}")
+    variants = max(1, variants)
+    if seen is None:
+        seen = {}
+    items: list[_Item] = []
+    for _task_id, project_id, section_id, name, _desc in tasks:
+        p = project_by_id.get(project_id)
+        project_type = p.project_type if p else ""
+        if dedup == "template":
+            k = seen.get((project_type, name), 0)
+            seen[(project_type, name)] = k + 1
+            items.append(_Item("", project_type, "", name, k % variants, variants))
+        else:
+            items.append(_Item(p.name if p else "", project_type, section_name.get(section_id, ""), name))
+    return items
+
+
+def enrich_tasks(conn, cfg, projects, sections) -> int:
+    """Refine task titles/descriptions once per planned item and fan them out; returns tasks updated."""
+    if not cfg.use_llm_text:
+        return 0
+    backend = build_text_backend(cfg)
+    try:
+        if not backend.enabled:
+            return 0
+
+        prompts = _Prompts.load()
+        project_by_id = {p.project_id: p for p in projects}
+        section_name = {s.section_id: s.name for s in sections}
+        page_rows = max(1, cfg.task_batch_rows)
+
+        def planned():
+            # Replays the same plan on every pass: pages come in rowid order.
+            seen: dict[tuple[str, str], int] = {}
+            for page in iter_pages(conn, "tasks", _TASK_COLUMNS, page_rows):
+                yield page, plan_items(page, project_by_id, section_name, cfg.llm_dedup, cfg.llm_variants, seen)
+
+        # Items that fan out to the most tasks go first, so a limited budget
+        # covers as many tasks as possible (ties keep task order).
+        fan_out: Counter[_Item] = Counter()
+        for _page, items in planned():
+            fan_out.update(items)
+        distinct = sorted(fan_out, key=lambda item: -fan_out[item])
+
+        if isinstance(backend, LocalText):
+            results, calls, failed = _local_results(backend, distinct), 0, 0
+        else:
+            results, calls, failed = _fetch_results(backend, prompts, distinct, max(1, cfg.llm_batch_size))
+
+        updated = 0
+        if results:
+            for page, items in planned():
+                patch = []
+                for (task_id, _project_id, _section_id, name, desc), item in zip(page, items):
+                    if item in results:
+                        title, new_desc = results[item]
+                        new_name = title or name
+                        if (new_name, new_desc) != (name, desc):
+                            patch.append((new_name, new_desc, task_id))
+                bulk_update(conn, "UPDATE tasks SET name = ?, description = ? WHERE task_id = ?", patch)
+                updated += len(patch)
+
+        logging.info(
+            "LLM enrichment: %d tasks updated from %d items, %d API calls (%d failed)",
+            updated,
+            len(results),
+            calls,
+            failed,
+        )
+        if backend.cache is not None:
+            logging.info("LLM cache: %(hits)d hits, %(misses)d misses, %(evictions)d evictions", backend.cache.stats())
+        return updated
+    finally:
+        backend.close()
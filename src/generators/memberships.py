@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import timedelta
 import random
 
@@ -8,7 +9,16 @@ from utils.randomness import build_rng
 from utils.db import bulk_insert
 
 
-def generate_team_memberships(conn, cfg, teams, users) -> None:
+@dataclass(frozen=True)
+class TeamMembership:
+    team_id: str
+    user_id: str
+    is_team_admin: int
+    joined_at: str
+    left_at: str | None
+
+
+def generate_team_memberships(conn, cfg, teams, users) -> list[TeamMembership]:
     rng = build_rng(cfg.seed + 31)
     tw = window_last_days(cfg.history_days, end=now_utc())
 
@@ -18,7 +28,7 @@ def generate_team_memberships(conn, cfg, teams, users) -> None:
         prefix = t.name.split(" ")[0]
         dept_to_teams.setdefault(prefix, []).append(t.team_id)
 
-    rows = []
+    memberships: list[TeamMembership] = []
 
     # Choose one team as primary by department, plus optional cross-functional membership.
     for u in users:
@@ -37,17 +47,20 @@ def generate_team_memberships(conn, cfg, teams, users) -> None:
             left_at = u.deactivated_at
 
         is_admin = 1 if (u.role in {"manager", "director", "executive"} and rng.random() < 0.22) else 0
-        rows.append((primary_team_id, u.user_id, is_admin, iso(joined_at), left_at))
+        memberships.append(TeamMembership(primary_team_id, u.user_id, is_admin, iso(joined_at), left_at))
 
         # Optional secondary membership.
         if rng.random() < 0.18:
             other_team = rng.choice(teams).team_id
             if other_team != primary_team_id:
-                rows.append((other_team, u.user_id, 0, iso(joined_at + timedelta(days=rng.randint(1, 14))), left_at))
+                memberships.append(
+                    TeamMembership(other_team, u.user_id, 0, iso(joined_at + timedelta(days=rng.randint(1, 14))), left_at)
+                )
 
     bulk_insert(
         conn,
         "team_memberships",
         ["team_id", "user_id", "is_team_admin", "joined_at", "left_at"],
-        rows,
+        [(m.team_id, m.user_id, m.is_team_admin, m.joined_at, m.left_at) for m in memberships],
     )
+    return memberships
@@ -4,7 +4,7 @@ from dataclasses import dataclass
 import random
 
 from utils.dates import iso, now_utc
-from utils.ids import gid
+from utils.ids import build_ids
 from utils.randomness import build_rng
 from utils.db import bulk_insert
 
@@ -19,6 +19,7 @@ class Organization:
 
 def generate_organization(conn, cfg) -> Organization:
     rng = build_rng(cfg.seed + 11)
+    gid = build_ids(cfg, 11)
     # Use a plausible B2B SaaS company name + verified domain.
     name = rng.choice(
         [
@@ -11,8 +11,8 @@ from utils.corpora import (
     OPS_INITIATIVES,
 )
 from utils.dates import iso, now_utc, window_last_days, random_workday_datetime
-from utils.ids import gid
-from utils.randomness import build_rng
+from utils.ids import build_ids
+from utils.randomness import WeightedSampler, build_rng
 from utils.db import bulk_insert
 
 
@@ -32,25 +32,29 @@ class Project:
     description: str | None
 
 
+PROJECT_TYPES_BY_TEAM_TYPE = {
+    "technical": WeightedSampler(
+        ["sprint", "bug_triage", "product_roadmap", "ops_initiative"],
+        [0.55, 0.25, 0.15, 0.05],
+    ),
+    "go_to_market": WeightedSampler(
+        ["marketing_campaign", "content_calendar", "sales_enablement", "ops_initiative"],
+        [0.45, 0.25, 0.20, 0.10],
+    ),
+    "business_ops": WeightedSampler(
+        ["ops_initiative", "content_calendar", "sales_enablement"],
+        [0.65, 0.20, 0.15],
+    ),
+}
+
+PRIVACY = WeightedSampler(["public", "private"], [0.86, 0.14])
+STATUS = WeightedSampler(["active", "on_hold", "completed"], [0.76, 0.07, 0.17])
+
+
 def _project_type_for_team(rng: random.Random, team) -> str:
-    if team.team_type == "technical":
-        return rng.choices(
-            ["sprint", "bug_triage", "product_roadmap", "ops_initiative"],
-            weights=[0.55, 0.25, 0.15, 0.05],
-            k=1,
-        )[0]
-    if team.team_type == "go_to_market":
-        return rng.choices(
-            ["marketing_campaign", "content_calendar", "sales_enablement", "ops_initiative"],
-            weights=[0.45, 0.25, 0.20, 0.10],
-            k=1,
-        )[0]
-    if team.team_type == "business_ops":
-        return rng.choices(
-            ["ops_initiative", "content_calendar", "sales_enablement"],
-            weights=[0.65, 0.20, 0.15],
-            k=1,
-        )[0]
+    sampler = PROJECT_TYPES_BY_TEAM_TYPE.get(team.team_type)
+    if sampler is not None:
+        return sampler.sample(rng)
     return rng.choice(["ops_initiative", "product_roadmap", "marketing_campaign"])
 
 
@@ -86,6 +90,7 @@ def _project_name(rng: random.Random, ptype: str) -> str:
 
 def generate_projects(conn, cfg, org, teams, users) -> list[Project]:
     rng = build_rng(cfg.seed + 37)
+    gid = build_ids(cfg, 37)
     tw = window_last_days(cfg.history_days, end=now_utc())
 
     # Prefer managers/directors as project owners (creator-like).
@@ -122,8 +127,8 @@ def generate_projects(conn, cfg, org, teams, users) -> list[Project]:
             elif ptype == "ops_initiative":
                 due_date = start_date + timedelta(days=rng.randint(30, 150))
 
-        privacy = rng.choices(["public", "private"], weights=[0.86, 0.14], k=1)[0]
-        status = rng.choices(["active", "on_hold", "completed"], weights=[0.76, 0.07, 0.17], k=1)[0]
+        privacy = PRIVACY.sample(rng)
+        status = STATUS.sample(rng)
 
         archived_at = None
         if status == "completed" and rng.random() < 0.55:
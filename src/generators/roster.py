@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import heapq
+import random
+
+MANAGER_ROLES = frozenset({"manager", "director", "executive"})
+
+# Share of an IC's task load each role is expected to carry (ASSIGNEE_POLICY=capacity).
+ROLE_CAPACITY = {"executive": 0.25, "director": 0.5, "manager": 0.75}
+
+ASSIGNEE_POLICIES = ("power_of_3", "capacity")
+
+
+@dataclass(frozen=True)
+class TeamRoster:
+    """Per-team member and manager arrays, built once from active memberships.
+
+    Teams without active members fall back to the whole workspace, as the
+    task generators always have.
+    """
+
+    members: dict[str, list[str]]
+    managers: dict[str, list[str]]
+    all_user_ids: list[str]
+    all_managers: list[str]
+    capacity: dict[str, float]
+
+    @classmethod
+    def build(cls, teams, users, memberships) -> TeamRoster:
+        role = {u.user_id: u.role for u in users}
+        members: dict[str, list[str]] = {t.team_id: [] for t in teams}
+        for m in memberships:
+            if m.left_at is None:
+                members.setdefault(m.team_id, []).append(m.user_id)
+        all_user_ids = [u.user_id for u in users]
+        return cls(
+            members=members,
+            managers={tid: [u for u in pool if role.get(u) in MANAGER_ROLES] for tid, pool in members.items()},
+            all_user_ids=all_user_ids,
+            all_managers=[u for u in all_user_ids if role.get(u) in MANAGER_ROLES],
+            capacity={u.user_id: ROLE_CAPACITY.get(u.role, 1.0) for u in users},
+        )
+
+    def pool(self, team_id: str) -> list[str]:
+        return self.members.get(team_id) or self.all_user_ids
+
+    def pick_creator(self, rng: random.Random, team_id: str) -> str:
+        # Bias creators toward managers/directors for enterprise workflows.
+        if rng.random() < 0.60:
+            mgrs = self.managers.get(team_id) if self.members.get(team_id) else self.all_managers
+            if mgrs:
+                return rng.choice(mgrs)
+        return rng.choice(self.pool(team_id))
+
+
+class Assigner:
+    """Load-aware assignee picks over a TeamRoster.
+
+    One Assigner holds one workload (tasks assigned per user), shared by
+    every team it picks for. Policies:
+
+    - "power_of_3": sample three team members, take the least loaded.
+    - "capacity": take the member with the lowest load / role capacity,
+      from a per-team heap (O(log team size) per pick).
+    """
+
+    def __init__(self, roster: TeamRoster, policy: str = "power_of_3") -> None:
+        if policy not in ASSIGNEE_POLICIES:
+            raise ValueError(f"Unknown assignee policy {policy!r}; expected one of {ASSIGNEE_POLICIES}")
+        self.roster = roster
+        self.policy = policy
+        self.load: dict[str, int] = {}
+        self._heaps: dict[str, list[tuple[float, int, str]]] = {}
+
+    def pick(self, rng: random.Random, team_id: str) -> str | None:
+        # ~15% unassigned.
+        if rng.random() < 0.15:
+            return None
+        pool = self.roster.pool(team_id)
+        if not pool:
+            return None
+
+        if self.policy == "capacity":
+            chosen = self._least_utilized(team_id, pool)
+        else:
+            k = 3 if len(pool) >= 3 else len(pool)
+            chosen = min(rng.sample(pool, k=k), key=lambda uid: self.load.get(uid, 0))
+        self.load[chosen] = self.load.get(chosen, 0) + 1
+        return chosen
+
+    def _utilization(self, uid: str) -> float:
+        return self.load.get(uid, 0) / self.roster.capacity.get(uid, 1.0)
+
+    def _least_utilized(self, team_id: str, pool: list[str]) -> str:
+        heap = self._heaps.get(team_id)
+        if heap is None:
+            heap = [(self._utilization(uid), i, uid) for i, uid in enumerate(pool)]
+            heapq.heapify(heap)
+            self._heaps[team_id] = heap
+        # Loads only grow, and a user's load may have grown through another
+        # team, so stale entries are re-pushed with their current key.
+        while True:
+            key, i, uid = heap[0]
+            current = self._utilization(uid)
+            if current == key:
+                break
+            heapq.heapreplace(heap, (current, i, uid))
+        new_key = (self.load.get(uid, 0) + 1) / self.roster.capacity.get(uid, 1.0)
+        heapq.heapreplace(heap, (new_key, i, uid))
+        return uid
@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from utils.randomness import build_rng
+from utils.randomness import WeightedSampler, build_rng
 
 from utils.corpora import PROJECT_TEMPLATES
 from utils.dates import iso, now_utc
-from utils.ids import gid
+from utils.ids import build_ids
 from utils.db import bulk_insert
 
 
@@ -19,8 +19,12 @@ class Section:
     created_at: str
 
 
+EXTRA_SECTION_COUNT = WeightedSampler([0, 1, 2], [0.55, 0.35, 0.10])
+
+
 def generate_sections(conn, cfg, projects) -> list[Section]:
     rng = build_rng(cfg.seed + 39)
+    gid = build_ids(cfg, 39)
     created_at = iso(now_utc())
     sections: list[Section] = []
 
@@ -33,7 +37,7 @@ def generate_sections(conn, cfg, projects) -> list[Section]:
         # Some projects add extra sections.
         if p.project_type in {"marketing_campaign", "content_calendar", "ops_initiative", "product_roadmap"}:
             extra_candidates = ["Legal Review", "Design", "Blocked", "Stakeholder Review", "Waiting on Input"]
-            n_extra = rng.choices([0, 1, 2], weights=[0.55, 0.35, 0.10], k=1)[0]
+            n_extra = EXTRA_SECTION_COUNT.sample(rng)
             extras = rng.sample(extra_candidates, k=n_extra) if n_extra > 0 else []
             for offset, e in enumerate(extras, start=0):
                 sections.append(
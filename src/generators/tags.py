@@ -5,7 +5,7 @@ import random
 
 from utils.corpora import TAG_COLORS
 from utils.dates import iso, now_utc
-from utils.ids import gid
+from utils.ids import build_ids
 from utils.randomness import build_rng
 from utils.db import bulk_insert
 
@@ -21,6 +21,7 @@ class Tag:
 
 def generate_tags(conn, cfg, org) -> list[Tag]:
     rng = build_rng(cfg.seed + 41)
+    gid = build_ids(cfg, 41)
     created_at = iso(now_utc())
 
     names = [
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.dates import (
+    TimeWindow,
+    adjust_to_weekday_days,
+    completion_epochs,
+    due_date_days,
+    epoch_days,
+    random_workday_epochs,
+    updated_epochs,
+)
+from utils.randomness import WeightedSampler
+
+
+# Shared with the scalar engine in tasks.py.
+TAG_COUNT = WeightedSampler([1, 2, 3], [0.65, 0.25, 0.10])
+SUBTASK_COUNT = WeightedSampler([1, 2, 3, 4, 5], [0.35, 0.30, 0.20, 0.10, 0.05])
+
+
+@dataclass(frozen=True)
+class TaskAttributes:
+    """Per-project task attributes sampled as arrays (one entry per task)."""
+
+    section_idx: np.ndarray
+    created: np.ndarray
+    updated: np.ndarray
+    created_day: np.ndarray
+    has_due: np.ndarray
+    due_day: np.ndarray
+    has_start: np.ndarray
+    completed: np.ndarray
+    completed_at: np.ndarray
+    n_tags: np.ndarray
+    n_subtasks: np.ndarray
+
+
+@dataclass(frozen=True)
+class SubtaskAttributes:
+    """Subtask attributes for a whole project; `parent` indexes into TaskAttributes."""
+
+    parent: np.ndarray
+    name_idx: np.ndarray
+    has_desc: np.ndarray
+    updated: np.ndarray
+    has_due: np.ndarray
+    completed: np.ndarray
+    completed_at: np.ndarray
+    keep_assignee: np.ndarray
+    has_tag: np.ndarray
+
+
+def _counts(gen: np.random.Generator, n: int, p_any: float, sampler: WeightedSampler) -> np.ndarray:
+    # 0 with probability 1 - p_any, otherwise a draw from `sampler`.
+    picked = sampler.sample_array(gen, n)
+    return np.where(gen.random(n) < p_any, picked, 0)
+
+
+def sample_task_attributes(
+    gen: np.random.Generator,
+    n: int,
+    project_type: str,
+    completion_rate: float,
+    n_sections: int,
+    tw: TimeWindow,
+) -> TaskAttributes:
+    section_idx = gen.integers(0, n_sections, n)
+    created = random_workday_epochs(gen, tw, n)
+    updated = updated_epochs(gen, created, tw)
+    created_day = epoch_days(created)
+
+    if project_type == "sprint":
+        has_due = gen.random(n) < 0.92
+        due_day = adjust_to_weekday_days(gen, created_day + gen.integers(7, 15, n))
+    else:
+        has_due, due_day = due_date_days(gen, created_day)
+    due_day = adjust_to_weekday_days(gen, due_day)
+
+    has_start = gen.random(n) < 0.35
+
+    # Completion probability increases with age.
+    age_days = np.floor((tw.end.timestamp() - created) / 86400)
+    age_boost = np.minimum(0.20, np.maximum(0.0, (age_days - 7) / 120.0))
+    completed = gen.random(n) < np.minimum(0.98, completion_rate + age_boost)
+    completed_at = completion_epochs(gen, created, tw)
+
+    return TaskAttributes(
+        section_idx=section_idx,
+        created=created,
+        updated=updated,
+        created_day=created_day,
+        has_due=has_due,
+        due_day=due_day,
+        has_start=has_start,
+        completed=completed,
+        completed_at=completed_at,
+        n_tags=_counts(gen, n, 0.55, TAG_COUNT),
+        n_subtasks=_counts(gen, n, 0.35, SUBTASK_COUNT),
+    )
+
+
+def sample_subtask_attributes(
+    gen: np.random.Generator,
+    tasks: TaskAttributes,
+    completion_rate: float,
+    n_names: int,
+    tw: TimeWindow,
+) -> SubtaskAttributes:
+    parent = np.repeat(np.arange(len(tasks.n_subtasks)), tasks.n_subtasks)
+    n = len(parent)
+
+    # Subtasks are created when the parent was last updated.
+    created = tasks.updated[parent]
+    parent_done = tasks.completed[parent]
+    completed = (parent_done & (gen.random(n) < 0.85)) | (gen.random(n) < completion_rate * 0.6)
+
+    return SubtaskAttributes(
+        parent=parent,
+        name_idx=gen.integers(0, n_names, n),
+        has_desc=gen.random(n) >= 0.65,
+        updated=updated_epochs(gen, created, tw),
+        has_due=tasks.has_due[parent] & (gen.random(n) < 0.65),
+        completed=completed,
+        completed_at=completion_epochs(gen, created, tw),
+        keep_assignee=gen.random(n) < 0.70,
+        has_tag=gen.random(n) < 0.35,
+    )
@@ -1,486 +1,700 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import timedelta
+import itertools
+import multiprocessing
 import random
-import json
+import time
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
 
 from utils.corpora import ENG_AREAS, PRODUCT_AREAS, MARKETING_CAMPAIGNS, OPS_INITIATIVES
 from utils.dates import (
+    TimeWindow,
     adjust_to_weekday,
     completion_timestamp,
     due_date_distribution,
     iso,
+    iso_days,
+    iso_epochs,
     now_utc,
     random_workday_datetime,
     updated_timestamp,
     window_last_days,
 )
-from utils.ids import gid
-from utils.randomness import build_rng
-from utils.db import bulk_insert
-from utils.llm_groq import build_groq_from_env, GroqText
+from utils.ids import IdFactory, IntIdFactory, build_ids
+from utils.randomness import build_rng, derive_rng
+from utils.db import bulk_insert, iter_column, query
+from utils.instrument import add_worker_cpu
+from generators.custom_fields import CustomFieldSampler
+from generators.roster import Assigner, TeamRoster
+from generators.task_attributes import (
+    SUBTASK_COUNT,
+    TAG_COUNT,
+    sample_subtask_attributes,
+    sample_task_attributes,
+)
 
 
 @dataclass(frozen=True)
 class TasksContext:
-    task_ids: list[str]
-    subtask_ids: list[str]
-
-
-def _pick_creator(
-    rng: random.Random,
-    users_by_team: dict[str, list[str]],
-    team_id: str,
-    user_role: dict[str, str],
-    all_user_ids: list[str],
-) -> str:
-    pool = users_by_team.get(team_id, []) or all_user_ids
-    # Bias creators toward managers/directors for enterprise workflows.
-    if rng.random() < 0.60:
-        mgrs = [uid for uid in pool if user_role.get(uid) in {"manager", "director", "executive"}]
-        if mgrs:
-            return rng.choice(mgrs)
-    return rng.choice(pool)
-
-
-def _pick_assignee(
-    rng: random.Random,
-    users_by_team: dict[str, list[str]],
-    team_id: str,
-    all_user_ids: list[str],
-    load: dict[str, int],
-) -> str | None:
-    # ~15% unassigned.
-    if rng.random() < 0.15:
-        return None
-    pool = users_by_team.get(team_id, [])
-    if not pool:
-        pool = all_user_ids
-    if not pool:
-        return None
-
-    # Workload-aware selection via "power of 3" sampling.
-    k = 3 if len(pool) >= 3 else len(pool)
-    candidates = rng.sample(pool, k=k)
-    chosen = min(candidates, key=lambda uid: load.get(uid, 0))
-    load[chosen] = load.get(chosen, 0) + 1
-    return chosen
-
-
-def _task_name_heuristic(rng: random.Random, project_type: str) -> str:
-    if project_type in {"sprint", "bug_triage"}:
-        area = rng.choice(ENG_AREAS)
-        verb = rng.choice(["Fix", "Improve", "Refactor", "Add", "Remove", "Investigate", "Harden", "Optimize"])
-        obj = rng.choice(
-            [
-                "token refresh",
-                "billing invoice export",
-                "search indexing",
-                "notifications retry logic",
-                "permission checks",
-                "API rate limit handling",
-                "mobile deeplinks",
-                "dashboard query performance",
-            ]
-        )
-        detail = rng.choice(["edge cases", "time zones", "idempotency", "null handling", "pagination", "audit logging"])
-        return f"{area}: {verb} {obj} ({detail})"
-
-    if project_type == "product_roadmap":
-        area = rng.choice(PRODUCT_AREAS)
-        deliverable = rng.choice(["PRD", "Beta plan", "Launch checklist", "Pricing proposal", "Stakeholder review"])
-        return f"{area}: {deliverable}"
-
-    if project_type in {"marketing_campaign", "content_calendar"}:
-        camp = rng.choice(MARKETING_CAMPAIGNS)
-        deliverable = rng.choice(["Landing page", "Email sequence", "Webinar deck", "Ad creative", "Blog post", "Case study"])
-        return f"{camp} - {deliverable}"
+    task_ids: Sequence[str]
+    subtask_ids: Sequence[str]
+
+
+class _StoredIds:
+    """Read-back view over an id column, used instead of a list in streaming mode."""
+
+    def __init__(self, conn, table: str, column: str) -> None:
+        self._conn = conn
+        self._table = table
+        self._column = column
+
+    def __iter__(self) -> Iterator[str]:
+        return iter_column(self._conn, self._table, self._column)
+
+    def __len__(self) -> int:
+        return int(query(self._conn, f"SELECT COUNT(*) FROM {self._table}")[0][0])
+
+
+TASK_COLUMNS = [
+    "task_id",
+    "project_id",
+    "section_id",
+    "name",
+    "description",
+    "creator_user_id",
+    "assignee_user_id",
+    "created_at",
+    "updated_at",
+    "start_date",
+    "due_date",
+    "completed",
+    "completed_at",
+]
+
+SUBTASK_COLUMNS = [
+    "subtask_id",
+    "parent_task_id",
+    "name",
+    "description",
+    "creator_user_id",
+    "assignee_user_id",
+    "created_at",
+    "updated_at",
+    "due_date",
+    "completed",
+    "completed_at",
+]
+
+TASK_TAG_COLUMNS = ["task_id", "subtask_id", "tag_id", "added_at"]
+
+SUBTASK_NAMES = [
+    "Write test cases",
+    "Update documentation",
+    "Add monitoring",
+    "QA verification",
+    "Create rollout plan",
+    "Stakeholder review",
+    "Fix linting / formatting",
+    "Backfill data",
+]
+
+SUBTASK_DESCRIPTION = "Keep this small and link relevant PRs."
+
+CF_VALUE_COLUMNS = [
+    "custom_field_value_id",
+    "custom_field_id",
+    "task_id",
+    "subtask_id",
+    "value_text",
+    "value_number",
+    "value_enum",
+    "created_at",
+]
+
+
+@dataclass
+class _TaskRows:
+    tasks: list[tuple] = field(default_factory=list)
+    subtasks: list[tuple] = field(default_factory=list)
+    task_tags: list[tuple] = field(default_factory=list)
+    cf_values: list[tuple] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.tasks) + len(self.subtasks) + len(self.task_tags) + len(self.cf_values)
+
+    def extend(self, other: "_TaskRows") -> None:
+        self.tasks.extend(other.tasks)
+        self.subtasks.extend(other.subtasks)
+        self.task_tags.extend(other.task_tags)
+        self.cf_values.extend(other.cf_values)
+
+    def clear(self) -> None:
+        self.tasks.clear()
+        self.subtasks.clear()
+        self.task_tags.clear()
+        self.cf_values.clear()
 
-    if project_type in {"ops_initiative", "sales_enablement"}:
-        ini = rng.choice(OPS_INITIATIVES)
-        deliverable = rng.choice(["Runbook update", "Audit evidence", "Process doc", "Workflow automation", "Stakeholder sign-off"])
-        return f"{ini}: {deliverable}"
 
-    return f"Task {rng.randint(1000, 9999)}"
+@dataclass(frozen=True)
+class _TaskGenContext:
+    cfg: object
+    tw: TimeWindow
+    roster: TeamRoster
+    # project_id -> compiled value samplers for its attached custom fields.
+    cf_samplers: dict[str, tuple[CustomFieldSampler, ...]]
+    proj_to_sections: dict[str, list[str]]
+    tag_ids: list[str]
+
+
+_ENG_TITLE = (
+    "{}: {} {} ({})",
+    (
+        ENG_AREAS,
+        ["Fix", "Improve", "Refactor", "Add", "Remove", "Investigate", "Harden", "Optimize"],
+        [
+            "token refresh",
+            "billing invoice export",
+            "search indexing",
+            "notifications retry logic",
+            "permission checks",
+            "API rate limit handling",
+            "mobile deeplinks",
+            "dashboard query performance",
+        ],
+        ["edge cases", "time zones", "idempotency", "null handling", "pagination", "audit logging"],
+    ),
+)
 
+_MARKETING_TITLE = (
+    "{} - {}",
+    (MARKETING_CAMPAIGNS, ["Landing page", "Email sequence", "Webinar deck", "Ad creative", "Blog post", "Case study"]),
+)
 
-def _task_description(rng: random.Random, project_type: str) -> str | None:
-    r = rng.random()
-    if r < 0.20:
-        return None
-    if r < 0.70:
-        return rng.choice(
-            [
-                "Please align on scope and post updates in-thread.",
-                "Capture requirements, edge cases, and rollout plan.",
-                "Ensure this is tracked end-to-end with clear owners.",
-                "Add relevant links and keep status updated.",
-            ]
-        )
+_OPS_TITLE = (
+    "{}: {}",
+    (OPS_INITIATIVES, ["Runbook update", "Audit evidence", "Process doc", "Workflow automation", "Stakeholder sign-off"]),
+)
 
-    bullets = [
+# project_type -> (format, word lists); one pick per list, in order.
+TITLE_TEMPLATES: dict[str, tuple[str, tuple[list[str], ...]]] = {
+    "sprint": _ENG_TITLE,
+    "bug_triage": _ENG_TITLE,
+    "product_roadmap": (
+        "{}: {}",
+        (PRODUCT_AREAS, ["PRD", "Beta plan", "Launch checklist", "Pricing proposal", "Stakeholder review"]),
+    ),
+    "marketing_campaign": _MARKETING_TITLE,
+    "content_calendar": _MARKETING_TITLE,
+    "ops_initiative": _OPS_TITLE,
+    "sales_enablement": _OPS_TITLE,
+}
+
+_DESCRIPTION_LINES = [
+    "Please align on scope and post updates in-thread.",
+    "Capture requirements, edge cases, and rollout plan.",
+    "Ensure this is tracked end-to-end with clear owners.",
+    "Add relevant links and keep status updated.",
+]
+
+_DESCRIPTION_BULLETS = "\n".join(
+    [
         "- Context:",
         "- Goals:",
         "- Out of scope:",
         "- Rollout / risks:",
         "- Links:",
     ]
-    return "\n".join(bullets)
-
-
-def _maybe_llm_enrich_text(
-    cfg,
-    groq: GroqText,
-    base_name: str,
-    base_desc: str | None,
-    project_name: str,
-) -> tuple[str, str | None]:
-    if not cfg.use_llm_text or not groq.enabled:
-        return base_name, base_desc
-
-    system = "You generate realistic Asana task titles and descriptions for an enterprise B2B SaaS company. Keep it concise and realistic."
-    user = (
-        f"Project: {project_name}\n"
-        f"Base task title: {base_name}\n\n"
-        "Return JSON with keys: title, description.\n"
-        "Constraints:\n"
-        "- Title: 4-12 words, no trailing period\n"
-        "- Description: either empty, 1-3 sentences, or short bullets\n"
-        "- Avoid generic placeholders like 'Task 1'\n"
-    )
-
-    try:
-        text = groq.complete(system=system, user=user, temperature=0.7, max_tokens=250)
-    except Exception:
-        return base_name, base_desc
-
-    try:
-        payload = json.loads(text)
-        title = str(payload.get("title") or base_name).strip()
-        desc = payload.get("description")
-        if desc is not None:
-            desc = str(desc).strip()
-            if desc == "":
-                desc = None
-        return title, desc
-    except Exception:
-        return base_name, base_desc
-
-
-def _value_for_custom_field(rng: random.Random, cf) -> tuple[str | None, float | None, str | None]:
-    # Returns (value_text, value_number, value_enum)
-    if cf.field_type == "enum":
-        if not cf.enum_options_json:
-            return None, None, None
-        try:
-            options = json.loads(cf.enum_options_json)
-        except Exception:
-            options = []
-        if not options:
-            return None, None, None
-        return None, None, str(rng.choice(options))
-
-    if cf.field_type == "number":
-        lname = cf.name.lower()
-        if "story" in lname:
-            return None, float(rng.choice([0.5, 1, 2, 3, 5, 8, 13])), None
-        if "effort" in lname or "hour" in lname:
-            return None, round(rng.lognormvariate(1.1, 0.7), 1), None
-        if "confidence" in lname:
-            return None, round(rng.uniform(0.3, 0.95), 2), None
-        return None, round(rng.uniform(1, 10), 1), None
-
-    # text
-    lname = cf.name.lower()
-    if "release" in lname:
-        return rng.choice(["R-2026.02", "R-2026.03", "R-2026.04", "TBD", "Post-launch"]), None, None
-    if "owner" in lname:
-        return rng.choice(["Platform", "Growth", "Enterprise", "Security", "GTM Ops"]), None, None
-    return rng.choice(["TBD", "" if rng.random() < 0.5 else "Follow up"]), None, None
-
+)
 
-def generate_tasks_and_subtasks(
-    conn,
-    cfg,
-    org,
-    teams,
-    users,
-    projects,
-    sections,
-    tags,
-    custom_fields_ctx,
-) -> TasksContext:
-    rng = build_rng(cfg.seed + 47)
-    tw = window_last_days(cfg.history_days, end=now_utc())
 
-    groq = build_groq_from_env()
+def _task_name_heuristic(rng: random.Random, project_type: str) -> str:
+    spec = TITLE_TEMPLATES.get(project_type)
+    if spec is None:
+        return f"Task {rng.randint(1000, 9999)}"
+    fmt, parts = spec
+    return fmt.format(*[rng.choice(words) for words in parts])
 
-    # Build team->users mapping from actual team_memberships.
-    team_to_users: dict[str, list[str]] = {t.team_id: [] for t in teams}
-    cur = conn.execute("SELECT team_id, user_id FROM team_memberships WHERE left_at IS NULL")
-    for team_id, user_id in cur.fetchall():
-        team_to_users.setdefault(team_id, []).append(user_id)
 
-    all_user_ids = [u.user_id for u in users]
-    user_role = {u.user_id: u.role for u in users}
-    load: dict[str, int] = {}
+def _task_description(rng: random.Random, project_type: str) -> str | None:
+    r = rng.random()
+    if r < 0.20:
+        return None
+    if r < 0.70:
+        return rng.choice(_DESCRIPTION_LINES)
+    return _DESCRIPTION_BULLETS
 
-    # Map custom_field_id -> definition for correct typing.
-    cf_by_id = {cf.custom_field_id: cf for cf in custom_fields_ctx.fields}
 
-    # Sections by project.
-    proj_to_sections: dict[str, list[str]] = {}
-    for s in sections:
-        proj_to_sections.setdefault(s.project_id, []).append(s.section_id)
+def _task_names_batch(gen, project_type: str, n: int) -> list[str]:
+    spec = TITLE_TEMPLATES.get(project_type)
+    if spec is None:
+        return [f"Task {k}" for k in gen.integers(1000, 10000, n).tolist()]
+    fmt, parts = spec
+    picks = [gen.integers(0, len(words), n).tolist() for words in parts]
+    return [fmt.format(*[words[k] for words, k in zip(parts, row)]) for row in zip(*picks)]
 
-    # Tags pool.
-    tag_ids = [t.tag_id for t in tags]
 
-    task_rows = []
-    subtask_rows = []
-    task_tag_rows = []
-    cf_value_rows = []
+def _task_descriptions_batch(gen, n: int) -> list[str | None]:
+    r = gen.random(n).tolist()
+    line = gen.integers(0, len(_DESCRIPTION_LINES), n).tolist()
+    return [
+        None if x < 0.20 else (_DESCRIPTION_LINES[k] if x < 0.70 else _DESCRIPTION_BULLETS)
+        for x, k in zip(r, line)
+    ]
 
-    task_ids: list[str] = []
-    subtask_ids: list[str] = []
 
-    for p in projects:
-        sec_ids = proj_to_sections.get(p.project_id, [])
-        if not sec_ids:
+def _flush_rows(conn, rows: _TaskRows) -> None:
+    # Parents before children: FKs are checked per statement.
+    bulk_insert(conn, "tasks", TASK_COLUMNS, rows.tasks, chunk_size=8000)
+    bulk_insert(conn, "subtasks", SUBTASK_COLUMNS, rows.subtasks, chunk_size=8000)
+    bulk_insert(conn, "task_tags", TASK_TAG_COLUMNS, rows.task_tags, chunk_size=10000)
+    bulk_insert(conn, "custom_field_values", CF_VALUE_COLUMNS, rows.cf_values, chunk_size=10000)
+    rows.clear()
+
+
+def _project_volume(rng: random.Random, cfg, p) -> tuple[int, float]:
+    # Project task volume: log-normal around avg.
+    n_tasks = max(10, int(rng.lognormvariate(5.2, 0.35)))
+    # scale toward configured average
+    n_tasks = int(0.6 * n_tasks + 0.4 * cfg.avg_tasks_per_project)
+    n_tasks = max(40, min(n_tasks, 900))
+
+    # Completion baseline varies by project type.
+    if p.project_type == "sprint":
+        completion_rate = rng.uniform(0.70, 0.85)
+    elif p.project_type == "bug_triage":
+        completion_rate = rng.uniform(0.60, 0.75)
+    elif p.project_type in {"marketing_campaign", "sales_enablement"}:
+        completion_rate = rng.uniform(0.55, 0.75)
+    elif p.project_type == "ops_initiative":
+        completion_rate = rng.uniform(0.45, 0.65)
+    else:
+        completion_rate = rng.uniform(0.40, 0.60)
+    return n_tasks, completion_rate
+
+
+def _cf_value_row(sampler: CustomFieldSampler, value) -> tuple[str | None, float | None, str | None]:
+    # (value_text, value_number, value_enum)
+    if sampler.column == "value_enum":
+        return None, None, value
+    if sampler.column == "value_number":
+        return None, value, None
+    return value, None, None
+
+
+def _custom_field_rows(
+    rng: random.Random,
+    gid: IdFactory | IntIdFactory,
+    samplers: Sequence[CustomFieldSampler],
+    task_id: str,
+    created_at: str,
+    out: _TaskRows,
+) -> None:
+    for sampler in samplers:
+        # Some values left blank.
+        if rng.random() < 0.12:
             continue
 
-        # Project task volume: log-normal around avg.
-        n_tasks = max(10, int(rng.lognormvariate(5.2, 0.35)))
-        # scale toward configured average
-        n_tasks = int(0.6 * n_tasks + 0.4 * cfg.avg_tasks_per_project)
-        n_tasks = max(40, min(n_tasks, 900))
-
-        # Completion baseline varies by project type.
-        if p.project_type == "sprint":
-            completion_rate = rng.uniform(0.70, 0.85)
-        elif p.project_type == "bug_triage":
-            completion_rate = rng.uniform(0.60, 0.75)
-        elif p.project_type in {"marketing_campaign", "sales_enablement"}:
-            completion_rate = rng.uniform(0.55, 0.75)
-        elif p.project_type == "ops_initiative":
-            completion_rate = rng.uniform(0.45, 0.65)
-        else:
-            completion_rate = rng.uniform(0.40, 0.60)
+        value = sampler.sample(rng)
 
-        for _ in range(n_tasks):
-            task_id = gid()
-            section_id = rng.choice(sec_ids)
+        # Introduce sparsity and noise: some tasks keep only status filled.
+        if sampler.sparse and rng.random() < 0.20:
+            continue
 
-            creator = _pick_creator(rng, team_to_users, p.owner_team_id, user_role, all_user_ids)
-            assignee = _pick_assignee(rng, team_to_users, p.owner_team_id, all_user_ids, load)
+        if value is None:
+            continue
 
-            created_at_dt = random_workday_datetime(rng, tw)
-            updated_at_dt = updated_timestamp(rng, created_at_dt, tw)
+        out.cf_values.append((gid(), sampler.custom_field_id, task_id, None, *_cf_value_row(sampler, value), created_at))
+
+
+def _custom_field_rows_batch(
+    gen,
+    gid: IdFactory | IntIdFactory,
+    samplers: Sequence[CustomFieldSampler],
+    task_ids: list[str],
+    created: list[str],
+    out: _TaskRows,
+) -> None:
+    # Vectorized _custom_field_rows for a whole project: one (fields x tasks)
+    # keep-mask, then rows are emitted task-major like the scalar engine.
+    n = len(task_ids)
+    if not samplers or not n:
+        return
+    values = [s.sample_batch(gen, n) for s in samplers]
+    keep = np.stack(
+        [
+            (gen.random(n) >= 0.12)
+            & ~(s.sparse & (gen.random(n) < 0.20))
+            & np.fromiter((v is not None for v in vals), dtype=bool, count=n)
+            for s, vals in zip(samplers, values)
+        ]
+    )
+    tasks, fields = np.nonzero(keep.T)
+    ids = gid.take(len(tasks))
+    out.cf_values.extend(
+        (cf_id, samplers[f].custom_field_id, task_ids[i], None, *_cf_value_row(samplers[f], values[f][i]), created[i])
+        for cf_id, f, i in zip(ids, fields.tolist(), tasks.tolist())
+    )
 
-            created_date = created_at_dt.date()
-            if p.project_type == "sprint":
-                due = (
-                    adjust_to_weekday(created_date + timedelta(days=rng.randint(7, 14)), rng)
-                    if rng.random() < 0.92
-                    else None
-                )
-            else:
-                due = due_date_distribution(rng, created_date)
-            if due is not None:
-                due = adjust_to_weekday(due, rng)
-
-            # Start date sometimes.
-            start_date = None
-            if rng.random() < 0.35:
-                start_date = created_date
-
-            # Completion probability increases with age.
-            age_days = (tw.end - created_at_dt).days
-            age_boost = min(0.20, max(0.0, (age_days - 7) / 120.0))
-            completed = 1 if rng.random() < min(0.98, completion_rate + age_boost) else 0
-
-            completed_at = None
-            if completed:
-                completed_at = completion_timestamp(rng, created_at_dt, tw)
-
-            base_name = _task_name_heuristic(rng, p.project_type)
-            base_desc = _task_description(rng, p.project_type)
-            name, desc = _maybe_llm_enrich_text(cfg, groq, base_name, base_desc, p.name)
-
-            task_rows.append(
-                (
-                    task_id,
-                    p.project_id,
-                    section_id,
-                    name,
-                    desc,
-                    creator,
-                    assignee,
-                    iso(created_at_dt),
-                    iso(updated_at_dt),
-                    iso(start_date),
-                    iso(due),
-                    completed,
-                    iso(completed_at) if completed_at else None,
-                )
-            )
-            task_ids.append(task_id)
 
-            # Tags: most tasks have 0-2.
-            if rng.random() < 0.55:
-                for _ in range(rng.choices([1, 2, 3], weights=[0.65, 0.25, 0.10], k=1)[0]):
-                    tag_id = rng.choice(tag_ids)
-                    task_tag_rows.append((task_id, None, tag_id, iso(created_at_dt)))
+def _project_rows(
+    ctx: _TaskGenContext,
+    rng: random.Random,
+    gid: IdFactory | IntIdFactory,
+    assigner: Assigner,
+    p,
+) -> _TaskRows:
+    out = _TaskRows()
+    tw = ctx.tw
 
-            # Custom field values per project.
-            cf_ids = custom_fields_ctx.project_to_fields.get(p.project_id, [])
-            for cf_id in cf_ids:
-                # Some values left blank.
-                if rng.random() < 0.12:
-                    continue
+    sec_ids = ctx.proj_to_sections.get(p.project_id, [])
+    if not sec_ids:
+        return out
 
-                cf = cf_by_id.get(cf_id)
-                if cf is None:
-                    continue
+    n_tasks, completion_rate = _project_volume(rng, ctx.cfg, p)
+    cf_samplers = ctx.cf_samplers.get(p.project_id, ())
 
-                value_text, value_number, value_enum = _value_for_custom_field(rng, cf)
+    for _ in range(n_tasks):
+        task_id = gid()
+        section_id = rng.choice(sec_ids)
 
-                # Introduce sparsity and noise: some tasks keep only status filled.
-                if cf.name != "Status" and rng.random() < 0.20:
-                    continue
+        creator = ctx.roster.pick_creator(rng, p.owner_team_id)
+        assignee = assigner.pick(rng, p.owner_team_id)
 
-                # Avoid storing empty strings.
-                if value_text is not None and value_text.strip() == "":
-                    value_text = None
+        created_at_dt = random_workday_datetime(rng, tw)
+        updated_at_dt = updated_timestamp(rng, created_at_dt, tw)
 
-                if value_text is None and value_number is None and value_enum is None:
-                    continue
+        created_date = created_at_dt.date()
+        if p.project_type == "sprint":
+            due = (
+                adjust_to_weekday(created_date + timedelta(days=rng.randint(7, 14)), rng)
+                if rng.random() < 0.92
+                else None
+            )
+        else:
+            due = due_date_distribution(rng, created_date)
+        if due is not None:
+            due = adjust_to_weekday(due, rng)
+
+        # Start date sometimes.
+        start_date = None
+        if rng.random() < 0.35:
+            start_date = created_date
+
+        # Completion probability increases with age.
+        age_days = (tw.end - created_at_dt).days
+        age_boost = min(0.20, max(0.0, (age_days - 7) / 120.0))
+        completed = 1 if rng.random() < min(0.98, completion_rate + age_boost) else 0
+
+        completed_at = None
+        if completed:
+            completed_at = completion_timestamp(rng, created_at_dt, tw)
+
+        name = _task_name_heuristic(rng, p.project_type)
+        desc = _task_description(rng, p.project_type)
+
+        out.tasks.append(
+            (
+                task_id,
+                p.project_id,
+                section_id,
+                name,
+                desc,
+                creator,
+                assignee,
+                iso(created_at_dt),
+                iso(updated_at_dt),
+                iso(start_date),
+                iso(due),
+                completed,
+                iso(completed_at) if completed_at else None,
+            )
+        )
 
-                cf_value_rows.append(
-                    (gid(), cf_id, task_id, None, value_text, value_number, value_enum, iso(created_at_dt))
+        # Tags: most tasks have 0-2.
+        if rng.random() < 0.55:
+            for _ in range(TAG_COUNT.sample(rng)):
+                tag_id = rng.choice(ctx.tag_ids)
+                out.task_tags.append((task_id, None, tag_id, iso(created_at_dt)))
+
+        # Custom field values per project.
+        _custom_field_rows(rng, gid, cf_samplers, task_id, iso(created_at_dt), out)
+
+        # Subtasks: 35% of tasks have subtasks; 1-5 each.
+        if rng.random() < 0.35:
+            n_sub = SUBTASK_COUNT.sample(rng)
+            for _ in range(n_sub):
+                sid = gid()
+                sub_name = rng.choice(SUBTASK_NAMES)
+                sub_desc = None if rng.random() < 0.65 else SUBTASK_DESCRIPTION
+                sub_created_at = updated_at_dt
+                sub_updated_at = updated_timestamp(rng, sub_created_at, tw)
+
+                sub_due = None
+                if due is not None and rng.random() < 0.65:
+                    sub_due = due
+
+                sub_completed = 1 if completed and rng.random() < 0.85 else (1 if rng.random() < completion_rate * 0.6 else 0)
+                sub_completed_at = None
+                if sub_completed:
+                    sub_completed_at = completion_timestamp(rng, sub_created_at, tw)
+
+                sub_assignee = assignee if rng.random() < 0.70 else assigner.pick(rng, p.owner_team_id)
+
+                out.subtasks.append(
+                    (
+                        sid,
+                        task_id,
+                        sub_name,
+                        sub_desc,
+                        creator,
+                        sub_assignee,
+                        iso(sub_created_at),
+                        iso(sub_updated_at),
+                        iso(sub_due),
+                        sub_completed,
+                        iso(sub_completed_at) if sub_completed_at else None,
+                    )
                 )
 
-            # Subtasks: 35% of tasks have subtasks; 1-5 each.
-            if rng.random() < 0.35:
-                n_sub = rng.choices([1, 2, 3, 4, 5], weights=[0.35, 0.30, 0.20, 0.10, 0.05], k=1)[0]
-                for _ in range(n_sub):
-                    sid = gid()
-                    sub_name = rng.choice(
-                        [
-                            "Write test cases",
-                            "Update documentation",
-                            "Add monitoring",
-                            "QA verification",
-                            "Create rollout plan",
-                            "Stakeholder review",
-                            "Fix linting / formatting",
-                            "Backfill data",
-                        ]
-                    )
-                    sub_desc = None if rng.random() < 0.65 else "Keep this small and link relevant PRs."
-                    sub_created_at = updated_at_dt
-                    sub_updated_at = updated_timestamp(rng, sub_created_at, tw)
+                if rng.random() < 0.35:
+                    tag_id = rng.choice(ctx.tag_ids)
+                    out.task_tags.append((None, sid, tag_id, iso(sub_created_at)))
 
-                    sub_due = None
-                    if due is not None and rng.random() < 0.65:
-                        sub_due = due
+    return out
 
-                    sub_completed = 1 if completed and rng.random() < 0.85 else (1 if rng.random() < completion_rate * 0.6 else 0)
-                    sub_completed_at = None
-                    if sub_completed:
-                        sub_completed_at = completion_timestamp(rng, sub_created_at, tw)
 
-                    sub_assignee = assignee if rng.random() < 0.70 else _pick_assignee(
-                        rng, team_to_users, p.owner_team_id, all_user_ids, load
-                    )
+def _project_rows_vectorized(
+    ctx: _TaskGenContext,
+    rng: random.Random,
+    gen,
+    gid: IdFactory | IntIdFactory,
+    assigner: Assigner,
+    p,
+) -> _TaskRows:
+    # Same distributions as _project_rows, but every numeric/date attribute,
+    # title and description is drawn for the whole project at once from `gen`
+    # (a NumPy Generator), as are custom field values. Only the stateful
+    # picks (creator, load-aware assignee) still go through the scalar `rng`.
+    out = _TaskRows()
+    tw = ctx.tw
+
+    sec_ids = ctx.proj_to_sections.get(p.project_id, [])
+    if not sec_ids:
+        return out
+
+    n_tasks, completion_rate = _project_volume(rng, ctx.cfg, p)
+    cf_samplers = ctx.cf_samplers.get(p.project_id, ())
+
+    a = sample_task_attributes(gen, n_tasks, p.project_type, completion_rate, len(sec_ids), tw)
+    sa = sample_subtask_attributes(gen, a, completion_rate, len(SUBTASK_NAMES), tw)
+
+    created = iso_epochs(a.created)
+    updated = iso_epochs(a.updated)
+    start = iso_days(a.created_day, a.has_start)
+    due = iso_days(a.due_day, a.has_due)
+    completed_at = iso_epochs(a.completed_at)
+    sections = a.section_idx.tolist()
+    names = _task_names_batch(gen, p.project_type, n_tasks)
+    descriptions = _task_descriptions_batch(gen, n_tasks)
+    tag_picks = gen.integers(0, len(ctx.tag_ids), int(a.n_tags.sum())).tolist()
+
+    # Ids come in blocks; only the creator/assignee picks (which depend on
+    # running load) are drawn row by row. Rows are zipped from the columns.
+    task_ids = gid.take(n_tasks)
+    creators: list[str] = []
+    assignees: list[str | None] = []
+    pick_creator, pick = ctx.roster.pick_creator, assigner.pick
+    for _ in range(n_tasks):
+        creators.append(pick_creator(rng, p.owner_team_id))
+        assignees.append(pick(rng, p.owner_team_id))
+
+    done = a.completed
+    out.tasks = list(
+        zip(
+            task_ids,
+            itertools.repeat(p.project_id),
+            [sec_ids[k] for k in sections],
+            names,
+            descriptions,
+            creators,
+            assignees,
+            created,
+            updated,
+            start,
+            due,
+            done.astype(int).tolist(),
+            [c if d else None for c, d in zip(completed_at, done.tolist())],
+        )
+    )
 
-                    subtask_rows.append(
-                        (
-                            sid,
-                            task_id,
-                            sub_name,
-                            sub_desc,
-                            creator,
-                            sub_assignee,
-                            iso(sub_created_at),
-                            iso(sub_updated_at),
-                            iso(sub_due),
-                            sub_completed,
-                            iso(sub_completed_at) if sub_completed_at else None,
-                        )
-                    )
-                    subtask_ids.append(sid)
+    tag_ids = ctx.tag_ids
+    tagged = np.repeat(np.arange(n_tasks), a.n_tags).tolist()
+    out.task_tags = [(task_ids[i], None, tag_ids[k], created[i]) for i, k in zip(tagged, tag_picks)]
+
+    _custom_field_rows_batch(gen, gid, cf_samplers, task_ids, created, out)
+
+    parents = sa.parent.tolist()
+    n_sub = len(parents)
+    sub_ids = gid.take(n_sub)
+    sub_done = sa.completed
+    sub_tag_picks = gen.integers(0, len(tag_ids), n_sub).tolist()
+    out.subtasks = list(
+        zip(
+            sub_ids,
+            [task_ids[i] for i in parents],
+            [SUBTASK_NAMES[k] for k in sa.name_idx.tolist()],
+            [SUBTASK_DESCRIPTION if d else None for d in sa.has_desc.tolist()],
+            [creators[i] for i in parents],
+            [assignees[i] if keep else pick(rng, p.owner_team_id) for i, keep in zip(parents, sa.keep_assignee.tolist())],
+            [updated[i] for i in parents],
+            iso_epochs(sa.updated),
+            [due[i] if d else None for i, d in zip(parents, sa.has_due.tolist())],
+            sub_done.astype(int).tolist(),
+            [c if d else None for c, d in zip(iso_epochs(sa.completed_at), sub_done.tolist())],
+        )
+    )
+    out.task_tags.extend(
+        (None, sid, tag_ids[k], updated[i])
+        for sid, i, k, has_tag in zip(sub_ids, parents, sub_tag_picks, sa.has_tag.tolist())
+        if has_tag
+    )
+    return out
 
-                    if rng.random() < 0.35:
-                        tag_id = rng.choice(tag_ids)
-                        task_tag_rows.append((None, sid, tag_id, iso(sub_created_at)))
 
-    bulk_insert(
-        conn,
-        "tasks",
-        [
-            "task_id",
-            "project_id",
-            "section_id",
-            "name",
-            "description",
-            "creator_user_id",
-            "assignee_user_id",
-            "created_at",
-            "updated_at",
-            "start_date",
-            "due_date",
-            "completed",
-            "completed_at",
-        ],
-        task_rows,
-        chunk_size=8000,
-    )
+def _build_project_rows(
+    ctx: _TaskGenContext,
+    rng: random.Random,
+    gid: IdFactory | IntIdFactory,
+    assigner: Assigner,
+    p,
+    idx: int,
+) -> _TaskRows:
+    if ctx.cfg.task_engine == "numpy":
+        gen = np.random.default_rng([ctx.cfg.seed + 47, idx])
+        return _project_rows_vectorized(ctx, rng, gen, gid, assigner, p)
+    return _project_rows(ctx, rng, gid, assigner, p)
+
+
+def _assigner(ctx: _TaskGenContext) -> Assigner:
+    return Assigner(ctx.roster, ctx.cfg.assignee_policy)
+
+
+# Per-process context for sharded workers, installed once by the pool initializer.
+_SHARD_CTX: _TaskGenContext | None = None
+
+
+def _init_shard_worker(ctx: _TaskGenContext) -> None:
+    global _SHARD_CTX
+    _SHARD_CTX = ctx
+
+
+def _shard_rows(ctx: _TaskGenContext, idx: int, p) -> _TaskRows:
+    # Each project owns its RNG stream, id stream and workload counts, so its
+    # rows do not depend on which worker runs it or on what ran before it.
+    rng = derive_rng(ctx.cfg.seed + 47, idx)
+    return _build_project_rows(ctx, rng, build_ids(ctx.cfg, 47, shard=idx + 1), _assigner(ctx), p, idx)
+
+
+def _shard_worker(idx: int, p) -> tuple[_TaskRows, float]:
+    # Pool workers are children of the fork server, not of this process, so
+    # RUSAGE_CHILDREN never sees them: each shard reports its own CPU time.
+    assert _SHARD_CTX is not None
+    cpu0 = time.process_time()
+    rows = _shard_rows(_SHARD_CTX, idx, p)
+    return rows, time.process_time() - cpu0
+
+
+def _iter_sharded_rows(ctx: _TaskGenContext, projects: Iterable, workers: int) -> Iterator[tuple[object, _TaskRows]]:
+    if workers <= 1:
+        for idx, p in enumerate(projects):
+            yield p, _shard_rows(ctx, idx, p)
+        return
+
+    # Results are consumed in project order; keeping only a small window in
+    # flight bounds how many finished shards wait on the writer.
+    todo = enumerate(projects)
+    # This runs on a stage thread next to the writer thread and other stages;
+    # forking a multi-threaded process can copy held locks, so workers start
+    # from a fork server (or spawn, where there is none) and get ctx pickled.
+    methods = multiprocessing.get_all_start_methods()
+    mp_context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=mp_context, initializer=_init_shard_worker, initargs=(ctx,)
+    ) as ex:
+        pending = deque((p, ex.submit(_shard_worker, idx, p)) for idx, p in itertools.islice(todo, 2 * workers))
+        while pending:
+            p, fut = pending.popleft()
+            rows, cpu = fut.result()
+            add_worker_cpu(cpu)
+            for idx, nxt in itertools.islice(todo, 1):
+                pending.append((nxt, ex.submit(_shard_worker, idx, nxt)))
+            yield p, rows
 
-    bulk_insert(
-        conn,
-        "subtasks",
-        [
-            "subtask_id",
-            "parent_task_id",
-            "name",
-            "description",
-            "creator_user_id",
-            "assignee_user_id",
-            "created_at",
-            "updated_at",
-            "due_date",
-            "completed",
-            "completed_at",
-        ],
-        subtask_rows,
-        chunk_size=8000,
-    )
 
-    bulk_insert(
-        conn,
-        "task_tags",
-        ["task_id", "subtask_id", "tag_id", "added_at"],
-        task_tag_rows,
-        chunk_size=10000,
-    )
+def generate_tasks_and_subtasks(
+    conn,
+    cfg,
+    org,
+    teams,
+    users,
+    memberships,
+    projects,
+    sections,
+    tags,
+    custom_fields_ctx,
+) -> TasksContext:
+    rng = build_rng(cfg.seed + 47)
+    tw = window_last_days(cfg.history_days, end=now_utc())
 
-    bulk_insert(
-        conn,
-        "custom_field_values",
-        [
-            "custom_field_value_id",
-            "custom_field_id",
-            "task_id",
-            "subtask_id",
-            "value_text",
-            "value_number",
-            "value_enum",
-            "created_at",
-        ],
-        cf_value_rows,
-        chunk_size=10000,
+    # Sections by project.
+    proj_to_sections: dict[str, list[str]] = {}
+    for s in sections:
+        proj_to_sections.setdefault(s.project_id, []).append(s.section_id)
+
+    ctx = _TaskGenContext(
+        cfg=cfg,
+        tw=tw,
+        roster=TeamRoster.build(teams, users, memberships),
+        cf_samplers=custom_fields_ctx.samplers_by_project(),
+        proj_to_sections=proj_to_sections,
+        tag_ids=[t.tag_id for t in tags],
     )
+    # Streaming mode flushes all four tables together whenever the buffer
+    # crosses TASK_BATCH_ROWS, so peak memory is bounded by the batch size
+    # (plus one project) instead of by the workspace size.
+    stream = cfg.stream_tasks
+    buf = _TaskRows()
+    task_ids: list[str] = []
+    subtask_ids: list[str] = []
 
+    if cfg.task_workers > 0:
+        # Sharded mode: per-project RNG streams, rows funnelled back to this
+        # process (the only SQLite writer) in project order.
+        produced = _iter_sharded_rows(ctx, projects, cfg.task_workers)
+    else:
+        gid = build_ids(cfg, 47)
+        assigner = _assigner(ctx)
+        produced = ((p, _build_project_rows(ctx, rng, gid, assigner, p, idx)) for idx, p in enumerate(projects))
+
+    for p, rows in produced:
+        if not stream:
+            task_ids.extend(r[0] for r in rows.tasks)
+            subtask_ids.extend(r[0] for r in rows.subtasks)
+        buf.extend(rows)
+        if stream and len(buf) >= cfg.task_batch_rows:
+            _flush_rows(conn, buf)
+
+    _flush_rows(conn, buf)
+
+    if stream:
+        return TasksContext(
+            task_ids=_StoredIds(conn, "tasks", "task_id"),
+            subtask_ids=_StoredIds(conn, "subtasks", "subtask_id"),
+        )
     return TasksContext(task_ids=task_ids, subtask_ids=subtask_ids)
@@ -5,7 +5,7 @@ import random
 
 from utils.corpora import DEPARTMENTS
 from utils.dates import iso, now_utc
-from utils.ids import gid
+from utils.ids import build_ids
 from utils.randomness import build_rng
 from utils.db import bulk_insert
 
@@ -31,6 +31,7 @@ def _team_type_for_department(dept: str) -> str:
 
 def generate_teams(conn, cfg, org) -> list[Team]:
     rng = build_rng(cfg.seed + 17)
+    gid = build_ids(cfg, 17)
 
     # Team naming patterns common in enterprise Asana workspaces.
     base_names = {
@@ -8,8 +8,8 @@ from faker import Faker
 
 from utils.corpora import DEPARTMENTS, LOCATIONS
 from utils.dates import TimeWindow, iso, now_utc, random_workday_datetime, window_last_days
-from utils.ids import gid
-from utils.randomness import build_faker, build_rng
+from utils.ids import build_ids
+from utils.randomness import WeightedSampler, build_faker, build_rng
 from utils.db import bulk_insert, bulk_update
 
 
@@ -108,6 +108,7 @@ def _make_unique_email(base_local_part: str, domain: str, used: set[str]) -> str
 
 def generate_users(conn, cfg, org, teams) -> list[User]:
     rng = build_rng(cfg.seed + 23)
+    gid = build_ids(cfg, 23)
     fk = build_faker(cfg.seed + 29)
     tw = window_last_days(cfg.history_days, end=now_utc())
 
@@ -130,8 +131,7 @@ def generate_users(conn, cfg, org, teams) -> list[User]:
         "RevOps": 0.025,
     }
 
-    depts = list(dept_weights.keys())
-    weights = [dept_weights[d] for d in depts]
+    dept_sampler = WeightedSampler(list(dept_weights), list(dept_weights.values()))
 
     users: list[User] = []
     used_emails: set[str] = set()
@@ -166,7 +166,7 @@ def generate_users(conn, cfg, org, teams) -> list[User]:
 
     # Generate remaining users.
     for _ in range(cfg.target_users - len(users)):
-        dept = rng.choices(depts, weights=weights, k=1)[0]
+        dept = dept_sampler.sample(rng)
 
         # ~11% managers; plus some directors.
         r = rng.random()
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+from dataclasses import asdict
+from datetime import datetime
+import json
 import logging
 import os
 from pathlib import Path
+import time
 
 from dotenv import load_dotenv
 
 from utils.config import load_config
 from utils import db
+from utils.dates import pin_now
+from utils.foreign_keys import read_foreign_keys
+from utils.instrument import Instrument, build_run_report, parse_profile_stages, write_run_report
+from utils.online_stats import OnlineStats
+from utils.stages import Stage, prerequisites, run_stages
 
 from generators.organization import generate_organization
 from generators.teams import generate_teams
@@ -18,14 +27,34 @@ from generators.sections import generate_sections
 from generators.tags import generate_tags
 from generators.custom_fields import generate_custom_fields
 from generators.tasks import generate_tasks_and_subtasks
+from generators.enrichment import enrich_tasks
 from generators.comments import generate_comments
 from generators.attachments import generate_attachments
+from sanity_check import TABLES, cross_check, report_from_stats, scan_tables
 
 
 def _read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
+def _write_online_sanity_report(cfg, online: OnlineStats, db_path: Path, out_path: Path) -> None:
+    stats = online.table_stats(TABLES)
+    report = report_from_stats(stats)
+    report["source"] = "online"
+    report["distributions"] = online.distributions()
+    if cfg.stats_cross_check:
+        # Same aggregates from SQL, to verify the online numbers.
+        problems = cross_check(stats, scan_tables(str(db_path)))
+        report["cross_check"] = {"ok": not problems, "mismatches": problems}
+        if problems:
+            logging.error("Online stats disagree with SQL: %s", "; ".join(problems))
+        else:
+            logging.info("Online stats match SQL")
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    ok = all(c["ok"] for c in report["checks"])
+    logging.info("Sanity report (online) written to %s; all checks OK: %s", out_path, ok)
+
+
 def main() -> None:
     load_dotenv()
     cfg = load_config()
@@ -35,66 +64,195 @@ def main() -> None:
         format="%(asctime)s | %(levelname)s | %(message)s",
     )
 
+    # One "now" for every stage; SIM_NOW (ISO 8601) makes the run reproducible.
+    pin_now(datetime.fromisoformat(cfg.sim_now) if cfg.sim_now else None)
+
     db_path = Path(cfg.db_path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    schema_sql = _read_text(Path(__file__).resolve().parent.parent / "schema.sql")
+    # INTEGER_KEYS=1 stores rowid keys and exposes string GIDs through v_* views.
+    schema_name = "schema_compact.sql" if cfg.integer_keys else "schema.sql"
+    schema_sql = _read_text(Path(__file__).resolve().parent.parent / schema_name)
 
-    if db_path.exists():
+    # IN_MEMORY=1 builds in RAM and swaps the finished file in at the end,
+    # so the previous DB stays in place until then.
+    if db_path.exists() and not cfg.in_memory:
         db_path.unlink()
 
-    conn = db.connect(str(db_path))
+    # ONLINE_STATS=1 builds the sanity report from rows as they are written.
+    online = OnlineStats() if cfg.online_stats else None
+
+    # One writer thread owns the connection; every stage only produces batches.
+    w = db.BackgroundWriter(
+        lambda: db.connect(":memory:" if cfg.in_memory else str(db_path), bulk_load=cfg.bulk_load),
+        maxsize=cfg.writer_queue_batches,
+        observer=online.observe if online is not None else None,
+    )
     try:
         logging.info("Creating schema")
-        db.execute_script(conn, schema_sql)
-
-        logging.info("Generating organization")
-        org = generate_organization(conn, cfg)
+        index_sql = ""
+        if cfg.bulk_load:
+            # Secondary indexes are built once after all rows are in.
+            schema_sql, index_sql = db.split_schema(schema_sql)
+        w.call(lambda c: db.execute_script(c, schema_sql))
+        if online is not None:
+            # Every declared FK edge is audited from the inserted rows.
+            w.call(lambda c: online.watch_foreign_keys(read_foreign_keys(c, TABLES)))
 
-        logging.info("Generating teams")
-        teams = generate_teams(conn, cfg, org)
-
-        logging.info("Generating users")
-        users = generate_users(conn, cfg, org, teams)
-
-        logging.info("Generating team memberships")
-        generate_team_memberships(conn, cfg, teams, users)
-
-        logging.info("Generating projects")
-        projects = generate_projects(conn, cfg, org, teams, users)
+        # Rows per stage are tallied by the writer; page counts are read once
+        # each stage's writes have been applied.
+        inst = Instrument(
+            page_count=lambda: w.call(lambda c: c.execute("PRAGMA page_count").fetchone()[0]),
+            profile_stages=parse_profile_stages(cfg.profile_stages),
+            profile_dir=Path(cfg.run_report_path).parent / "profiles",
+        )
 
-        logging.info("Generating sections")
-        sections = generate_sections(conn, cfg, projects)
+        def stage(name: str, label: str, fn, *deps: str) -> Stage:
+            def run(r):
+                logging.info("Generating %s", label)
+                return fn(r)
 
-        logging.info("Generating tags")
-        tags = generate_tags(conn, cfg, org)
+            return Stage(name, inst.wrap(name, run), deps)
 
-        logging.info("Generating custom fields")
-        custom_fields = generate_custom_fields(conn, cfg, org, projects)
+        # Each stage lists only the outputs it consumes; independent stages run
+        # concurrently and all writes go through the single connection owner.
+        stages = [
+            stage("organization", "organization", lambda r: generate_organization(w, cfg)),
+            stage("teams", "teams", lambda r: generate_teams(w, cfg, r["organization"]), "organization"),
+            stage(
+                "users",
+                "users",
+                lambda r: generate_users(w, cfg, r["organization"], r["teams"]),
+                "organization",
+                "teams",
+            ),
+            stage(
+                "memberships",
+                "team memberships",
+                lambda r: generate_team_memberships(w, cfg, r["teams"], r["users"]),
+                "teams",
+                "users",
+            ),
+            stage(
+                "projects",
+                "projects",
+                lambda r: generate_projects(w, cfg, r["organization"], r["teams"], r["users"]),
+                "organization",
+                "teams",
+                "users",
+            ),
+            stage("sections", "sections", lambda r: generate_sections(w, cfg, r["projects"]), "projects"),
+            stage("tags", "tags", lambda r: generate_tags(w, cfg, r["organization"]), "organization"),
+            stage(
+                "custom_fields",
+                "custom fields",
+                lambda r: generate_custom_fields(w, cfg, r["organization"], r["projects"]),
+                "organization",
+                "projects",
+            ),
+            stage(
+                "tasks",
+                "tasks + subtasks + task-tags + custom-field-values",
+                lambda r: generate_tasks_and_subtasks(
+                    w,
+                    cfg,
+                    r["organization"],
+                    r["teams"],
+                    r["users"],
+                    r["memberships"],
+                    r["projects"],
+                    r["sections"],
+                    r["tags"],
+                    r["custom_fields"],
+                ),
+                "organization",
+                "teams",
+                "users",
+                "memberships",
+                "projects",
+                "sections",
+                "tags",
+                "custom_fields",
+            ),
+            stage(
+                "enrichment",
+                "LLM task text",
+                lambda r: enrich_tasks(w, cfg, r["projects"], r["sections"]),
+                "projects",
+                "sections",
+                "tasks",
+            ),
+            stage("comments", "comments", lambda r: generate_comments(w, cfg, r["users"], r["tasks"]), "users", "tasks"),
+            stage(
+                "attachments",
+                "attachments",
+                lambda r: generate_attachments(w, cfg, r["users"], r["tasks"]),
+                "users",
+                "tasks",
+            ),
+        ]
 
-        logging.info("Generating tasks + subtasks + task-tags + custom-field-values")
-        tasks_ctx = generate_tasks_and_subtasks(
-            conn,
-            cfg,
-            org,
-            teams,
-            users,
-            projects,
-            sections,
-            tags,
-            custom_fields,
+        workers = cfg.pipeline_workers
+        if inst.profile_stages and workers > 1:
+            # A profile would also catch the calls of stages running beside it
+            # (Python 3.12+ profiles process-wide), so profile runs are serial.
+            logging.info("PROFILE_STAGES is set: running stages one at a time")
+            workers = 1
+        isolated = None
+        if cfg.isolate_stage:
+            # ISOLATE_STAGE=<name>: build the stage's inputs, wait for the writer
+            # to apply them, then run that one stage alone. The run report then
+            # covers only that stage.
+            prereqs = prerequisites(stages, cfg.isolate_stage)
+            target = [s for s in stages if s.name == cfg.isolate_stage]
+            before = run_stages(prereqs, workers=workers)
+            isolated = {
+                "stage": cfg.isolate_stage,
+                "prerequisites": [s.name for s in prereqs],
+                "prerequisites_seconds": round(before.wall_seconds, 4),
+                "db_pages_before": inst.page_count(),
+            }
+            report = run_stages(target, workers=1, results=before.results)
+        else:
+            report = run_stages(stages, workers=workers)
+        for t in sorted(report.timings.values(), key=lambda t: t.start):
+            logging.info("Stage %-14s %7.2fs (start +%.2fs)", t.name, t.seconds, t.start)
+        logging.info(
+            "Critical path %.2fs of %.2fs wall: %s",
+            report.critical_path_seconds,
+            report.wall_seconds,
+            " -> ".join(report.critical_path),
         )
 
-        logging.info("Generating comments")
-        generate_comments(conn, cfg, users, tasks_ctx)
+        t0 = time.perf_counter()
+        if cfg.bulk_load:
+            logging.info("Building indexes and checking constraints")
+            w.call(lambda c: db.finish_bulk_load(c, index_sql))
 
-        logging.info("Generating attachments")
-        generate_attachments(conn, cfg, users, tasks_ctx)
+        w.call(lambda c: c.commit())
+        if cfg.in_memory:
+            logging.info("Writing in-memory DB to %s", db_path)
+            w.call(lambda c: db.persist(c, str(db_path)))
+        finish_seconds = time.perf_counter() - t0
 
-        conn.commit()
-        logging.info("Done. DB written to %s", db_path)
+        run_report = build_run_report(
+            inst,
+            report,
+            w.write_stats(),
+            w.call(db.db_info),
+            extra={
+                "finish_seconds": round(finish_seconds, 4),
+                **({"isolated": isolated} if isolated is not None else {}),
+                "config": {k: v for k, v in asdict(cfg).items() if k != "groq_api_key"},
+            },
+        )
     finally:
-        conn.close()
+        w.close()
+    out = write_run_report(cfg.run_report_path, run_report)
+    logging.info("Run report written to %s", out)
+    if online is not None:
+        _write_online_sanity_report(cfg, online, db_path, out.parent / "sanity_report.json")
+    logging.info("Done. DB written to %s", db_path)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import hashlib
 import json
-import sqlite3
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from utils.db import connect_readonly
+from utils.fingerprint import file_fingerprint, table_fingerprints
+from utils.foreign_keys import ForeignKey, read_foreign_keys
+
 
 @dataclass(frozen=True)
 class CheckResult:
@@ -14,193 +21,328 @@ class CheckResult:
     details: dict[str, Any]
 
 
-def _q(conn: sqlite3.Connection, sql: str, params: tuple[Any, ...] = ()) -> Any:
-    cur = conn.execute(sql, params)
-    return cur.fetchone()[0]
-
-
-def _table_counts(conn: sqlite3.Connection) -> dict[str, int]:
-    tables = [
-        "organizations",
-        "teams",
-        "users",
-        "team_memberships",
-        "projects",
-        "sections",
-        "tasks",
-        "subtasks",
-        "comments",
-        "tags",
-        "task_tags",
-        "custom_field_definitions",
-        "project_custom_fields",
-        "custom_field_values",
-        "attachments",
-    ]
-    out: dict[str, int] = {}
-    for t in tables:
-        out[t] = int(_q(conn, f"SELECT COUNT(*) FROM {t}"))
-    return out
-
-
-def run_sanity_checks(db_path: str) -> dict[str, Any]:
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON")
+TABLES = [
+    "organizations",
+    "teams",
+    "users",
+    "team_memberships",
+    "projects",
+    "sections",
+    "tasks",
+    "subtasks",
+    "comments",
+    "tags",
+    "task_tags",
+    "custom_field_definitions",
+    "project_custom_fields",
+    "custom_field_values",
+    "attachments",
+]
+
+# Orphan rows returned per FK edge that has any.
+ORPHAN_SAMPLES = 5
+
+# Per-table aggregates, all computed in one scan of the table (alias t).
+# Every scan also yields "rows" (COUNT(*)) and one orphan count per FK edge
+# declared on the table ("fk_<columns>", see utils.foreign_keys).
+_AGGREGATES: dict[str, dict[str, str]] = {
+    "tasks": {
+        # Temporal consistency: completed_at should be non-null iff completed=1.
+        "completed_mismatch": (
+            "(t.completed = 1 AND t.completed_at IS NULL) OR (t.completed = 0 AND t.completed_at IS NOT NULL)"
+        ),
+        "unassigned": "t.assignee_user_id IS NULL",
+        "no_due": "t.due_date IS NULL",
+        "overdue_open": "t.due_date IS NOT NULL AND t.due_date < date('now') AND t.completed = 0",
+    },
+}
+
+
+def foreign_keys(db_path: str, tables: list[str] = TABLES) -> dict[str, list[ForeignKey]]:
+    conn = connect_readonly(db_path)
     try:
-        counts = _table_counts(conn)
-
-        results: list[CheckResult] = []
-
-        # Relational integrity quick probes.
-        bad_task_section = int(
-            _q(
-                conn,
-                """
-                SELECT COUNT(*)
-                FROM tasks t
-                LEFT JOIN sections s ON s.section_id = t.section_id
-                WHERE s.section_id IS NULL
-                """,
-            )
-        )
-        results.append(
-            CheckResult(
-                name="tasks_have_valid_sections",
-                ok=bad_task_section == 0,
-                details={"invalid_task_section_rows": bad_task_section},
-            )
-        )
+        return read_foreign_keys(conn, tables)
+    finally:
+        conn.close()
+
 
-        bad_subtask_parent = int(
-            _q(
-                conn,
-                """
-                SELECT COUNT(*)
-                FROM subtasks st
-                LEFT JOIN tasks t ON t.task_id = st.parent_task_id
-                WHERE t.task_id IS NULL
-                """,
-            )
+def _scan_sql(table: str, fks: list[ForeignKey]) -> tuple[list[str], str, list[str]]:
+    """(prelude statements, scan query, aggregate names) for one table."""
+    aggs = dict(_AGGREGATES.get(table, {}))
+    prelude: list[str] = []
+    for fk in fks:
+        # Integrity: one indexed parent lookup per row and edge.
+        aggs[fk.key] = fk.orphan_condition()
+        prelude += fk.prelude()
+    names = ["rows", *aggs]
+    cols = ["COUNT(*)"] + [f"SUM(CASE WHEN {expr} THEN 1 ELSE 0 END)" for expr in aggs.values()]
+    return prelude, f"SELECT {', '.join(cols)} FROM {table} t", names
+
+
+def _scan(db_path: str, table: str, fks: list[ForeignKey]) -> dict[str, int]:
+    prelude, sql, names = _scan_sql(table, fks)
+    conn = connect_readonly(db_path)
+    try:
+        for stmt in prelude:
+            conn.execute(stmt)
+        row = conn.execute(sql).fetchone()
+    finally:
+        conn.close()
+    return {n: int(v or 0) for n, v in zip(names, row)}
+
+
+def scan_tables(
+    db_path: str,
+    tables: list[str] = TABLES,
+    workers: int = 0,
+    fks: dict[str, list[ForeignKey]] | None = None,
+) -> dict[str, dict[str, int]]:
+    """Fused aggregates per table: one pass over each table, tables scanned in parallel.
+
+    sqlite3 releases the GIL while stepping a statement, so threads over
+    separate read-only connections scan concurrently. FK edges come from
+    PRAGMA foreign_key_list unless given.
+    """
+    if not Path(db_path).exists():
+        raise FileNotFoundError(db_path)
+    if fks is None:
+        fks = foreign_keys(db_path, tables)
+    workers = workers or min(len(tables), os.cpu_count() or 1)
+    # Tables with more aggregates (the big ones) start first.
+    order = sorted(tables, key=lambda t: -(len(_AGGREGATES.get(t, {})) + len(fks.get(t, []))))
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="scan") as ex:
+        futures = {t: ex.submit(_scan, db_path, t, fks.get(t, [])) for t in order}
+        return {t: futures[t].result() for t in tables}
+
+
+def orphan_samples(db_path: str, fk: ForeignKey, limit: int = ORPHAN_SAMPLES) -> list[dict[str, Any]]:
+    """A few offending child rows (rowid and key columns) of one FK edge."""
+    conn = connect_readonly(db_path)
+    try:
+        for stmt in fk.prelude():
+            conn.execute(stmt)
+        cols = ", ".join(f"t.{c}" for c in fk.columns)
+        rows = conn.execute(
+            f"SELECT t.rowid, {cols} FROM {fk.table} t WHERE {fk.orphan_condition()} LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [{"rowid": r[0], **dict(zip(fk.columns, r[1:]))} for r in rows]
+
+
+def checks_from_stats(stats: dict[str, dict[str, int]]) -> list[CheckResult]:
+    """Evaluate every check from per-table aggregates shaped like `scan_tables` output."""
+    counts = {t: s["rows"] for t, s in stats.items()}
+    tasks = stats["tasks"]
+    results: list[CheckResult] = []
+
+    results.append(
+        CheckResult(
+            name="tasks_have_valid_sections",
+            ok=tasks["fk_section_id"] == 0,
+            details={"invalid_task_section_rows": tasks["fk_section_id"]},
         )
-        results.append(
-            CheckResult(
-                name="subtasks_have_valid_parent",
-                ok=bad_subtask_parent == 0,
-                details={"invalid_subtask_parent_rows": bad_subtask_parent},
-            )
+    )
+    results.append(
+        CheckResult(
+            name="subtasks_have_valid_parent",
+            ok=stats["subtasks"]["fk_parent_task_id"] == 0,
+            details={"invalid_subtask_parent_rows": stats["subtasks"]["fk_parent_task_id"]},
         )
+    )
 
-        # Temporal consistency: completed_at should be non-null iff completed=1.
-        completed_mismatch = int(
-            _q(
-                conn,
-                """
-                SELECT COUNT(*)
-                FROM tasks
-                WHERE (completed = 1 AND completed_at IS NULL)
-                   OR (completed = 0 AND completed_at IS NOT NULL)
-                """,
-            )
+    # Every declared FK edge, as counted by the table scans.
+    orphans = {f"{t}.{k[3:]}": n for t, s in stats.items() for k, n in s.items() if k.startswith("fk_")}
+    results.append(
+        CheckResult(
+            name="foreign_keys_have_no_orphans",
+            ok=not any(orphans.values()),
+            details={"edges_checked": len(orphans), "orphan_rows": {e: n for e, n in orphans.items() if n}},
         )
-        results.append(
-            CheckResult(
-                name="task_completed_fields_consistent",
-                ok=completed_mismatch == 0,
-                details={"mismatch_rows": completed_mismatch},
-            )
+    )
+    results.append(
+        CheckResult(
+            name="task_completed_fields_consistent",
+            ok=tasks["completed_mismatch"] == 0,
+            details={"mismatch_rows": tasks["completed_mismatch"]},
         )
+    )
 
-        # Distribution checks.
-        unassigned = int(_q(conn, "SELECT COUNT(*) FROM tasks WHERE assignee_user_id IS NULL"))
-        total_tasks = counts.get("tasks", 0) or 1
-        unassigned_pct = unassigned / total_tasks
-
-        results.append(
-            CheckResult(
-                name="unassigned_rate_reasonable",
-                ok=0.08 <= unassigned_pct <= 0.25,
-                details={"unassigned": unassigned, "total_tasks": total_tasks, "unassigned_pct": unassigned_pct},
-            )
+    # Distribution checks.
+    total_tasks = counts.get("tasks", 0) or 1
+    unassigned = tasks["unassigned"]
+    unassigned_pct = unassigned / total_tasks
+    results.append(
+        CheckResult(
+            name="unassigned_rate_reasonable",
+            ok=0.08 <= unassigned_pct <= 0.25,
+            details={"unassigned": unassigned, "total_tasks": total_tasks, "unassigned_pct": unassigned_pct},
         )
+    )
 
-        no_due = int(_q(conn, "SELECT COUNT(*) FROM tasks WHERE due_date IS NULL"))
-        no_due_pct = no_due / total_tasks
-        results.append(
-            CheckResult(
-                name="no_due_date_rate_reasonable",
-                ok=0.05 <= no_due_pct <= 0.25,
-                details={"no_due": no_due, "total_tasks": total_tasks, "no_due_pct": no_due_pct},
-            )
+    no_due = tasks["no_due"]
+    no_due_pct = no_due / total_tasks
+    results.append(
+        CheckResult(
+            name="no_due_date_rate_reasonable",
+            ok=0.05 <= no_due_pct <= 0.25,
+            details={"no_due": no_due, "total_tasks": total_tasks, "no_due_pct": no_due_pct},
         )
+    )
 
-        overdue = int(_q(conn, "SELECT COUNT(*) FROM tasks WHERE due_date IS NOT NULL AND due_date < date('now') AND completed = 0"))
-        overdue_pct = overdue / total_tasks
-        results.append(
-            CheckResult(
-                name="overdue_open_tasks_exist",
-                ok=overdue > 0,
-                details={"overdue_open": overdue, "overdue_open_pct": overdue_pct},
-            )
+    overdue = tasks["overdue_open"]
+    overdue_pct = overdue / total_tasks
+    results.append(
+        CheckResult(
+            name="overdue_open_tasks_exist",
+            ok=overdue > 0,
+            details={"overdue_open": overdue, "overdue_open_pct": overdue_pct},
         )
+    )
 
-        # Custom field value coverage.
-        cfv_total = counts.get("custom_field_values", 0) or 1
-        cfv_per_task = cfv_total / total_tasks
-        results.append(
-            CheckResult(
-                name="custom_fields_present",
-                ok=cfv_total > 0 and cfv_per_task >= 0.6,
-                details={"custom_field_values": cfv_total, "tasks": total_tasks, "cfv_per_task": cfv_per_task},
-            )
+    # Custom field value coverage.
+    cfv_total = counts.get("custom_field_values", 0) or 1
+    cfv_per_task = cfv_total / total_tasks
+    results.append(
+        CheckResult(
+            name="custom_fields_present",
+            ok=cfv_total > 0 and cfv_per_task >= 0.6,
+            details={"custom_field_values": cfv_total, "tasks": total_tasks, "cfv_per_task": cfv_per_task},
         )
+    )
 
-        # Comments density.
-        comments_total = counts.get("comments", 0) or 0
-        comments_per_task = comments_total / total_tasks
-        results.append(
-            CheckResult(
-                name="comments_density_reasonable",
-                ok=0.15 <= comments_per_task <= 1.5,
-                details={"comments": comments_total, "tasks": total_tasks, "comments_per_task": comments_per_task},
-            )
+    # Comments density.
+    comments_total = counts.get("comments", 0) or 0
+    comments_per_task = comments_total / total_tasks
+    results.append(
+        CheckResult(
+            name="comments_density_reasonable",
+            ok=0.15 <= comments_per_task <= 1.5,
+            details={"comments": comments_total, "tasks": total_tasks, "comments_per_task": comments_per_task},
         )
+    )
 
-        # Attachments density.
-        attachments_total = counts.get("attachments", 0) or 0
-        attachments_per_task = attachments_total / total_tasks
-        results.append(
-            CheckResult(
-                name="attachments_density_reasonable",
-                ok=0.01 <= attachments_per_task <= 0.20,
-                details={"attachments": attachments_total, "tasks": total_tasks, "attachments_per_task": attachments_per_task},
-            )
+    # Attachments density.
+    attachments_total = counts.get("attachments", 0) or 0
+    attachments_per_task = attachments_total / total_tasks
+    results.append(
+        CheckResult(
+            name="attachments_density_reasonable",
+            ok=0.01 <= attachments_per_task <= 0.20,
+            details={"attachments": attachments_total, "tasks": total_tasks, "attachments_per_task": attachments_per_task},
         )
+    )
+    return results
 
-        return {
-            "counts": counts,
-            "checks": [
-                {"name": r.name, "ok": r.ok, "details": r.details}
-                for r in results
-            ],
-        }
-    finally:
-        conn.close()
 
+def report_from_stats(stats: dict[str, dict[str, int]]) -> dict[str, Any]:
+    results = checks_from_stats(stats)
+    return {
+        "counts": {t: s["rows"] for t, s in stats.items()},
+        "checks": [
+            {"name": r.name, "ok": r.ok, "details": r.details}
+            for r in results
+        ],
+    }
 
-def main() -> None:
-    import os
 
-    db_path = os.getenv("DB_PATH", "output/asana_simulation.sqlite")
-    report = run_sanity_checks(db_path)
+def _scan_key(
+    table: str,
+    fks: list[ForeignKey],
+    fingerprints: dict[str, dict[str, Any]],
+    today: str,
+) -> str | None:
+    """Cache key of one table scan: its SQL plus the fingerprints of every table it reads."""
+    prelude, sql, _ = _scan_sql(table, fks)
+    reads = [table] + [fk.parent for fk in fks]
+    if any(t not in fingerprints for t in reads):
+        return None
+    inputs = {t: fingerprints[t] for t in reads}
+    if any(fp["content_crc"] is None for fp in inputs.values()):
+        return None
+    payload: dict[str, Any] = {"sql": prelude + [sql], "inputs": inputs}
+    if "'now'" in sql:
+        # date('now') results go stale at midnight (UTC, as in SQLite).
+        payload["today"] = today
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
 
+def run_sanity_checks(db_path: str, workers: int = 0, previous: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Scan every table once (see `scan_tables`) and derive all checks from the aggregates.
+
+    The report records per-table fingerprints (row count, max rowid, page
+    content CRC) and each scan's aggregates under a key derived from the
+    fingerprints of the tables it reads. Given the `previous` report, only
+    scans whose key changed are re-run. If the file itself is untouched
+    since (size, mtime, change counter), the previous fingerprints are
+    reused as well and nothing is read.
+    """
+    fks = foreign_keys(db_path)
+    file_fp = file_fingerprint(db_path)
+    prev_fp = (previous or {}).get("fingerprints") or {}
+    if file_fp is not None and prev_fp.get("file") == file_fp and prev_fp.get("tables"):
+        fingerprints = prev_fp["tables"]
+    else:
+        fingerprints = table_fingerprints(db_path, TABLES)
+
+    today = datetime.now(timezone.utc).date().isoformat()
+    prev_scans = (previous or {}).get("scans") or {}
+    stats: dict[str, dict[str, int]] = {}
+    keys: dict[str, str | None] = {}
+    todo: list[str] = []
+    for t in TABLES:
+        keys[t] = _scan_key(t, fks[t], fingerprints, today)
+        cached = prev_scans.get(t)
+        if keys[t] is not None and cached and cached.get("key") == keys[t]:
+            stats[t] = cached["stats"]
+        else:
+            todo.append(t)
+    if todo:
+        stats.update(scan_tables(db_path, todo, workers=workers, fks=fks))
+
+    report = report_from_stats({t: stats[t] for t in TABLES})
+    samples = {
+        fk.label: orphan_samples(db_path, fk) for t in TABLES for fk in fks[t] if stats[t].get(fk.key)
+    }
+    if samples:
+        report["orphan_samples"] = samples
+    report["fingerprints"] = {"file": file_fp, "tables": fingerprints}
+    report["scans"] = {t: {"key": keys[t], "stats": stats[t]} for t in TABLES}
+    report["rescanned"] = todo
+    return report
+
+
+def cross_check(online: dict[str, dict[str, int]], sql: dict[str, dict[str, int]]) -> list[str]:
+    """Differences between two `scan_tables`-shaped aggregates, e.g. online vs SQL."""
+    problems = []
+    for table, values in sql.items():
+        for name, expected in values.items():
+            got = online.get(table, {}).get(name)
+            if got != expected:
+                problems.append(f"{table}.{name}: online {got} != sql {expected}")
+    return problems
+
+
+def main() -> None:
+    db_path = os.getenv("DB_PATH", "output/asana_simulation.sqlite")
     out_dir = Path("output")
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / "sanity_report.json"
+
+    # SANITY_INCREMENTAL=0 ignores the previous report and scans everything.
+    previous = None
+    if os.getenv("SANITY_INCREMENTAL", "1") != "0" and out_path.exists():
+        try:
+            previous = json.loads(out_path.read_text(encoding="utf-8"))
+        except ValueError:
+            previous = None
+    report = run_sanity_checks(db_path, workers=int(os.getenv("SANITY_WORKERS", "0")), previous=previous)
     out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
 
     # Print a compact summary.
     ok = all(c["ok"] for c in report["checks"])
     print(f"Sanity report written to {out_path}")
+    print(f"Tables rescanned: {len(report['rescanned'])} of {len(TABLES)}")
     print(f"All checks OK: {ok}")
 
 
@@ -28,6 +28,7 @@ def _get_bool(name: str, default: bool) -> bool:
 @dataclass(frozen=True)
 class Config:
     seed: int
+    sim_now: str
     db_path: str
     history_days: int
 
@@ -41,13 +42,34 @@ class Config:
     groq_api_key: str
     groq_model: str
     groq_max_calls: int
+    llm_backend: str
+    llm_batch_size: int
+    llm_dedup: str
+    llm_variants: int
 
     enable_web_scrape: bool
 
+    stream_tasks: bool
+    task_batch_rows: int
+    task_workers: int
+    pipeline_workers: int
+    bulk_load: bool
+    in_memory: bool
+    writer_queue_batches: int
+    integer_keys: bool
+    task_engine: str
+    assignee_policy: str
+    run_report_path: str
+    profile_stages: str
+    isolate_stage: str
+    online_stats: bool
+    stats_cross_check: bool
+
 
 def load_config() -> Config:
     return Config(
         seed=_get_int("SEED", 1337),
+        sim_now=_get_str("SIM_NOW", ""),
         db_path=_get_str("DB_PATH", "output/asana_simulation.sqlite"),
         history_days=_get_int("HISTORY_DAYS", 180),
         target_users=_get_int("TARGET_USERS", 7000),
@@ -58,5 +80,24 @@ def load_config() -> Config:
         groq_api_key=_get_str("GROQ_API_KEY", ""),
         groq_model=_get_str("GROQ_MODEL", "llama-3.1-70b-versatile"),
         groq_max_calls=_get_int("GROQ_MAX_CALLS", 40),
+        llm_backend=_get_str("LLM_BACKEND", "groq"),
+        llm_batch_size=_get_int("LLM_BATCH_SIZE", 1),
+        llm_dedup=_get_str("LLM_DEDUP", "template"),
+        llm_variants=_get_int("LLM_VARIANTS", 1),
         enable_web_scrape=_get_bool("ENABLE_WEB_SCRAPE", False),
+        stream_tasks=_get_bool("STREAM_TASKS", False),
+        task_batch_rows=_get_int("TASK_BATCH_ROWS", 20000),
+        task_workers=_get_int("TASK_WORKERS", 0),
+        pipeline_workers=_get_int("PIPELINE_WORKERS", 4),
+        bulk_load=_get_bool("BULK_LOAD", False),
+        in_memory=_get_bool("IN_MEMORY", False),
+        writer_queue_batches=_get_int("WRITER_QUEUE_BATCHES", 8),
+        integer_keys=_get_bool("INTEGER_KEYS", False),
+        task_engine=_get_str("TASK_ENGINE", "scalar"),
+        assignee_policy=_get_str("ASSIGNEE_POLICY", "power_of_3"),
+        run_report_path=_get_str("RUN_REPORT_PATH", "output/run_report.json"),
+        profile_stages=_get_str("PROFILE_STAGES", ""),
+        isolate_stage=_get_str("ISOLATE_STAGE", ""),
+        online_stats=_get_bool("ONLINE_STATS", False),
+        stats_cross_check=_get_bool("STATS_CROSS_CHECK", False),
     )
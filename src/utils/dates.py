@@ -2,9 +2,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
 import math
 import random
 
+import numpy as np
+
+from utils.randomness import WeightedSampler
+
 
 UTC = timezone.utc
 
@@ -15,8 +20,25 @@ class TimeWindow:
     end: datetime
 
 
+_pinned_now: datetime | None = None
+
+
+def pin_now(dt: datetime | None = None) -> datetime:
+    """Freeze now_utc() for the rest of the run (default: the current time).
+
+    Every generator derives its history window from now_utc(); pinning it once
+    keeps the windows consistent and, with SIM_NOW, makes runs reproducible.
+    """
+    global _pinned_now
+    dt = dt or datetime.now(tz=UTC)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    _pinned_now = dt.astimezone(UTC)
+    return _pinned_now
+
+
 def now_utc() -> datetime:
-    return datetime.now(tz=UTC)
+    return _pinned_now or datetime.now(tz=UTC)
 
 
 def window_last_days(days: int, end: datetime | None = None) -> TimeWindow:
@@ -30,26 +52,72 @@ def random_datetime(rng: random.Random, tw: TimeWindow) -> datetime:
     return tw.start + timedelta(seconds=t)
 
 
+# Creation is biased toward Mon-Wed (weight by weekday, 0=Mon) and working hours.
+_WEEKDAY_WEIGHT = (0.75, 0.75, 0.75, 0.55, 0.45, 0.15, 0.15)
+_WORK_HOURS = range(8, 20)
+_SECONDS_PER_HOUR = 3600
+_SECONDS_PER_DAY = 86400
+
+
+class WorkdaySampler:
+    """Constant-time workday timestamps for one TimeWindow.
+
+    The window is cut at UTC hour boundaries; each bucket is weighted by its
+    length, its weekday weight and whether it falls in working hours. A draw
+    picks a bucket from an alias table, then a uniform offset inside it.
+    """
+
+    __slots__ = ("tw", "_offsets", "_lengths", "_buckets", "_arrays")
+
+    def __init__(self, tw: TimeWindow) -> None:
+        start, end = tw.start.timestamp(), tw.end.timestamp()
+        edges = [start]
+        t = (math.floor(start / _SECONDS_PER_HOUR) + 1) * _SECONDS_PER_HOUR
+        while t < end:
+            edges.append(float(t))
+            t += _SECONDS_PER_HOUR
+        edges.append(max(start, end))
+
+        offsets: list[float] = []
+        lengths: list[float] = []
+        weights: list[float] = []
+        for a, b in zip(edges, edges[1:]):
+            secs = math.floor(a)
+            hour = secs // _SECONDS_PER_HOUR % 24
+            weekday = (secs // _SECONDS_PER_DAY + 3) % 7  # 1970-01-01 was a Thursday
+            offsets.append(a - start)
+            lengths.append(b - a)
+            weights.append((b - a) * _WEEKDAY_WEIGHT[weekday] if hour in _WORK_HOURS else 0.0)
+        if not any(weights):
+            # No working hours in the window: fall back to uniform.
+            weights = lengths if any(lengths) else [1.0] * len(lengths)
+
+        self.tw = tw
+        self._offsets = offsets
+        self._lengths = lengths
+        self._buckets = WeightedSampler(range(len(weights)), weights)
+        self._arrays = None
+
+    def sample(self, rng: random.Random) -> datetime:
+        b = self._buckets.sample_index(rng)
+        return self.tw.start + timedelta(seconds=self._offsets[b] + rng.random() * self._lengths[b])
+
+    def sample_epochs(self, gen: np.random.Generator, n: int) -> np.ndarray:
+        """Batched `sample`: n float epoch seconds (UTC)."""
+        if self._arrays is None:
+            self._arrays = (np.asarray(self._offsets), np.asarray(self._lengths))
+        offsets, lengths = self._arrays
+        b = self._buckets.sample_indices(gen, n)
+        return self.tw.start.timestamp() + offsets[b] + gen.random(n) * lengths[b]
+
+
+@lru_cache(maxsize=32)
+def workday_sampler(tw: TimeWindow) -> WorkdaySampler:
+    return WorkdaySampler(tw)
+
+
 def random_workday_datetime(rng: random.Random, tw: TimeWindow) -> datetime:
-    # Bias creation toward Mon-Wed and working hours.
-    for _ in range(40):
-        dt = random_datetime(rng, tw)
-        weekday = dt.weekday()  # 0=Mon
-        if weekday <= 2:
-            p = 0.75
-        elif weekday == 3:
-            p = 0.55
-        elif weekday == 4:
-            p = 0.45
-        else:
-            p = 0.15
-        if rng.random() > p:
-            continue
-
-        hour = dt.hour
-        if 8 <= hour <= 19:
-            return dt
-    return random_datetime(rng, tw)
+    return workday_sampler(tw).sample(rng)
 
 
 def iso(dt: datetime | date | None) -> str | None:
@@ -123,3 +191,73 @@ def updated_timestamp(rng: random.Random, created_at: datetime, tw: TimeWindow)
     hours = max(0.1, rng.lognormvariate(2.2, 0.9))
     dt = created_at + timedelta(hours=hours)
     return clamp_dt(dt, tw)
+
+
+# --- Batched counterparts (NumPy) -------------------------------------------
+# Same distributions as the scalar helpers above, over arrays. Instants are
+# float epoch seconds (UTC); calendar dates are int days since 1970-01-01.
+
+def weekday_of_days(days: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday.
+    return (days + 3) % 7
+
+
+def epoch_days(epochs: np.ndarray) -> np.ndarray:
+    return np.floor_divide(epochs, _SECONDS_PER_DAY).astype(np.int64)
+
+
+def random_workday_epochs(gen: np.random.Generator, tw: TimeWindow, n: int) -> np.ndarray:
+    return workday_sampler(tw).sample_epochs(gen, n)
+
+
+def clamp_epochs(epochs: np.ndarray, tw: TimeWindow) -> np.ndarray:
+    return np.clip(epochs, tw.start.timestamp(), tw.end.timestamp())
+
+
+def adjust_to_weekday_days(gen: np.random.Generator, days: np.ndarray, prefer_weekday_prob: float = 0.85) -> np.ndarray:
+    wd = weekday_of_days(days)
+    move = (wd >= 5) & (gen.random(len(days)) <= prefer_weekday_prob)
+    return days + np.where(move, np.where(wd == 5, 2, 1), 0)
+
+
+def due_date_days(
+    gen: np.random.Generator,
+    created_days: np.ndarray,
+    horizon_days: int = 120,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Batched due_date_distribution: returns (has_due, due_days)."""
+    n = len(created_days)
+    has_due = gen.random(n) >= 0.10
+    overdue = gen.random(n) < 0.05
+
+    overdue_days = np.minimum(np.maximum(1, gen.lognormal(1.2, 0.6, n).astype(np.int64)), 30)
+
+    r = gen.random(n)
+    offset = np.select(
+        [r < 0.25, r < 0.65, r < 0.85],
+        [gen.integers(1, 8, n), gen.integers(8, 31, n), gen.integers(31, 91, n)],
+        gen.integers(91, horizon_days + 1, n),
+    )
+    due = np.where(overdue, created_days - overdue_days, created_days + offset)
+    return has_due, due
+
+
+def completion_epochs(gen: np.random.Generator, created: np.ndarray, tw: TimeWindow) -> np.ndarray:
+    days = np.maximum(0.15, gen.lognormal(1.35, 0.75, len(created)))
+    return clamp_epochs(created + days * _SECONDS_PER_DAY, tw)
+
+
+def updated_epochs(gen: np.random.Generator, created: np.ndarray, tw: TimeWindow) -> np.ndarray:
+    hours = np.maximum(0.1, gen.lognormal(2.2, 0.9, len(created)))
+    return clamp_epochs(created + hours * 3600, tw)
+
+
+def iso_epochs(epochs: np.ndarray) -> list[str]:
+    # Matches iso(): whole seconds, explicit UTC offset.
+    text = np.datetime_as_string(np.floor(epochs).astype("datetime64[s]"), unit="s")
+    return [t + "+00:00" for t in text.tolist()]
+
+
+def iso_days(days: np.ndarray, present: np.ndarray) -> list[str | None]:
+    text = np.datetime_as_string(days.astype("datetime64[D]")).tolist()
+    return [t if ok else None for t, ok in zip(text, present.tolist())]
@@ -1,55 +1,383 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import queue
 import sqlite3
-from typing import Iterable, Sequence
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Sequence
 
+from utils.instrument import current_stage
 
-def connect(db_path: str) -> sqlite3.Connection:
+
+def connect(db_path: str, bulk_load: bool = False) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
+    if bulk_load:
+        # Load-time settings: no rollback journal, no fsync, no FK or CHECK
+        # enforcement. `finish_bulk_load` validates everything once at the end.
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("PRAGMA ignore_check_constraints = ON")
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")  # 256 MiB
+        return conn
     conn.execute("PRAGMA foreign_keys = ON")
     conn.execute("PRAGMA journal_mode = WAL")
     conn.execute("PRAGMA synchronous = NORMAL")
     return conn
 
 
+def connect_readonly(db_path: str) -> sqlite3.Connection:
+    # Read-only URI connection: never takes a write lock or creates a journal,
+    # so any number can scan the file concurrently.
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
 def execute_script(conn: sqlite3.Connection, sql: str) -> None:
     conn.executescript(sql)
 
 
-def bulk_insert(
-    conn: sqlite3.Connection,
+def split_schema(sql: str) -> tuple[str, str]:
+    """Split a schema script into (tables, indexes); PRAGMA lines are dropped.
+
+    Pragmas are left to `connect`, which sets them per load mode.
+    """
+    tables: list[str] = []
+    indexes: list[str] = []
+    for stmt in sql.split(";"):
+        stmt = stmt.strip()
+        if not stmt:
+            continue
+        head = " ".join(stmt.split()[:3]).upper()
+        if head.startswith("PRAGMA"):
+            continue
+        if head.startswith("CREATE INDEX") or head.startswith("CREATE UNIQUE INDEX"):
+            indexes.append(stmt + ";")
+        else:
+            tables.append(stmt + ";")
+    return "\n\n".join(tables), "\n".join(indexes)
+
+
+def finish_bulk_load(conn: sqlite3.Connection, index_sql: str) -> None:
+    """Build deferred indexes, validate constraints once and restore normal pragmas.
+
+    Raises RuntimeError if any FK or CHECK/NOT NULL violation is found; a
+    duplicate under a UNIQUE index surfaces as sqlite3.IntegrityError.
+    """
+    conn.commit()
+    conn.executescript(index_sql)
+
+    fk_violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+    if fk_violations:
+        by_edge: dict[str, int] = {}
+        for table, _rowid, parent, _fkid in fk_violations:
+            key = f"{table}->{parent}"
+            by_edge[key] = by_edge.get(key, 0) + 1
+        raise RuntimeError(f"foreign_key_check found {len(fk_violations)} violations: {by_edge}")
+
+    conn.execute("PRAGMA ignore_check_constraints = OFF")
+    problems = [r[0] for r in conn.execute("PRAGMA quick_check").fetchall()]
+    if problems != ["ok"]:
+        raise RuntimeError(f"quick_check failed: {problems[:10]}")
+
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA locking_mode = NORMAL")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def _checkpoint(path: Path) -> None:
+    """Copy every WAL frame of `path` into the database file and empty the WAL."""
+    old = sqlite3.connect(str(path))
+    try:
+        busy, _log, _done = old.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        old.close()
+    if busy:
+        raise RuntimeError(f"Cannot replace {path}: another connection keeps its WAL from being checkpointed")
+
+
+def persist(conn: sqlite3.Connection, db_path: str) -> None:
+    """Copy `conn` (typically ":memory:") to `db_path` with one backup call, swapping the file atomically.
+
+    The copy is written and fsynced next to the target, then renamed over
+    it, so a crash at any point leaves either the old file or the new one.
+    """
+    conn.commit()
+    path = Path(db_path)
+    tmp = path.with_name(path.name + ".tmp")
+    for stale in (tmp, Path(f"{tmp}-journal"), Path(f"{tmp}-wal")):
+        stale.unlink(missing_ok=True)
+
+    dst = sqlite3.connect(str(tmp))
+    try:
+        conn.backup(dst)
+        # The copy keeps the source's journal mode; files are WAL like `connect` makes them.
+        dst.execute("PRAGMA journal_mode = WAL")
+    finally:
+        dst.close()
+    fd = os.open(tmp, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    # A leftover WAL of the old file would be replayed onto the new one, but
+    # deleting it would drop the old file's uncheckpointed frames; fold them
+    # into the old file first so it stays whole until the rename.
+    if path.exists():
+        _checkpoint(path)
+    for stale in (Path(f"{path}-wal"), Path(f"{path}-shm")):
+        stale.unlink(missing_ok=True)
+    os.replace(tmp, path)
+    fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@dataclass(frozen=True)
+class _Write:
+    table: str
+    sql: str
+    batch: list[Sequence[object]]
+    # Stage that produced the batch, for the run report.
+    stage: str | None = None
+    # Insert column names, when known (bulk_insert), for the observer.
+    columns: Sequence[str] | None = None
+
+
+_KINDS = {"INSERT": "inserted", "UPDATE": "updated", "DELETE": "deleted"}
+
+
+@dataclass(frozen=True)
+class _Call:
+    fn: Callable[[sqlite3.Connection], Any]
+    future: Future
+
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """A thread that owns the SQLite connection and applies queued batches in FIFO order.
+
+    `observer(table, columns, batch)` is called on this thread after each inserted batch.
+    """
+
+    def __init__(
+        self,
+        open_conn: Callable[[], sqlite3.Connection],
+        maxsize: int = 8,
+        observer: Callable[[str, Sequence[str] | None, list[Sequence[object]]], None] | None = None,
+    ) -> None:
+        self._observer = observer
+        self._q: queue.Queue = queue.Queue(maxsize)
+        self._error: BaseException | None = None
+        self._opened: Future = Future()
+        self._rows: dict[tuple[str | None, str, str], int] = {}
+        self._write_seconds: dict[str, float] = {}
+        self._thread = threading.Thread(target=self._run, args=(open_conn,), name="sqlite-writer", daemon=True)
+        self._thread.start()
+        # Surface connect() failures to the caller right away.
+        self._opened.result()
+
+    def _run(self, open_conn: Callable[[], sqlite3.Connection]) -> None:
+        try:
+            conn = open_conn()
+        except BaseException as e:
+            self._opened.set_exception(e)
+            return
+        self._opened.set_result(None)
+        try:
+            while True:
+                item = self._q.get()
+                if item is _STOP:
+                    return
+                if isinstance(item, _Call):
+                    if self._error is not None:
+                        item.future.set_exception(self._failure())
+                        continue
+                    try:
+                        item.future.set_result(item.fn(conn))
+                    except BaseException as e:
+                        item.future.set_exception(e)
+                elif self._error is None:
+                    # Keep draining after a failure so blocked producers wake up.
+                    t0 = time.perf_counter()
+                    try:
+                        conn.executemany(item.sql, item.batch)
+                    except BaseException as e:
+                        self._error = e
+                        continue
+                    self._tally(item, time.perf_counter() - t0)
+                    if self._observer is not None and item.sql.startswith("INSERT"):
+                        try:
+                            self._observer(item.table, item.columns, item.batch)
+                        except BaseException as e:
+                            self._error = e
+        finally:
+            conn.close()
+
+    def _tally(self, item: _Write, seconds: float) -> None:
+        kind = _KINDS.get(item.sql.split(None, 1)[0].upper(), "written")
+        key = (item.stage, item.table, kind)
+        self._rows[key] = self._rows.get(key, 0) + len(item.batch)
+        self._write_seconds[item.table] = self._write_seconds.get(item.table, 0.0) + seconds
+
+    def _failure(self) -> RuntimeError:
+        err = RuntimeError("SQLite writer failed")
+        err.__cause__ = self._error
+        return err
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise self._failure()
+
+    def put(
+        self,
+        table: str,
+        sql: str,
+        batch: list[Sequence[object]],
+        columns: Sequence[str] | None = None,
+    ) -> None:
+        self._check()
+        self._q.put(_Write(table, sql, batch, current_stage(), columns))
+
+    def call(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run `fn(conn)` on the writer thread after all queued writes; return its result."""
+        self._check()
+        fut: Future = Future()
+        self._q.put(_Call(fn, fut))
+        return fut.result()
+
+    def write_stats(self) -> dict[str, Any]:
+        """Rows written per stage and per table, after all queued writes.
+
+        {"rows": {(stage, table, kind): n},
+         "tables": {table: {"inserted": n, "updated": n, ..., "write_seconds": s}}}
+        """
+
+        def snapshot(_conn) -> dict[str, Any]:
+            tables: dict[str, dict[str, float]] = {}
+            for (_stage, table, kind), n in self._rows.items():
+                t = tables.setdefault(table, {})
+                t[kind] = t.get(kind, 0) + n
+            for table, seconds in self._write_seconds.items():
+                tables.setdefault(table, {})["write_seconds"] = round(seconds, 4)
+            return {"rows": dict(self._rows), "tables": dict(sorted(tables.items()))}
+
+        # Runs on the writer thread, so the tallies are not read mid-update.
+        return self.call(snapshot)
+
+    def close(self) -> None:
+        """Drain the queue, close the connection and re-raise any write failure."""
+        self._q.put(_STOP)
+        self._thread.join()
+        self._check()
+
+
+def _insert_sql(table: str, columns: Sequence[str]) -> str:
+    cols = ",".join(columns)
+    placeholders = ",".join(["?"] * len(columns))
+    return f"INSERT INTO {table} ({cols}) VALUES ({placeholders})"
+
+
+def _table_of(sql: str) -> str:
+    # "UPDATE users SET ..." -> "users"
+    return sql.split()[1]
+
+
+def _execute_chunks(
+    conn,
     table: str,
-    columns: Sequence[str],
+    sql: str,
     rows: Iterable[Sequence[object]],
-    chunk_size: int = 5000,
+    chunk_size: int,
+    columns: Sequence[str] | None = None,
 ) -> None:
-    cols = ",".join(columns)
-    placeholders = ",".join(["?"] * len(columns))
-    sql = f"INSERT INTO {table} ({cols}) VALUES ({placeholders})"
+    if isinstance(conn, BackgroundWriter):
+        send = lambda b: conn.put(table, sql, b, columns)  # noqa: E731
+    else:
+        cur = conn.cursor()
+        send = lambda b: cur.executemany(sql, b)  # noqa: E731
 
     buf: list[Sequence[object]] = []
-    cur = conn.cursor()
     for r in rows:
         buf.append(r)
         if len(buf) >= chunk_size:
-            cur.executemany(sql, buf)
-            buf.clear()
+            send(buf)
+            buf = []
     if buf:
-        cur.executemany(sql, buf)
+        send(buf)
+
+
+def bulk_insert(
+    conn: sqlite3.Connection | BackgroundWriter,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[object]],
+    chunk_size: int = 5000,
+) -> None:
+    _execute_chunks(conn, table, _insert_sql(table, columns), rows, chunk_size, columns)
 
 
 def bulk_update(
-    conn: sqlite3.Connection,
+    conn: sqlite3.Connection | BackgroundWriter,
     sql: str,
     rows: Iterable[Sequence[object]],
     chunk_size: int = 5000,
 ) -> None:
-    buf: list[Sequence[object]] = []
-    cur = conn.cursor()
-    for r in rows:
-        buf.append(r)
-        if len(buf) >= chunk_size:
-            cur.executemany(sql, buf)
-            buf.clear()
-    if buf:
-        cur.executemany(sql, buf)
+    _execute_chunks(conn, _table_of(sql), sql, rows, chunk_size)
+
+
+def query(conn: sqlite3.Connection | BackgroundWriter, sql: str, params: Sequence[object] = ()) -> list[tuple]:
+    if isinstance(conn, BackgroundWriter):
+        return conn.call(lambda c: c.execute(sql, params).fetchall())
+    return conn.execute(sql, params).fetchall()
+
+
+def db_info(conn: sqlite3.Connection) -> dict[str, int]:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {"page_size": page_size, "page_count": page_count, "freelist_count": freelist, "bytes": page_size * page_count}
+
+
+def iter_pages(
+    conn: sqlite3.Connection | BackgroundWriter,
+    table: str,
+    columns: Sequence[str],
+    chunk_size: int = 10000,
+) -> Iterator[list[tuple]]:
+    """Rows of `table` in insertion order, `chunk_size` at a time.
+
+    Keyset pagination on rowid: no cursor is held open across interleaved
+    writes on the same connection, and rows may be updated between pages.
+    """
+    sql = f"SELECT rowid, {', '.join(columns)} FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?"
+    last = 0
+    while True:
+        rows = query(conn, sql, (last, chunk_size))
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield [r[1:] for r in rows]
+
+
+def iter_column(
+    conn: sqlite3.Connection | BackgroundWriter,
+    table: str,
+    column: str,
+    chunk_size: int = 10000,
+) -> Iterator[object]:
+    for page in iter_pages(conn, table, (column,), chunk_size):
+        for (v,) in page:
+            yield v
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections import defaultdict
+import mmap
+import os
+from pathlib import Path
+import sqlite3
+from typing import Any, Sequence
+import zlib
+
+from utils.db import connect_readonly
+
+
+def file_fingerprint(db_path: str) -> dict[str, Any] | None:
+    """Size, mtime and the header's file change counter; None while a WAL holds unmerged frames.
+
+    Equal fingerprints mean no transaction has touched the file since.
+    """
+    path = Path(db_path)
+    wal = Path(str(path) + "-wal")
+    if wal.exists() and wal.stat().st_size > 0:
+        return None
+    st = path.stat()
+    with path.open("rb") as f:
+        header = f.read(100)
+    return {
+        "path": str(path.resolve()),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "change_counter": int.from_bytes(header[24:28], "big"),
+    }
+
+
+def _table_pages(conn: sqlite3.Connection, tables: Sequence[str]) -> dict[str, list[int]] | None:
+    # The dbstat virtual table lists every page of every b-tree; it is an
+    # optional SQLite build feature.
+    try:
+        rows = conn.execute("SELECT name, pageno FROM dbstat ORDER BY name, pageno").fetchall()
+    except sqlite3.OperationalError:
+        return None
+    wanted = set(tables)
+    pages: dict[str, list[int]] = defaultdict(list)
+    for name, pageno in rows:
+        if name in wanted:
+            pages[name].append(pageno)
+    return pages
+
+
+def table_fingerprints(db_path: str, tables: Sequence[str]) -> dict[str, dict[str, Any]]:
+    """Row count, max rowid and a content hash per table.
+
+    The content hash is a CRC32 chained page by page over the raw bytes of
+    the table's b-tree pages, read straight from the file: no row decoding,
+    so it costs far less than a query that evaluates every row. It is None
+    when dbstat is unavailable or a WAL file holds changes not yet in the
+    main file.
+    """
+    conn = connect_readonly(db_path)
+    try:
+        out = {
+            t: {
+                "rows": conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0],
+                "max_rowid": conn.execute(f"SELECT MAX(rowid) FROM {t}").fetchone()[0],
+                "content_crc": None,
+            }
+            for t in tables
+        }
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = _table_pages(conn, tables) if file_fingerprint(db_path) is not None else None
+    finally:
+        conn.close()
+    if pages is None or os.path.getsize(db_path) == 0:
+        return out
+
+    with open(db_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        view = memoryview(m)
+        try:
+            for t in tables:
+                crc = 0
+                numbers = pages.get(t, [])
+                for p in numbers:
+                    off = (p - 1) * page_size
+                    crc = zlib.crc32(view[off : off + page_size], crc)
+                out[t]["content_crc"] = f"{crc:08x}:{len(numbers)}"
+        finally:
+            view.release()
+    return out
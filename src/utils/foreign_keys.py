@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import sqlite3
+from typing import Sequence
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    """One FK edge from PRAGMA foreign_key_list, with its parent key resolved."""
+
+    table: str
+    columns: tuple[str, ...]
+    parent: str
+    parent_columns: tuple[str, ...]
+    # False when no index or rowid alias covers the parent key; the probe
+    # then goes through a temporary indexed copy of the parent keys.
+    parent_indexed: bool = True
+
+    @property
+    def key(self) -> str:
+        # Aggregate name in the table scan, e.g. "fk_section_id".
+        return "fk_" + "_".join(self.columns)
+
+    @property
+    def label(self) -> str:
+        return f"{self.table}({', '.join(self.columns)}) -> {self.parent}({', '.join(self.parent_columns)})"
+
+    @property
+    def _temp_keys(self) -> str:
+        return f"fk_keys_{self.parent}_{'_'.join(self.parent_columns)}"
+
+    def prelude(self) -> list[str]:
+        """Statements to run on the scanning connection before `orphan_condition`."""
+        if self.parent_indexed:
+            return []
+        cols = ", ".join(f"{c} AS k{i}" for i, c in enumerate(self.parent_columns))
+        keys = ", ".join(f"k{i}" for i in range(len(self.parent_columns)))
+        return [
+            f"CREATE TEMP TABLE IF NOT EXISTS {self._temp_keys} AS SELECT DISTINCT {cols} FROM {self.parent}",
+            f"CREATE INDEX IF NOT EXISTS temp.{self._temp_keys}_idx ON {self._temp_keys}({keys})",
+        ]
+
+    def orphan_condition(self, alias: str = "t") -> str:
+        """True for child rows whose (non-NULL) key has no parent row, as SQLite enforces FKs."""
+        not_null = " AND ".join(f"{alias}.{c} IS NOT NULL" for c in self.columns)
+        if self.parent_indexed:
+            target = self.parent
+            pairs = zip(self.parent_columns, self.columns)
+        else:
+            target = self._temp_keys
+            pairs = ((f"k{i}", c) for i, c in enumerate(self.columns))
+        match = " AND ".join(f"p.{pc} = {alias}.{c}" for pc, c in pairs)
+        return f"{not_null} AND NOT EXISTS (SELECT 1 FROM {target} p WHERE {match})"
+
+
+def _primary_key(conn: sqlite3.Connection, table: str) -> tuple[str, ...]:
+    cols = [(pk, name) for _cid, name, _type, _nn, _dflt, pk in conn.execute(f"PRAGMA table_info({table})") if pk]
+    return tuple(name for _pk, name in sorted(cols))
+
+
+def _indexed(conn: sqlite3.Connection, table: str, columns: tuple[str, ...]) -> bool:
+    # An INTEGER PRIMARY KEY is the rowid itself.
+    if len(columns) == 1:
+        for _cid, name, type_, _nn, _dflt, pk in conn.execute(f"PRAGMA table_info({table})"):
+            if name == columns[0] and pk == 1 and type_.upper() == "INTEGER":
+                return True
+    for _seq, index, *_rest in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        leading = [name for _n, _cid, name in conn.execute(f"PRAGMA index_info({index})").fetchall()]
+        if set(leading[: len(columns)]) == set(columns):
+            return True
+    return False
+
+
+def read_foreign_keys(conn: sqlite3.Connection, tables: Sequence[str]) -> dict[str, list[ForeignKey]]:
+    """FK edges declared on each table, in declaration order."""
+    out: dict[str, list[ForeignKey]] = {}
+    for table in tables:
+        by_id: dict[int, list[tuple]] = {}
+        for row in conn.execute(f"PRAGMA foreign_key_list({table})").fetchall():
+            by_id.setdefault(row[0], []).append(row)
+        fks = []
+        for rows in by_id.values():
+            rows.sort(key=lambda r: r[1])
+            parent = rows[0][2]
+            columns = tuple(r[3] for r in rows)
+            # A NULL "to" column means the parent's primary key.
+            parent_columns = tuple(r[4] for r in rows) if rows[0][4] else _primary_key(conn, parent)
+            fks.append(ForeignKey(table, columns, parent, parent_columns, _indexed(conn, parent, parent_columns)))
+        # PRAGMA foreign_key_list lists constraints last-declared first.
+        out[table] = fks[::-1]
+    return out
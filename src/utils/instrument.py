@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import cProfile
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_local = threading.local()
+# One cProfile.Profile may be enabled at a time: from Python 3.12 it hooks
+# the process-wide sys.monitoring, and a second enable() raises.
+_profile_lock = threading.Lock()
+
+
+def current_stage() -> str | None:
+    """Name of the stage running on this thread (set by `Instrument.wrap`)."""
+    return getattr(_local, "stage", None)
+
+
+def _max_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux: the process high-water mark so far.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def add_worker_cpu(seconds: float) -> None:
+    """Credit CPU spent in worker processes to the stage running on this thread."""
+    _local.worker_cpu = getattr(_local, "worker_cpu", 0.0) + seconds
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    cpu_seconds: float = 0.0
+    # CPU the stage's worker processes report back (TASK_WORKERS > 1).
+    worker_cpu_seconds: float = 0.0
+    # How far the process RSS high-water mark rose while the stage ran; 0
+    # once an earlier stage set a higher peak. Overlapping stages share it.
+    max_rss_growth_mb: float | None = None
+    db_pages: int | None = None
+    profile: str | None = None
+
+
+@dataclass
+class Instrument:
+    """Per-stage measurements for the run report.
+
+    `wrap` runs a stage function with its name bound to the thread (so the
+    BackgroundWriter can attribute rows to it), measures thread CPU time
+    and how much it raised the process RSS high-water mark, optionally
+    profiles it with cProfile (one profiled stage at a time), and records the database page count once the
+    stage's writes have been applied.
+    """
+
+    page_count: Callable[[], int] | None = None
+    profile_stages: frozenset[str] = frozenset()
+    profile_dir: Path = Path("output/profiles")
+    stages: dict[str, StageMetrics] = field(default_factory=dict)
+
+    def _profiled(self, name: str) -> bool:
+        return name in self.profile_stages or "all" in self.profile_stages
+
+    def wrap(self, name: str, fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        def run(inputs: Any) -> Any:
+            m = StageMetrics(name)
+            prof = cProfile.Profile() if self._profiled(name) else None
+            if prof is not None:
+                _profile_lock.acquire()
+            _local.stage, _local.worker_cpu = name, 0.0
+            cpu0, rss0 = time.thread_time(), _max_rss_mb()
+            try:
+                if prof is not None:
+                    prof.enable()
+                try:
+                    result = fn(inputs)
+                finally:
+                    if prof is not None:
+                        prof.disable()
+            finally:
+                _local.stage = None
+                if prof is not None:
+                    _profile_lock.release()
+            m.cpu_seconds = time.thread_time() - cpu0
+            m.worker_cpu_seconds = _local.worker_cpu
+            rss1 = _max_rss_mb()
+            if rss0 is not None and rss1 is not None:
+                m.max_rss_growth_mb = rss1 - rss0
+            if self.page_count is not None:
+                m.db_pages = self.page_count()
+            if prof is not None:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                path = self.profile_dir / f"{name}.prof"
+                prof.dump_stats(str(path))
+                m.profile = str(path)
+            self.stages[name] = m
+            return result
+
+        return run
+
+
+def parse_profile_stages(value: str) -> frozenset[str]:
+    # PROFILE_STAGES: "" (off), "all", or a comma-separated list of stage names.
+    return frozenset(s.strip() for s in value.split(",") if s.strip())
+
+
+def build_run_report(
+    inst: Instrument,
+    stage_report,
+    write_stats: dict[str, Any],
+    db_info: dict[str, Any],
+    extra: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Combine stage timings, instrument metrics and writer tallies into one JSON-able dict."""
+    # stage -> kind -> table -> rows
+    rows_by_stage: dict[str | None, dict[str, dict[str, int]]] = {}
+    for (stage, table, kind), n in write_stats["rows"].items():
+        rows_by_stage.setdefault(stage, {}).setdefault(kind, {})[table] = n
+
+    stages = []
+    for t in sorted(stage_report.timings.values(), key=lambda t: t.start):
+        m = inst.stages.get(t.name, StageMetrics(t.name))
+        written = rows_by_stage.get(t.name, {})
+        rows = written.get("inserted", {})
+        total = sum(rows.values())
+        stages.append(
+            {
+                "name": t.name,
+                "start_seconds": round(t.start, 4),
+                "wall_seconds": round(t.seconds, 4),
+                "cpu_seconds": round(m.cpu_seconds, 4),
+                "worker_cpu_seconds": round(m.worker_cpu_seconds, 4),
+                "rows": rows,
+                "rows_updated": written.get("updated", {}),
+                "rows_per_second": round(total / t.seconds, 1) if t.seconds > 0 else None,
+                "max_rss_growth_mb": round(m.max_rss_growth_mb, 1) if m.max_rss_growth_mb is not None else None,
+                "db_pages": m.db_pages,
+                "profile": m.profile,
+            }
+        )
+
+    peak = _max_rss_mb()
+    return {
+        "wall_seconds": round(stage_report.wall_seconds, 4),
+        "max_rss_mb": round(peak, 1) if peak is not None else None,
+        "critical_path": stage_report.critical_path,
+        "critical_path_seconds": round(stage_report.critical_path_seconds, 4),
+        "stages": stages,
+        "tables": write_stats["tables"],
+        "db": db_info,
+        **(extra or {}),
+    }
+
+
+def write_run_report(path: str, report: dict[str, Any]) -> Path:
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return out
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+  cache_key TEXT PRIMARY KEY,
+  text TEXT NOT NULL,
+  size_bytes INTEGER NOT NULL,
+  last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions(last_used);
+"""
+
+
+class LLMCache:
+    """Persistent, content-addressed LLM completion cache in a SQLite file.
+
+    Keys are the callers' request hashes (model, prompt and parameters);
+    values are completion texts. When the stored text exceeds `max_bytes`,
+    least-recently-used entries are evicted down to 90% of the limit.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM completions").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM completions WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE completions SET last_used = ? WHERE cache_key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        size = len(key) + len(text.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size_bytes FROM completions WHERE cache_key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (cache_key, text, size_bytes, last_used) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            self._size += size - (old[0] if old else 0)
+            if self._size > self._max_bytes:
+                self._evict(int(self._max_bytes * 0.9))
+
+    def _evict(self, target: int) -> None:
+        freed = 0
+        doomed: list[str] = []
+        rows = self._conn.execute("SELECT cache_key, size_bytes FROM completions ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if self._size - freed <= target:
+                break
+            doomed.append(key)
+            freed += size
+        self._conn.executemany("DELETE FROM completions WHERE cache_key = ?", [(k,) for k in doomed])
+        self._size -= freed
+        self.evictions += len(doomed)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "bytes": self._size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -3,52 +3,122 @@ from __future__ import annotations
 import hashlib
 import json
 import os
+import random
+import threading
+import time
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.llm_cache import LLMCache
+from utils.rate_limit import TokenBucket
+
+# Worth retrying: rate limiting and transient server-side failures.
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
 
 
 class GroqText:
-    def __init__(self, api_key: str, model: str, max_calls: int) -> None:
+    """Groq chat-completions client, safe to call from many threads.
+
+    Requests share one pooled HTTP session, are paced by a token bucket, and
+    are retried with exponentially growing, fully jittered backoff until
+    `deadline` seconds have passed since the call started.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_calls: int,
+        cache: LLMCache | None = None,
+        concurrency: int = 8,
+        rate_per_sec: float = 2.0,
+        max_retries: int = 4,
+        deadline: float = 60.0,
+    ) -> None:
         self._enabled = bool(api_key)
         self._api_key = api_key
         self._model = model
         self._remaining = max_calls
+        self._budget_lock = threading.Lock()
+        # Without a persistent cache, completions are only reused within the run.
         self._cache: dict[str, str] = {}
+        self._store = cache
+
+        self.concurrency = max(1, concurrency)
+        self._bucket = TokenBucket(rate_per_sec, capacity=self.concurrency)
+        self._max_retries = max_retries
+        self._deadline = deadline
+        self._jitter = random.Random()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
 
         # Groq provides an OpenAI-compatible API surface.
         self._base_url = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
 
     @property
     def enabled(self) -> bool:
-        return self._enabled and self._remaining > 0
+        # With a persistent cache, an exhausted budget still serves cached prompts.
+        return self._enabled and (self._remaining > 0 or self._store is not None)
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    @property
+    def cache(self) -> LLMCache | None:
+        return self._store
 
     def _key(self, payload: Any) -> str:
         b = json.dumps(payload, sort_keys=True).encode("utf-8")
         return hashlib.sha256(b).hexdigest()
 
-    def complete(self, system: str, user: str, temperature: float = 0.6, max_tokens: int = 600) -> str:
-        if not self.enabled:
-            raise RuntimeError("GroqText is disabled or exhausted")
-
-        payload = {
+    def _payload(self, system: str, user: str, temperature: float, max_tokens: int) -> dict[str, Any]:
+        return {
             "system": system,
             "user": user,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "model": self._model,
         }
-        k = self._key(payload)
-        if k in self._cache:
-            return self._cache[k]
 
-        self._remaining -= 1
+    def lookup(self, system: str, user: str, temperature: float = 0.6, max_tokens: int = 600) -> str | None:
+        """Cached completion for this request, if any; never calls the API."""
+        k = self._key(self._payload(system, user, temperature, max_tokens))
+        if self._store is not None:
+            return self._store.get(k)
+        return self._cache.get(k)
+
+    def _remember(self, k: str, text: str) -> None:
+        if self._store is not None:
+            self._store.put(k, text)
+        else:
+            self._cache[k] = text
+
+    def complete(self, system: str, user: str, temperature: float = 0.6, max_tokens: int = 600) -> str:
+        if not self._enabled:
+            raise RuntimeError("GroqText is disabled")
+
+        cached = self.lookup(system, user, temperature, max_tokens)
+        if cached is not None:
+            return cached
+        return self.fetch(system, user, temperature, max_tokens)
+
+    def fetch(self, system: str, user: str, temperature: float = 0.6, max_tokens: int = 600) -> str:
+        """Call the API (bypassing the cache lookup) and cache the result."""
+        if not self._enabled:
+            raise RuntimeError("GroqText is disabled")
+
+        # Only real API calls count against the budget.
+        with self._budget_lock:
+            if self._remaining <= 0:
+                raise RuntimeError("GroqText call budget exhausted")
+            self._remaining -= 1
 
-        url = f"{self._base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json",
-        }
         body = {
             "model": self._model,
             "messages": [
@@ -58,18 +128,76 @@ class GroqText:
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
-
-        resp = requests.post(url, headers=headers, json=body, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
+        data = self._post(body)
         text = ((data.get("choices") or [{}])[0].get("message") or {}).get("content")
         text = (text or "").strip()
-        self._cache[k] = text
+        self._remember(self._key(self._payload(system, user, temperature, max_tokens)), text)
         return text
 
+    def _post(self, body: dict[str, Any]) -> dict[str, Any]:
+        url = f"{self._base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json",
+        }
+        give_up = time.monotonic() + self._deadline
+        attempt = 0
+        while True:
+            left = give_up - time.monotonic()
+            if left <= 0 or not self._bucket.acquire(timeout=left):
+                raise TimeoutError(f"Groq request missed its {self._deadline:.0f}s deadline")
+
+            retry_after = None
+            try:
+                timeout = min(30.0, max(0.1, give_up - time.monotonic()))
+                resp = self._session.post(url, headers=headers, json=body, timeout=timeout)
+                if resp.status_code not in _RETRY_STATUS:
+                    resp.raise_for_status()
+                    return resp.json()
+                error: Exception = requests.HTTPError(f"{resp.status_code} from Groq", response=resp)
+                retry_after = _retry_after_seconds(resp)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt >= self._max_retries:
+                raise error
+            # Full jitter: sleep uniformly in [0, 0.5s * 2^attempt], capped at 8s.
+            pause = self._jitter.uniform(0, min(8.0, 0.5 * 2**attempt))
+            if retry_after is not None:
+                pause = max(pause, retry_after)
+            if time.monotonic() + pause >= give_up:
+                raise error
+            time.sleep(pause)
+            attempt += 1
+
+    def close(self) -> None:
+        self._session.close()
+        if self._store is not None:
+            self._store.close()
+
+
+def _retry_after_seconds(resp: requests.Response) -> float | None:
+    try:
+        return float(resp.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
 
 def build_groq_from_env() -> GroqText:
     api_key = os.getenv("GROQ_API_KEY", "")
     model = os.getenv("GROQ_MODEL", "llama-3.1-70b-versatile")
     max_calls = int(os.getenv("GROQ_MAX_CALLS", "40"))
-    return GroqText(api_key=api_key, model=model, max_calls=max_calls)
+    cache_path = os.getenv("LLM_CACHE_PATH", "output/llm_cache.sqlite")
+    cache = None
+    if api_key and cache_path:
+        cache = LLMCache(cache_path, max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024)
+    return GroqText(
+        api_key=api_key,
+        model=model,
+        max_calls=max_calls,
+        cache=cache,
+        concurrency=int(os.getenv("LLM_CONCURRENCY", "8")),
+        rate_per_sec=float(os.getenv("LLM_RATE_PER_SEC", "2")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        deadline=float(os.getenv("LLM_DEADLINE_SECONDS", "60")),
+    )
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+import re
+import sys
+
+from utils.corpora import DEPARTMENTS, ENG_AREAS, PRODUCT_AREAS
+
+PROMPTS_DIR = Path(__file__).resolve().parents[2] / "prompts"
+
+_ENG_TYPES = {"sprint", "bug_triage"}
+
+_VERB_SYNONYMS = {
+    "Fix": ["Fix", "Resolve", "Patch"],
+    "Improve": ["Improve", "Tighten", "Streamline"],
+    "Refactor": ["Refactor", "Simplify", "Clean up"],
+    "Add": ["Add", "Introduce", "Support"],
+    "Remove": ["Remove", "Retire", "Deprecate"],
+    "Investigate": ["Investigate", "Root-cause", "Diagnose"],
+    "Harden": ["Harden", "Stabilize", "Lock down"],
+    "Optimize": ["Optimize", "Speed up", "Tune"],
+}
+
+_DOC_VERBS = ["Draft", "Finalize", "Review", "Publish", "Refresh", "Prepare", "Align on"]
+
+_MILESTONES = ["beta", "GA launch", "the next release", "quarter close", "Q3 planning", "the exec review", "rollout"]
+
+_ENG_PATTERNS = [
+    "{verb} {object} {detail} in {area}",
+    "{area}: {verb_lc} {object} for {detail}",
+    "{verb} {area} {object} before {milestone}",
+    "{verb} {object} ({detail}) ahead of {milestone}",
+]
+
+_DOC_PATTERNS = [
+    "{doc_verb} {asset} for {head}",
+    "{head}: {asset_lc} {suffix}",
+    "{doc_verb} {head} {asset_lc} with {team} input",
+    "{head}: {doc_verb_lc} {asset_lc} before {milestone}",
+]
+
+_SUFFIXES = ["review with stakeholders", "ahead of rollout", "pending approvals", "sign-off", "final pass", "v2"]
+
+_SENTENCES = [
+    "Scope covers {object} across {area}; coordinate with {team} before {milestone}.",
+    "Validate in staging and get sign-off from {team}.",
+    "Track {word} here and keep owners updated until {milestone}.",
+    "Document open questions and link the plan for {milestone}.",
+    "{team} needs this before {milestone}; flag blockers early.",
+    "Call out {word} in the weekly update for {team}.",
+    "Keep changes small and reversible; note {word} in the thread.",
+]
+
+_BULLETS = ["Context", "Goal", "Out of scope", "Risks", "Dependencies", "Rollout", "Links"]
+
+
+def _enterprise_words(prompts_dir: Path) -> list[str]:
+    # "- Prefer real enterprise language: dependencies, rollout, ..." in the user prompt.
+    try:
+        text = (prompts_dir / "task_enrich_user.txt").read_text(encoding="utf-8")
+    except OSError:
+        text = ""
+    m = re.search(r"enterprise language:\s*(.+)", text)
+    words = [w.strip() for w in m.group(1).split(",")] if m else []
+    return [w for w in words if w] or ["dependencies", "rollout", "stakeholders", "approvals"]
+
+
+@lru_cache(maxsize=4096)
+def _split_title(base: str) -> tuple[str, str, str]:
+    """(head, body, detail) of a generated base title, e.g. "Auth: Fix x (y)"."""
+    head, body = "", base
+    for sep in (": ", " - "):
+        if sep in base:
+            head, body = base.split(sep, 1)
+            break
+    detail = ""
+    if body.endswith(")") and " (" in body:
+        body, detail = body[:-1].split(" (", 1)
+    return head, body, detail
+
+
+@lru_cache(maxsize=4096)
+def _lower(text: str) -> str:
+    # Lowercase ordinary words, keep acronyms and names like "PRD" or "SOC2".
+    return " ".join(w.lower() if w[1:].islower() else w for w in text.split())
+
+
+class _Picks:
+    """Deterministic choices drawn from one 256-bit digest (much cheaper
+    than seeding a random.Random per task)."""
+
+    __slots__ = ("_h",)
+
+    def __init__(self, key: bytes) -> None:
+        self._h = int.from_bytes(hashlib.blake2b(key, digest_size=32).digest(), "little")
+
+    def below(self, n: int) -> int:
+        self._h, r = divmod(self._h, n)
+        return r
+
+    # choice/sample inline `below`: they run about a dozen times per task.
+    def choice(self, seq):
+        self._h, r = divmod(self._h, len(seq))
+        return seq[r]
+
+    def sample(self, seq, k: int) -> list:
+        pool = list(seq)
+        out = []
+        h = self._h
+        for n in range(len(pool), len(pool) - k, -1):
+            h, r = divmod(h, n)
+            out.append(pool.pop(r))
+        self._h = h
+        return out
+
+
+def _clamp_words(title: str, picks: _Picks, lo: int = 4, hi: int = 12) -> str:
+    # Prompt constraint: 4-12 words, no trailing period.
+    words = title.rstrip(".").split()
+    while len(words) < lo:
+        words += picks.choice(_SUFFIXES).split()
+    return " ".join(words[:hi])
+
+
+class LocalText:
+    """Offline stand-in for GroqText: a seeded grammar over utils/corpora.py
+    and the prompts/ files.
+
+    It has the same interface (`enabled`, `remaining`, `cache`,
+    `concurrency`, `lookup`, `fetch`, `complete`, `close`) and answers the
+    same prompts with the same JSON shapes: an object for a single task, an
+    array for a batched prompt. Output depends only on the seed and the
+    prompt, so re-runs are reproducible without a cache. Selected with
+    LLM_BACKEND=local.
+    """
+
+    enabled = True
+    remaining = sys.maxsize
+    cache = None
+    # Generation is CPU-bound and fast; callers should not fan out to threads.
+    concurrency = 1
+
+    def __init__(self, seed: int, prompts_dir: Path = PROMPTS_DIR) -> None:
+        self._seed = seed
+        self._words = _enterprise_words(prompts_dir)
+        self._teams = DEPARTMENTS
+        self._areas = ENG_AREAS + PRODUCT_AREAS
+
+    def generate(self, project_type: str, base_title: str, salt: str = "") -> tuple[str, str | None]:
+        """(title, description) for one task."""
+        pk = _Picks(f"{self._seed}|{project_type}|{base_title}|{salt}".encode("utf-8"))
+        head, body, detail = _split_title(base_title)
+        team = pk.choice(self._teams)
+        milestone = pk.choice(_MILESTONES)
+        verb, _, obj = body.partition(" ")
+
+        if project_type in _ENG_TYPES and verb in _VERB_SYNONYMS and obj:
+            verb = pk.choice(_VERB_SYNONYMS[verb])
+            area = head or pk.choice(self._areas)
+            title = pk.choice(_ENG_PATTERNS).format(
+                verb=verb,
+                verb_lc=verb.lower(),
+                object=obj,
+                detail=detail or pk.choice(self._words),
+                area=area,
+                milestone=milestone,
+            )
+        else:
+            doc_verb = pk.choice(_DOC_VERBS)
+            asset = body if head else pk.choice(["plan", "brief", "checklist", "rollout doc"])
+            area = head or body
+            title = pk.choice(_DOC_PATTERNS).format(
+                doc_verb=doc_verb,
+                doc_verb_lc=doc_verb.lower(),
+                asset=asset,
+                asset_lc=_lower(asset),
+                head=area,
+                suffix=pk.choice(_SUFFIXES),
+                team=team,
+                milestone=milestone,
+            )
+            obj = _lower(asset)
+        title = _clamp_words(title, pk)
+
+        # Same mix as the heuristic descriptions: none, prose or bullets.
+        r = pk.below(10)
+        if r < 2:
+            return title, None
+        fill = {"object": obj, "area": area, "team": team, "milestone": milestone}
+        if r < 7:
+            sentences = pk.sample(_SENTENCES, 1 + pk.below(3))
+            return title, " ".join(t.format(word=pk.choice(self._words), **fill) for t in sentences)
+        n = 3 + pk.below(3)
+        lines = [
+            f"- {b}: {t.format(word=pk.choice(self._words), **fill)}"
+            for b, t in zip(pk.sample(_BULLETS, n), pk.sample(_SENTENCES, n))
+        ]
+        return title, "\n".join(lines)
+
+    def _answer(self, fields: dict[str, str]) -> dict[str, str | None]:
+        title, desc = self.generate(
+            fields.get("Project type", ""),
+            fields.get("Base task title", ""),
+            "|".join((fields.get("Project", ""), fields.get("Section", ""), fields.get("Variant", ""))),
+        )
+        return {"title": title, "description": desc}
+
+    def lookup(self, system: str, user: str, temperature: float = 0.6, max_tokens: int = 600) -> str | None:
+        # Nothing is cached: generating is cheaper than a cache lookup.
+        return None
+
+    def fetch(self, system: str, user: str, temperature: float = 0.6, max_tokens: int = 600) -> str:
+        blocks: list[dict[str, str]] = []
+        batched = False
+        cur: dict[str, str] = {}
+        for line in user.splitlines():
+            if re.fullmatch(r"\[\d+\]", line):
+                batched = True
+                cur = {}
+                blocks.append(cur)
+                continue
+            key, sep, value = line.partition(": ")
+            if sep and key in {"Project", "Project type", "Section", "Base task title", "Variant"}:
+                if not blocks:
+                    blocks.append(cur)
+                cur[key] = value
+        if batched:
+            return json.dumps([{"id": i, **self._answer(b)} for i, b in enumerate(blocks, start=1)])
+        return json.dumps(self._answer(blocks[0] if blocks else {}))
+
+    def complete(self, system: str, user: str, temperature: float = 0.6, max_tokens: int = 600) -> str:
+        return self.fetch(system, user, temperature, max_tokens)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Sequence
+
+from utils.foreign_keys import ForeignKey
+from utils.stats import QuantileSketch
+
+
+def _keys(cols: dict[str, int], key: Sequence[str], batch: list[Sequence[object]]) -> list[object]:
+    # Values of `key` in each row (a tuple for composite keys), skipping NULLs
+    # as FK enforcement does. Columns left out of the insert are NULL.
+    if len(key) == 1:
+        i = cols.get(key[0])
+        return [] if i is None else [r[i] for r in batch if r[i] is not None]
+    idx = [cols.get(k) for k in key]
+    if None in idx:
+        return []
+    return [k for k in (tuple(r[i] for i in idx) for r in batch) if None not in k]
+
+
+class OnlineStats:
+    """Sanity-report statistics collected from rows as they are inserted.
+
+    Fed by the BackgroundWriter (`observe`) with every inserted batch, on
+    the writer thread, so no locking is needed and nothing is re-read from
+    the database. `table_stats` has the same shape as
+    `sanity_check.scan_tables`, so the same checks apply to either.
+
+    FK edges given to `watch_foreign_keys` are audited by remembering every
+    parent key and counting every child key; orphans are counted at report
+    time, so the order in which tables are written does not matter.
+
+    Sketched distributions: task cycle time (created -> completed, days),
+    due-date offset (created date -> due date, days) and per-user task load.
+    """
+
+    def __init__(self, today: str | None = None) -> None:
+        # Same reference as date('now') in the SQL checks (UTC).
+        self.today = today or datetime.now(timezone.utc).date().isoformat()
+        self.rows: Counter[str] = Counter()
+        self.tasks: Counter[str] = Counter()
+        self.cycle_days = QuantileSketch()
+        self.due_offset_days = QuantileSketch()
+        self.load: Counter[object] = Counter()
+        self._fks: dict[str, list[ForeignKey]] = {}
+        self._parent_keys: dict[str, set[tuple[str, ...]]] = {}
+        # (parent table, parent columns) -> keys seen; FK edge -> child key counts.
+        self._keys: dict[tuple[str, tuple[str, ...]], set[object]] = {}
+        self._refs: dict[ForeignKey, Counter[object]] = {}
+        self._index: dict[tuple[str, tuple[str, ...]], dict[str, int]] = {}
+
+    def _cols(self, table: str, columns: Sequence[str]) -> dict[str, int]:
+        key = (table, tuple(columns))
+        idx = self._index.get(key)
+        if idx is None:
+            idx = self._index[key] = {c: i for i, c in enumerate(columns)}
+        return idx
+
+    def watch_foreign_keys(self, fks: dict[str, list[ForeignKey]]) -> None:
+        """Audit these FK edges (per child table) over the rows observed from now on."""
+        self._fks = fks
+        self._parent_keys = {}
+        for edges in fks.values():
+            for fk in edges:
+                self._parent_keys.setdefault(fk.parent, set()).add(fk.parent_columns)
+
+    def observe(self, table: str, columns: Sequence[str] | None, batch: list[Sequence[object]]) -> None:
+        self.rows[table] += len(batch)
+        if columns is None:
+            return
+        c = self._cols(table, columns)
+        for key in self._parent_keys.get(table, ()):
+            self._keys.setdefault((table, key), set()).update(_keys(c, key, batch))
+        for fk in self._fks.get(table, ()):
+            self._refs.setdefault(fk, Counter()).update(_keys(c, fk.columns, batch))
+        if table == "tasks":
+            self._observe_tasks(c, batch)
+
+    def _observe_tasks(self, c: dict[str, int], batch: list[Sequence[object]]) -> None:
+        i_assignee = c["assignee_user_id"]
+        i_created, i_due = c["created_at"], c["due_date"]
+        i_done, i_done_at = c["completed"], c["completed_at"]
+        today, load = self.today, self.load
+        counts = self.tasks
+        for r in batch:
+            assignee = r[i_assignee]
+            if assignee is None:
+                counts["unassigned"] += 1
+            else:
+                load[assignee] += 1
+            created, due, done, done_at = r[i_created], r[i_due], r[i_done], r[i_done_at]
+            if (done == 1 and done_at is None) or (done == 0 and done_at is not None):
+                counts["completed_mismatch"] += 1
+            if due is None:
+                counts["no_due"] += 1
+            else:
+                if due < today and done == 0:
+                    counts["overdue_open"] += 1
+                offset = date.fromisoformat(due).toordinal() - date.fromisoformat(created[:10]).toordinal()
+                self.due_offset_days.add(offset)
+            if done_at is not None:
+                delta = datetime.fromisoformat(done_at) - datetime.fromisoformat(created)
+                self.cycle_days.add(delta.total_seconds() / 86400)
+
+    def merge(self, other: OnlineStats) -> None:
+        self.rows.update(other.rows)
+        self.tasks.update(other.tasks)
+        self.load.update(other.load)
+        self.cycle_days.merge(other.cycle_days)
+        self.due_offset_days.merge(other.due_offset_days)
+        for key, seen in other._keys.items():
+            self._keys.setdefault(key, set()).update(seen)
+        for fk, refs in other._refs.items():
+            self._refs.setdefault(fk, Counter()).update(refs)
+        if not self._fks:
+            self.watch_foreign_keys(other._fks)
+
+    def table_stats(self, tables: Sequence[str]) -> dict[str, dict[str, int]]:
+        """Per-table stats, with one orphan count per watched FK edge."""
+        stats: dict[str, dict[str, int]] = {t: {"rows": self.rows.get(t, 0)} for t in tables}
+        stats["tasks"].update(
+            {k: self.tasks.get(k, 0) for k in ("completed_mismatch", "unassigned", "no_due", "overdue_open")}
+        )
+        for table, edges in self._fks.items():
+            if table not in stats:
+                continue
+            for fk in edges:
+                parents = self._keys.get((fk.parent, fk.parent_columns), set())
+                refs = self._refs.get(fk, Counter())
+                stats[table][fk.key] = sum(n for k, n in refs.items() if k not in parents)
+        return stats
+
+    def distributions(self) -> dict[str, Any]:
+        load = QuantileSketch()
+        for n in self.load.values():
+            load.add(n)
+        # Users with no tasks at all carry zero load.
+        idle = self.rows.get("users", 0) - len(self.load)
+        if idle > 0:
+            load.add(0, idle)
+        return {
+            "task_cycle_days": self.cycle_days.summary(),
+            "task_due_offset_days": self.due_offset_days.summary(),
+            "tasks_per_user": load.summary(),
+        }
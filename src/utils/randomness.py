@@ -1,14 +1,83 @@
 from __future__ import annotations
 
 import random
+from typing import Generic, Sequence, TypeVar
+
 from faker import Faker
+import numpy as np
+
+T = TypeVar("T")
 
 
 def build_rng(seed: int) -> random.Random:
     return random.Random(seed)
 
 
+def derive_rng(seed: int, *stream: int) -> random.Random:
+    # String seeds are hashed with SHA-512 by `random`, so the stream is stable
+    # across processes and independent of PYTHONHASHSEED.
+    return random.Random(":".join(str(k) for k in (seed, *stream)))
+
+
 def build_faker(seed: int) -> Faker:
     fk = Faker()
     fk.seed_instance(seed)
     return fk
+
+
+def alias_table(weights: Sequence[float]) -> tuple[list[float], list[int]]:
+    """Vose's alias method: O(n) build, O(1) draws. Weights need not sum to 1."""
+    n = len(weights)
+    total = float(sum(weights))
+    if n == 0 or total <= 0:
+        raise ValueError("alias_table needs at least one positive weight")
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+class WeightedSampler(Generic[T]):
+    """A fixed discrete distribution, compiled once into an alias table.
+
+    Replaces `rng.choices(values, weights=weights, k=1)[0]` in hot loops: a
+    scalar draw costs one `rng.random()` and no per-call cumulative weights.
+    `sample_indices` / `sample_array` are the vectorized (NumPy) variants.
+    """
+
+    __slots__ = ("values", "_prob", "_alias", "_n", "_arrays")
+
+    def __init__(self, values: Sequence[T], weights: Sequence[float]) -> None:
+        if len(values) != len(weights):
+            raise ValueError("values and weights must have the same length")
+        self.values: tuple[T, ...] = tuple(values)
+        self._prob, self._alias = alias_table(weights)
+        self._n = len(self.values)
+        self._arrays = None
+
+    def sample_index(self, rng: random.Random) -> int:
+        u = rng.random() * self._n
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+    def sample(self, rng: random.Random) -> T:
+        return self.values[self.sample_index(rng)]
+
+    def sample_indices(self, gen: np.random.Generator, n: int) -> np.ndarray:
+        if self._arrays is None:
+            self._arrays = (np.asarray(self._prob), np.asarray(self._alias), np.asarray(self.values))
+        prob, alias, _ = self._arrays
+        u = gen.random(n) * self._n
+        i = u.astype(np.int64)
+        return np.where(u - i < prob[i], i, alias[i])
+
+    def sample_array(self, gen: np.random.Generator, n: int) -> np.ndarray:
+        idx = self.sample_indices(gen, n)
+        return self._arrays[2][idx]
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import queue
+import time
+from typing import Any, Callable, Iterable
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    # Called with the results of all finished stages, keyed by stage name.
+    fn: Callable[[dict[str, Any]], Any]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    name: str
+    start: float
+    end: float
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class StageReport:
+    results: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, StageTiming] = field(default_factory=dict)
+    critical_path: list[str] = field(default_factory=list)
+    critical_path_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class _Finished:
+    name: str
+    result: Any
+    error: BaseException | None
+    start: float
+    end: float
+
+
+def _validate(stages: list[Stage], done: Iterable[str] = ()) -> None:
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names: {names}")
+    known = set(names) | set(done)
+    for s in stages:
+        missing = [d for d in s.deps if d not in known]
+        if missing:
+            raise ValueError(f"Stage {s.name!r} depends on unknown stages {missing}")
+
+    # Kahn's algorithm over the stages being run; anything left over sits on a cycle.
+    indeg = {s.name: sum(d in names for d in s.deps) for s in stages}
+    children: dict[str, list[str]] = {n: [] for n in names}
+    for s in stages:
+        for d in s.deps:
+            if d in children:
+                children[d].append(s.name)
+    ready = [n for n, k in indeg.items() if k == 0]
+    seen = 0
+    while ready:
+        n = ready.pop()
+        seen += 1
+        for c in children[n]:
+            indeg[c] -= 1
+            if indeg[c] == 0:
+                ready.append(c)
+    if seen != len(stages):
+        raise ValueError("Stage graph has a cycle")
+
+
+def critical_path(stages: list[Stage], timings: dict[str, StageTiming]) -> tuple[list[str], float]:
+    """Longest chain of dependent stages by measured duration."""
+    by_name = {s.name: s for s in stages}
+    best: dict[str, tuple[float, list[str]]] = {}
+
+    def visit(name: str) -> tuple[float, list[str]]:
+        if name not in best:
+            own = timings[name].seconds if name in timings else 0.0
+            prev = max((visit(d) for d in by_name[name].deps if d in by_name), default=(0.0, []), key=lambda x: x[0])
+            best[name] = (prev[0] + own, prev[1] + [name])
+        return best[name]
+
+    total, path = max((visit(s.name) for s in stages), default=(0.0, []), key=lambda x: x[0])
+    return path, total
+
+
+def run_stages(stages: list[Stage], workers: int = 4, results: dict[str, Any] | None = None) -> StageReport:
+    """Run a stage DAG, starting each stage as soon as its dependencies finish.
+
+    Stages execute on a thread pool. They are expected to write through one
+    shared db.BackgroundWriter: its FIFO order puts a stage's writes (and
+    reads) behind those of every stage it depends on. `results` holds the
+    outputs of stages that already ran, which the given stages may depend on.
+    """
+    _validate(stages, done=results or ())
+
+    report = StageReport(results=dict(results or {}))
+    pending = {s.name: s for s in stages}
+    running: set[str] = set()
+    finished: queue.Queue = queue.Queue()
+    t0 = time.perf_counter()
+
+    def run(stage: Stage, inputs: dict[str, Any]) -> None:
+        start = time.perf_counter()
+        try:
+            result, error = stage.fn(inputs), None
+        except BaseException as e:
+            result, error = None, e
+        finished.put(_Finished(stage.name, result, error, start - t0, time.perf_counter() - t0))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="stage") as ex:
+        while pending or running:
+            for name in [n for n, s in pending.items() if all(d in report.results for d in s.deps)]:
+                stage = pending.pop(name)
+                running.add(name)
+                ex.submit(run, stage, dict(report.results))
+
+            done = finished.get()
+            running.discard(done.name)
+            if done.error is not None:
+                # Let in-flight stages finish so their threads do not outlive us.
+                pending.clear()
+                while running:
+                    running.discard(finished.get().name)
+                raise done.error
+            report.results[done.name] = done.result
+            report.timings[done.name] = StageTiming(done.name, done.start, done.end)
+
+    report.wall_seconds = time.perf_counter() - t0
+    report.critical_path, report.critical_path_seconds = critical_path(stages, report.timings)
+    return report
+
+
+def prerequisites(stages: list[Stage], name: str) -> list[Stage]:
+    """Stages that `name` depends on, directly or not, in their given order."""
+    by_name = {s.name: s for s in stages}
+    if name not in by_name:
+        raise ValueError(f"Unknown stage {name!r}; expected one of {sorted(by_name)}")
+    needed: set[str] = set()
+    todo = list(by_name[name].deps)
+    while todo:
+        d = todo.pop()
+        if d not in needed:
+            needed.add(d)
+            todo.extend(by_name[d].deps)
+    return [s for s in stages if s.name in needed]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+import math
+from typing import Any, Iterable, Sequence
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style).
+
+    Values fall into logarithmic buckets (gamma = (1 + a) / (1 - a)), so
+    every quantile estimate is within `rel_accuracy` of a true value of the
+    data, and memory grows with log(max / min) rather than with the number
+    of values. Sketches with equal accuracy merge exactly. Exact count, sum,
+    min and max are kept alongside.
+    """
+
+    def __init__(self, rel_accuracy: float = 0.01, min_value: float = 1e-9) -> None:
+        if not 0 < rel_accuracy < 1:
+            raise ValueError(f"rel_accuracy must be in (0, 1), got {rel_accuracy}")
+        self.rel_accuracy = rel_accuracy
+        self._gamma = (1 + rel_accuracy) / (1 - rel_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_value = min_value
+        self._pos: dict[int, int] = {}
+        self._neg: dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float, n: int = 1) -> None:
+        if x > self._min_value:
+            k = math.ceil(math.log(x) / self._log_gamma)
+            self._pos[k] = self._pos.get(k, 0) + n
+        elif x < -self._min_value:
+            k = math.ceil(math.log(-x) / self._log_gamma)
+            self._neg[k] = self._neg.get(k, 0) + n
+        else:
+            self.zeros += n
+        self.count += n
+        self.total += x * n
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def add_many(self, values: Iterable[float]) -> None:
+        for x in values:
+            self.add(x)
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.rel_accuracy != self.rel_accuracy:
+            raise ValueError("Cannot merge sketches with different rel_accuracy")
+        for mine, theirs in ((self._pos, other._pos), (self._neg, other._neg)):
+            for k, n in theirs.items():
+                mine[k] = mine.get(k, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _value(self, k: int) -> float:
+        # Midpoint (in relative terms) of bucket (gamma^(k-1), gamma^k].
+        return 2 * self._gamma**k / (self._gamma + 1)
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Most negative first: larger k on the negative side is further from zero.
+        for k in sorted(self._neg, reverse=True):
+            seen += self._neg[k]
+            if seen > rank:
+                return max(self.min, -self._value(k))
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self._pos):
+            seen += self._pos[k]
+            if seen > rank:
+                return min(self.max, self._value(k))
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def summary(self, quantiles: Iterable[float] = (0.1, 0.5, 0.9, 0.99)) -> dict[str, Any]:
+        out: dict[str, Any] = {"count": self.count}
+        if self.count:
+            out.update(mean=round(self.mean, 4), min=round(self.min, 4), max=round(self.max, 4))
+            for q in quantiles:
+                out[f"p{round(q * 100):02d}"] = round(self.quantile(q), 4)
+        return out
+
+
+class Histogram:
+    """Counts over fixed bins; bin i holds edges[i] <= x < edges[i + 1].
+
+    Values below the first edge or at/above the last are counted as
+    `under` / `over`. Histograms with equal edges merge by addition.
+    """
+
+    def __init__(self, edges: Sequence[float]) -> None:
+        if list(edges) != sorted(edges) or len(edges) < 2:
+            raise ValueError(f"Histogram needs at least two increasing edges, got {edges}")
+        self.edges = list(edges)
+        self.counts = [0] * (len(edges) - 1)
+        self.under = 0
+        self.over = 0
+
+    def add(self, x: float, n: int = 1) -> None:
+        i = bisect_right(self.edges, x) - 1
+        if i < 0:
+            self.under += n
+        elif i >= len(self.counts):
+            self.over += n
+        else:
+            self.counts[i] += n
+
+    def merge(self, other: Histogram) -> None:
+        if other.edges != self.edges:
+            raise ValueError("Cannot merge histograms with different edges")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.under += other.under
+        self.over += other.over
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts) + self.under + self.over
+
+    def shares(self) -> list[float]:
+        total = self.total or 1
+        return [c / total for c in self.counts]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+class StubGroq:
+    """OpenAI-compatible /chat/completions stub on a local port.
+
+    Scripted responses (status, headers, delay) are served first, one per
+    request; after that every request gets a 200 whose content is
+    `respond(user_prompt)`. Every request body is recorded.
+    """
+
+    def __init__(self) -> None:
+        self.script: list[tuple[int, dict[str, str], float]] = []
+        self.respond: Callable[[str], str] = lambda user: json.dumps({"title": "Stub title", "description": None})
+        self.bodies: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.bodies.append(body)
+                    status, headers, delay = stub.script.pop(0) if stub.script else (200, {}, 0.0)
+                time.sleep(delay)
+                if status == 200:
+                    content = stub.respond(body["messages"][-1]["content"])
+                    payload = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+                else:
+                    payload = b'{"error": "scripted"}'
+                try:
+                    self.send_response(status)
+                    for k, v in headers.items():
+                        self.send_header(k, v)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timeout) before the reply.
+                    pass
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def calls(self) -> int:
+        return len(self.bodies)
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def groq_stub(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    stub = StubGroq()
+    monkeypatch.setenv("GROQ_BASE_URL", stub.base_url)
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setenv("LLM_RATE_PER_SEC", "0")
+    yield stub
+    stub.close()
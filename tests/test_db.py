@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from pathlib import Path
+import shutil
+import sqlite3
+
+import pytest
+
+from utils import db
+
+
+def _old_db(path: Path, rows: int) -> sqlite3.Connection:
+    # WAL file whose committed frames have not been checkpointed yet.
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(rows)])
+    conn.commit()
+    return conn
+
+
+def _new_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (-1)")
+    return conn
+
+
+def _count(path: Path) -> int:
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_old_file_is_whole_if_the_swap_never_happens(tmp_path, monkeypatch):
+    path = tmp_path / "out.sqlite"
+    old = _old_db(path, 500)
+    assert Path(f"{path}-wal").stat().st_size > 0
+
+    def crash(src, dst):
+        raise OSError("crashed before the rename")
+
+    monkeypatch.setattr(db.os, "replace", crash)
+    with pytest.raises(OSError):
+        db.persist(_new_db(), str(path))
+
+    # The main file alone, without any sidecar, still holds every old row.
+    # Copied before `old` closes, as its close would checkpoint the WAL.
+    alone = tmp_path / "alone.sqlite"
+    shutil.copy(path, alone)
+    old.close()
+    assert _count(alone) == 500
+
+
+def test_persist_replaces_the_old_file(tmp_path):
+    path = tmp_path / "out.sqlite"
+    _old_db(path, 500).close()
+    db.persist(_new_db(), str(path))
+    assert _count(path) == 1
+    assert not Path(f"{path}.tmp").exists()
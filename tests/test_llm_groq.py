@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from generators.enrichment import enrich_tasks
+from utils.llm_groq import GroqText
+
+TEMPLATES = ["Draft rollout plan", "Review API contract", "Fix login bug", "Update runbook", "Plan sprint demo"]
+
+
+def _client(**kwargs) -> GroqText:
+    opts = {"max_calls": 10, "rate_per_sec": 0, "max_retries": 4, "deadline": 5.0}
+    opts.update(kwargs)
+    return GroqText(api_key="test-key", model="stub-model", **opts)
+
+
+def _refine(user: str) -> str:
+    # Single-task prompt -> JSON answer derived from its base title.
+    base = re.search(r"Base task title: (.+)", user).group(1)
+    return json.dumps({"title": f"Refined {base}", "description": "From the stub."})
+
+
+def _refine_batch(user: str) -> str:
+    bases = re.findall(r"Base task title: (.+)", user)
+    return json.dumps([{"id": i, "title": f"Refined {b}", "description": None} for i, b in enumerate(bases, start=1)])
+
+
+def _tasks_db(copies: int = 2) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE tasks (task_id TEXT PRIMARY KEY, project_id TEXT, section_id TEXT, name TEXT, description TEXT)")
+    rows = [(f"t{i}-{k}", "p1", "s1", name, None) for k in range(copies) for i, name in enumerate(TEMPLATES)]
+    conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?)", rows)
+    return conn
+
+
+def _enrich(conn: sqlite3.Connection, batch_size: int = 1) -> int:
+    cfg = SimpleNamespace(
+        use_llm_text=True,
+        llm_backend="groq",
+        llm_dedup="template",
+        llm_variants=1,
+        llm_batch_size=batch_size,
+        task_batch_rows=3,
+        seed=1,
+    )
+    projects = [SimpleNamespace(project_id="p1", project_type="engineering", name="Platform")]
+    sections = [SimpleNamespace(section_id="s1", name="Backlog")]
+    return enrich_tasks(conn, cfg, projects, sections)
+
+
+def _refined(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COUNT(*) FROM tasks WHERE name LIKE 'Refined %'").fetchone()[0]
+
+
+def test_retries_429_and_5xx_honouring_retry_after(groq_stub):
+    groq_stub.script = [(429, {"Retry-After": "0.3"}, 0.0), (503, {}, 0.0)]
+    client = _client()
+    t0 = time.monotonic()
+    text = client.fetch("sys", "hello")
+    assert json.loads(text)["title"] == "Stub title"
+    assert groq_stub.calls == 3
+    assert time.monotonic() - t0 >= 0.3
+
+
+def test_gives_up_after_max_retries(groq_stub):
+    groq_stub.script = [(500, {}, 0.0)] * 3
+    with pytest.raises(requests.HTTPError):
+        _client(max_retries=1).fetch("sys", "hello")
+    assert groq_stub.calls == 2
+
+
+def test_client_errors_are_not_retried(groq_stub):
+    groq_stub.script = [(400, {}, 0.0)]
+    with pytest.raises(requests.HTTPError):
+        _client().fetch("sys", "hello")
+    assert groq_stub.calls == 1
+
+
+def test_deadline_expires_on_slow_server(groq_stub):
+    groq_stub.script = [(200, {}, 2.0)]
+    t0 = time.monotonic()
+    with pytest.raises((TimeoutError, requests.Timeout)):
+        _client(deadline=0.5).fetch("sys", "hello")
+    assert time.monotonic() - t0 < 1.5
+
+
+def test_retry_after_past_deadline_gives_up_without_sleeping(groq_stub):
+    groq_stub.script = [(429, {"Retry-After": "30"}, 0.0)]
+    t0 = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        _client(deadline=2.0).fetch("sys", "hello")
+    assert groq_stub.calls == 1
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_budget_counts_api_calls_only(groq_stub):
+    client = _client(max_calls=1)
+    first = client.fetch("sys", "hello")
+    # Served from the in-run cache: no call, no budget.
+    assert client.complete("sys", "hello") == first
+    with pytest.raises(RuntimeError, match="budget"):
+        client.fetch("sys", "other")
+    assert groq_stub.calls == 1
+
+
+def test_budget_runs_out_partway_through_enrichment(groq_stub, monkeypatch):
+    monkeypatch.setenv("GROQ_MAX_CALLS", "2")
+    groq_stub.respond = _refine_batch
+    conn = _tasks_db()
+    # Three batches of two templates are planned; only two can be sent.
+    assert _enrich(conn, batch_size=2) == 8
+    assert groq_stub.calls == 2
+    assert _refined(conn) == 8
+
+
+def test_bad_json_batch_falls_back_to_single_prompts(groq_stub, monkeypatch):
+    monkeypatch.setenv("GROQ_MAX_CALLS", "20")
+    groq_stub.respond = lambda user: "Sorry, no JSON today" if user.startswith("Rewrite each") else _refine(user)
+    conn = _tasks_db()
+    assert _enrich(conn, batch_size=5) == 10
+    # One batch that failed to parse, then one request per template.
+    assert groq_stub.calls == 1 + len(TEMPLATES)
+    assert _refined(conn) == 10
+
+
+def test_partial_batch_retries_only_missing_items(groq_stub, monkeypatch):
+    monkeypatch.setenv("GROQ_MAX_CALLS", "20")
+
+    def respond(user: str) -> str:
+        if user.startswith("Rewrite each"):
+            # Only the first two of five items come back.
+            return json.dumps(json.loads(_refine_batch(user))[:2])
+        return _refine(user)
+
+    groq_stub.respond = respond
+    conn = _tasks_db()
+    assert _enrich(conn, batch_size=5) == 10
+    assert groq_stub.calls == 1 + len(TEMPLATES) - 2
+
+
+def test_second_run_is_served_from_cache(groq_stub, monkeypatch):
+    monkeypatch.setenv("GROQ_MAX_CALLS", "20")
+    groq_stub.respond = _refine
+    first = _tasks_db()
+    assert _enrich(first) == 10
+    assert groq_stub.calls == len(TEMPLATES)
+
+    # No budget left at all: every prompt must come from the on-disk cache.
+    monkeypatch.setenv("GROQ_MAX_CALLS", "0")
+    second = _tasks_db()
+    assert _enrich(second) == 10
+    assert groq_stub.calls == len(TEMPLATES)
+    assert first.execute("SELECT * FROM tasks ORDER BY task_id").fetchall() == second.execute(
+        "SELECT * FROM tasks ORDER BY task_id"
+    ).fetchall()
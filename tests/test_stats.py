@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from utils.foreign_keys import ForeignKey
+from utils.online_stats import OnlineStats
+from utils.stats import Histogram, QuantileSketch
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+TASK_COLUMNS = ["task_id", "assignee_user_id", "created_at", "due_date", "completed", "completed_at"]
+EDGES = {
+    "tasks": [ForeignKey("tasks", ("assignee_user_id",), "users", ("user_id",))],
+    "subtasks": [ForeignKey("subtasks", ("parent_task_id",), "tasks", ("task_id",))],
+}
+
+
+def _values(n: int = 20000) -> list[float]:
+    rng = random.Random(7)
+    return [rng.lognormvariate(1.0, 1.5) - 2.0 for _ in range(n)]
+
+
+def test_merged_shard_sketches_match_one_sketch():
+    values = _values()
+    whole = QuantileSketch()
+    whole.add_many(values)
+
+    merged = QuantileSketch()
+    for shard in range(4):
+        part = QuantileSketch()
+        part.add_many(values[shard::4])
+        merged.merge(part)
+
+    assert merged.count == whole.count
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    assert merged.total == pytest.approx(whole.total)
+    for q in QUANTILES:
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+def test_sketches_with_different_accuracy_do_not_merge():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_merged_histograms_add_up():
+    values = _values(5000)
+    edges = [-1, 0, 1, 5, 25]
+    whole, merged = Histogram(edges), Histogram(edges)
+    for x in values:
+        whole.add(x)
+    for shard in range(3):
+        part = Histogram(edges)
+        for x in values[shard::3]:
+            part.add(x)
+        merged.merge(part)
+    assert (merged.counts, merged.under, merged.over) == (whole.counts, whole.under, whole.over)
+    with pytest.raises(ValueError):
+        merged.merge(Histogram([0, 1]))
+
+
+def _task(task_id: str, assignee: str | None) -> tuple:
+    return (task_id, assignee, "2026-01-01T09:00:00", "2026-01-05", 1, "2026-01-03T09:00:00")
+
+
+def _observe(stats: OnlineStats, table: str, rows: list[tuple]) -> None:
+    columns = {"users": ["user_id"], "tasks": TASK_COLUMNS, "subtasks": ["subtask_id", "parent_task_id"]}[table]
+    stats.observe(table, columns, rows)
+
+
+def test_online_fk_orphans_are_counted_in_any_order():
+    stats = OnlineStats(today="2026-01-15")
+    stats.watch_foreign_keys(EDGES)
+    # Children may be seen before their parents; NULL keys are not orphans.
+    _observe(stats, "subtasks", [("s1", "t1"), ("s2", "t9"), ("s3", "t2")])
+    _observe(stats, "tasks", [_task("t1", "u1"), _task("t2", None), _task("t3", "u7")])
+    _observe(stats, "users", [("u1",), ("u2",)])
+
+    out = stats.table_stats(["users", "tasks", "subtasks"])
+    assert out["tasks"]["fk_assignee_user_id"] == 1
+    assert out["subtasks"]["fk_parent_task_id"] == 1
+    assert out["tasks"]["unassigned"] == 1
+
+
+def test_merged_online_stats_match_one_pass():
+    users = [(f"u{i}",) for i in range(10)]
+    tasks = [_task(f"t{i}", f"u{i % 12}") for i in range(60)]
+    subtasks = [(f"s{i}", f"t{i % 70}") for i in range(90)]
+
+    whole = OnlineStats(today="2026-01-15")
+    whole.watch_foreign_keys(EDGES)
+    for table, rows in (("users", users), ("tasks", tasks), ("subtasks", subtasks)):
+        _observe(whole, table, rows)
+
+    merged = OnlineStats(today="2026-01-15")
+    for shard in range(3):
+        part = OnlineStats(today="2026-01-15")
+        part.watch_foreign_keys(EDGES)
+        for table, rows in (("users", users), ("tasks", tasks), ("subtasks", subtasks)):
+            _observe(part, table, rows[shard::3])
+        merged.merge(part)
+
+    tables = ["users", "tasks", "subtasks"]
+    assert merged.table_stats(tables) == whole.table_stats(tables)
+    assert merged.distributions() == whole.distributions()